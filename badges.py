@@ -0,0 +1,44 @@
+# badges.py
+from collections import namedtuple
+from datetime import datetime
+
+# A badge is earned once one of the student's counters reaches a threshold.
+# The counters are the Repository.BADGE_STATS names, kept current by triggers,
+# so adding a badge is one line here and needs no new queries.
+BadgeRule = namedtuple("BadgeRule", "badge_name stat threshold")
+
+BADGE_RULES = [
+    BadgeRule("Star Student", "total_points", 50),
+    BadgeRule("Quiz Master", "quiz_count", 5),
+    BadgeRule("Early Bird", "early_submissions", 3),
+]
+
+def badge_message(badge_name):
+    return f"Earned '{badge_name}'!"
+
+def evaluate_badges(repo, student):
+    # One read of the student's counters and badges, then every rule, all in
+    # the caller's transaction so uncommitted points and submissions count.
+    # Returns the names of the newly earned badges.
+    earned = []
+    today = datetime.now().strftime("%Y-%m-%d")
+    with repo.transaction():
+        stats = repo.get_badge_stats(student)
+        held = set(repo.get_badges(student))
+        for rule in BADGE_RULES:
+            if rule.badge_name not in held and stats[rule.stat] >= rule.threshold:
+                repo.add_badge(student, rule.badge_name, today)
+                repo.add_notification(student, badge_message(rule.badge_name))
+                earned.append(rule.badge_name)
+    return earned
+
+def reevaluate_all_badges(repo):
+    # Applies every rule to every student, e.g. after a rule is added or a
+    # threshold lowered. Returns {badge_name: students newly awarded}.
+    awarded = {}
+    today = datetime.now().strftime("%Y-%m-%d")
+    with repo.transaction():
+        for rule in BADGE_RULES:
+            awarded[rule.badge_name] = repo.award_badge_to_qualifying(
+                rule.badge_name, rule.stat, rule.threshold, today, badge_message(rule.badge_name))
+    return awarded
@@ -0,0 +1,164 @@
+# blobstore.py
+import hashlib
+import os
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+BLOB_ROOT = os.path.join("assignments", "blobs")
+CHUNK_SIZE = 1024 * 1024
+# Kernel-side copies for downloads; sendfile() only takes a regular file as
+# its destination on Linux.
+USE_SENDFILE = hasattr(os, "sendfile") and sys.platform.startswith("linux")
+# Linux FICLONE ioctl: a copy-on-write clone on btrfs, XFS and similar.
+FICLONE = 0x40049409
+# Unreferenced blobs younger than this are kept by collect(), so a file stored
+# just before its submission row is committed is not collected in between.
+GC_GRACE_SECONDS = 3600
+
+def is_digest(name):
+    return len(name) == 64 and all(ch in "0123456789abcdef" for ch in name)
+
+def clone_file(source, dest):
+    # Copy-on-write clone where the filesystem supports it; returns False
+    # (leaving nothing behind) where it does not.
+    if fcntl is None:
+        return False
+    try:
+        with open(source, "rb") as src, open(dest, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dest):
+            os.remove(dest)
+        return False
+
+def link_file(source, dest):
+    try:
+        os.link(source, dest)
+        return True
+    except OSError:
+        return False
+
+# The streaming helpers below take an optional progress(done, total) callback,
+# called after every chunk. An exception raised from it (e.g. a cancel)
+# stops the copy, and the helper's caller cleans up the partial file.
+def file_digest(path, progress=None):
+    # Returns (sha256 hex digest, size).
+    digest = hashlib.sha256()
+    size = 0
+    total = os.path.getsize(path)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+            if progress:
+                progress(size, total)
+    return digest.hexdigest(), size
+
+def copy_with_digest(source, dest, progress=None):
+    # One pass over the data: every chunk is hashed as it is written.
+    # Returns (sha256 hex digest, size).
+    digest = hashlib.sha256()
+    size = 0
+    total = os.path.getsize(source)
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            dst.write(chunk)
+            size += len(chunk)
+            if progress:
+                progress(size, total)
+    return digest.hexdigest(), size
+
+def copy_file(source, dest, progress=None):
+    # Streams source to dest a chunk at a time and returns the size; dest is
+    # removed if the copy does not complete.
+    done = 0
+    total = os.path.getsize(source)
+    try:
+        with open(source, "rb") as src, open(dest, "wb") as dst:
+            while True:
+                if USE_SENDFILE:
+                    sent = os.sendfile(dst.fileno(), src.fileno(), done, CHUNK_SIZE)
+                else:
+                    chunk = src.read(CHUNK_SIZE)
+                    dst.write(chunk)
+                    sent = len(chunk)
+                if not sent:
+                    break
+                done += sent
+                if progress:
+                    progress(done, total)
+    except BaseException:
+        if os.path.exists(dest):
+            os.remove(dest)
+        raise
+    return done
+
+class BlobStore:
+    # Submitted files keyed by the SHA-256 of their content, under
+    # root/ab/cd/<digest>, so identical uploads are stored once. Blobs are
+    # read-only; which ones are still needed is tracked by the blobs table
+    # (see init_db), and collect() removes the rest.
+    def __init__(self, root=BLOB_ROOT):
+        self.root = root
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, source, link=False, progress=None):
+        # Stores a copy of `source` and returns (digest, size). The copy is
+        # taken before hashing, so a file changed during the upload cannot
+        # end up under the wrong digest. link=True hardlinks instead, for
+        # files the application owns and will not change (a hardlink to a
+        # user's own file would follow their later edits).
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            if (link and link_file(source, tmp)) or clone_file(source, tmp):
+                digest, size = file_digest(tmp, progress)
+            else:
+                digest, size = copy_with_digest(source, tmp, progress)
+            path = self.path(digest)
+            if os.path.exists(path):
+                # Already stored: refresh it so collect() sees it as new.
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(tmp, 0o444)
+                os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return digest, size
+
+    def blobs(self):
+        # Yields (digest or None for leftovers, path) for every stored file.
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                yield (name if is_digest(name) else None), os.path.join(dirpath, name)
+
+    def collect(self, referenced, grace=GC_GRACE_SECONDS, dry_run=False):
+        # Removes blobs whose digest is not in `referenced`, plus abandoned
+        # temporary files, once they are older than `grace` seconds.
+        # Returns (files removed, bytes freed).
+        cutoff = time.time() - grace
+        removed = freed = 0
+        for digest, path in self.blobs():
+            if digest in referenced:
+                continue
+            stat = os.stat(path)
+            if stat.st_mtime > cutoff:
+                continue
+            if not dry_run:
+                os.chmod(path, 0o644)
+                os.remove(path)
+            removed += 1
+            freed += stat.st_size
+        return removed, freed
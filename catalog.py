@@ -0,0 +1,57 @@
+# catalog.py
+import threading
+from collections import OrderedDict, namedtuple
+
+Course = namedtuple("Course", "course_id course_name teacher description")
+
+class CourseCatalog:
+    # In-process cache of course metadata by course_id, shared by every thread
+    # using the Repository. Misses are loaded together in one query and the
+    # least recently used entries are dropped once `size` is reached. Code that
+    # changes a course calls invalidate(); a load that overlaps an invalidation
+    # is returned but not cached, so it cannot put the old values back.
+    def __init__(self, load, size=1024):
+        self._load = load
+        self._size = size
+        self._courses = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, course_ids):
+        found = {}
+        missing = []
+        with self._lock:
+            generation = self._generation
+            for course_id in course_ids:
+                course = self._courses.get(course_id)
+                if course is None:
+                    missing.append(course_id)
+                else:
+                    self._courses.move_to_end(course_id)
+                    found[course_id] = course
+        if missing:
+            loaded = [Course(*row) for row in self._load(list(dict.fromkeys(missing)))]
+            with self._lock:
+                for course in loaded:
+                    found[course.course_id] = course
+                    if generation == self._generation:
+                        self._courses[course.course_id] = course
+                while len(self._courses) > self._size:
+                    self._courses.popitem(last=False)
+        return found
+
+    def get(self, course_id):
+        return self.get_many([course_id]).get(course_id)
+
+    def names(self, course_ids):
+        # Names in the order given, None for courses that no longer exist.
+        courses = self.get_many(course_ids)
+        return [courses[course_id].course_name if course_id in courses else None for course_id in course_ids]
+
+    def invalidate(self, course_id=None):
+        with self._lock:
+            self._generation += 1
+            if course_id is None:
+                self._courses.clear()
+            else:
+                self._courses.pop(course_id, None)
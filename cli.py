@@ -0,0 +1,150 @@
+# cli.py
+# Runs LMS operations without a display, through the same LMSService the
+# dashboard uses, e.g. from scripts or nightly scheduled jobs.
+#
+#   python cli.py enroll student1 3
+#   python cli.py submit student1 3 12 essay.pdf
+#   python cli.py import-grades teacher1 grades.csv
+#   python cli.py reminders --days 7
+#   python cli.py --profile badges           # print a cProfile of the command
+#
+# Exits with status 2 if the service refuses the request.
+import argparse
+import cProfile
+import getpass
+import pstats
+import sys
+import time
+from database import DB_PATH, init_db
+from repository import Repository
+from services import ROLES, LMSError, LMSService
+
+def report_badges(earned):
+    for badge_name in earned:
+        print(f"earned badge: {badge_name}")
+
+def enroll(service, args):
+    report_badges(service.enroll(args.student, args.course_id))
+    print("enrolled")
+
+def submit(service, args):
+    report_badges(service.submit_assignment(args.student, args.course_id, args.def_id, args.file))
+    print("submitted")
+
+def quiz(service, args):
+    score, earned = service.take_quiz(args.student, args.course_id, args.quiz_id, args.answer)
+    report_badges(earned)
+    print(f"score: {score}/1")
+
+def stats(service, args):
+    grade_stats = service.grade_stats(args.student)
+    print("no grades yet" if grade_stats is None else f"grades: {grade_stats[0]}, avg: {grade_stats[1]:.1f}")
+
+def message(service, args):
+    print(f"sent to {service.send_message(args.sender, args.course_id, args.text)}")
+
+def add_course(service, args):
+    print(f"course {service.add_course(args.teacher, args.name)} added")
+
+def describe_course(service, args):
+    service.update_course_description(args.course_id, args.description)
+    print("updated")
+
+def add_assignment(service, args):
+    print(f"assignment {service.create_assignment(args.course_id, args.title, args.due_date)} added")
+
+def add_quiz(service, args):
+    quiz_id = service.create_quiz(args.course_id, args.title, args.due_date, args.question, args.options, args.correct)
+    print(f"quiz {quiz_id} added")
+
+def grade(service, args):
+    graded = service.grade_submissions(args.teacher, [(args.assignment_id, args.grade, args.comment)])
+    print("graded" if graded else f"submission {args.assignment_id} is not in {args.teacher}'s courses")
+
+def import_grades(service, args):
+    graded, read = service.import_grades(args.teacher, args.csv)
+    print(f"graded {len(graded)} of {read} submission(s)")
+
+def add_user(service, args):
+    password = args.password or getpass.getpass(f"Password for {args.username}: ")
+    service.add_user(args.username, password, args.role)
+    print("user added")
+
+def remove_user(service, args):
+    service.remove_user(args.username)
+    print("user removed")
+
+def reminders(service, args):
+    print(f"added {service.send_due_reminders(args.student, days=args.days)} reminder(s)")
+
+def badges(service, args):
+    for badge_name, students in service.reevaluate_badges().items():
+        print(f"{badge_name}: awarded to {students} student(s)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run LMS operations without the GUI")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--profile", action="store_true", help="print a cProfile of the command")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def command(name, func, help, *arguments):
+        sub = commands.add_parser(name, help=help)
+        for argument, kwargs in arguments:
+            sub.add_argument(argument, **kwargs)
+        sub.set_defaults(func=func)
+        return sub
+
+    command("enroll", enroll, "enrol a student in a course",
+            ("student", {}), ("course_id", {"type": int}))
+    command("submit", submit, "submit a file for an assignment",
+            ("student", {}), ("course_id", {"type": int}), ("def_id", {"type": int}), ("file", {}))
+    command("quiz", quiz, "answer a quiz (answer is the option index)",
+            ("student", {}), ("course_id", {"type": int}), ("quiz_id", {"type": int}), ("answer", {"type": int}))
+    command("stats", stats, "show a student's grade count and average", ("student", {}))
+    command("message", message, "message a course's teacher",
+            ("sender", {}), ("course_id", {"type": int}), ("text", {}))
+    command("add-course", add_course, "add a course", ("teacher", {}), ("name", {}))
+    command("describe-course", describe_course, "set a course's description",
+            ("course_id", {"type": int}), ("description", {}))
+    command("add-assignment", add_assignment, "add an assignment to a course",
+            ("course_id", {"type": int}), ("title", {}), ("due_date", {"help": "YYYY-MM-DD"}))
+    command("add-quiz", add_quiz, "add a quiz to a course",
+            ("course_id", {"type": int}), ("title", {}), ("due_date", {"help": "YYYY-MM-DD"}), ("question", {}),
+            ("options", {"help": "A|B|C|D"}), ("correct", {"type": int, "help": "index of the right option"}))
+    command("grade", grade, "grade one submission",
+            ("teacher", {}), ("assignment_id", {"type": int}), ("grade", {}), ("--comment", {}))
+    command("import-grades", import_grades, "apply a CSV of assignment_id,grade[,comment]",
+            ("teacher", {}), ("csv", {}))
+    command("add-user", add_user, "add a user (prompts for the password)",
+            ("username", {}), ("role", {"choices": ROLES}), ("--password", {}))
+    command("remove-user", remove_user, "remove a user", ("username", {}))
+    command("reminders", reminders, "add due-soon reminders (all students by default)",
+            ("--student", {}), ("--days", {"type": int, "default": 3}))
+    command("badges", badges, "re-evaluate every badge rule for every student")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    init_db(db_path=args.db, progress=print)
+    repo = Repository(args.db)
+    service = LMSService(repo)
+    profiler = cProfile.Profile() if args.profile else None
+    start = time.perf_counter()
+    status = 0
+    try:
+        if profiler:
+            profiler.runcall(args.func, service, args)
+        else:
+            args.func(service, args)
+    except LMSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        status = 2
+    finally:
+        repo.close()
+    print(f"done in {(time.perf_counter() - start) * 1000:.0f} ms", file=sys.stderr)
+    if profiler:
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+    sys.exit(status)
+
+if __name__ == "__main__":
+    main()
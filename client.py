@@ -0,0 +1,252 @@
+# client.py
+# The "server" backend: stand-ins for Repository and LMSService that send
+# each call to server.py. get_repository() and get_service() return these
+# when LMS_SERVER is set, e.g.
+#
+#   LMS_SERVER=http://lms-host:8765 python main.py
+import http.client
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+from blobstore import CHUNK_SIZE, BlobStore
+from server import READ_METHODS, SERVICE_READ_METHODS, WRITE_METHODS
+from services import LMSError, LMSService, ServerError
+
+class ServerClient:
+    # One keep-alive connection per thread: the dashboard calls from the GUI
+    # thread and its workers at the same time.
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.token = None
+        self.credentials = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+            self._local.used = False
+            with self._lock:
+                self._connections[threading.get_ident()] = conn
+        return conn
+
+    def _send(self, path, payload):
+        body = json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        conn = self._connection()
+        try:
+            try:
+                conn.request("POST", path, body, headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server dropped a connection that sat idle; the request
+                # never reached it, so send it once more on a new connection.
+                if not self._local.used:
+                    raise
+                conn.close()
+                conn.request("POST", path, body, headers)
+                response = conn.getresponse()
+            self._local.used = True
+            return response.status, json.loads(response.read())
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            # Refused, timed out, cut off or garbled: start the next request on
+            # a fresh connection and report this one as ServerError.
+            conn.close()
+            self._local.used = False
+            raise ServerError(f"Could not reach the LMS server at {self.host}:{self.port} ({e})") from e
+
+    def request(self, path, payload):
+        status, reply = self._send(path, payload)
+        if status == 401 and self.credentials and path != "/login":
+            # The server restarted and forgot the session: log in again.
+            self.login(*self.credentials)
+            status, reply = self._send(path, payload)
+        return raise_error(reply)
+
+    def login(self, username, password_hash):
+        reply = raise_error(self._send("/login", {"username": username, "password_hash": password_hash})[1])
+        self.token = reply.get("token")
+        self.credentials = (username, password_hash) if self.token else None
+        return reply["result"]
+
+    def _transfer(self, method, path, body=None, headers=None, into=None, progress=None):
+        # A file upload or download on a connection of its own, so a long
+        # transfer (or one cancelled halfway) never disturbs the thread's
+        # keep-alive connection. A download is streamed into the open file
+        # `into`. Returns the JSON reply, or None after a download.
+        headers = dict(headers or {})
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.request(method, path, body, headers)
+            response = conn.getresponse()
+            if response.status == 200 and into is not None:
+                total = int(response.getheader("Content-Length", 0))
+                done = 0
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                    into.write(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress(done, total)
+                return None
+            return response.status, json.loads(response.read())
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise ServerError(f"Could not reach the LMS server at {self.host}:{self.port} ({e})") from e
+        finally:
+            conn.close()
+
+    def upload(self, source, progress=None):
+        # Sends a file to the server's blob store; returns (digest, size).
+        size = os.path.getsize(source)
+        headers = {"Content-Type": "application/octet-stream", "Content-Length": str(size)}
+        for attempt in range(2):
+            with open(source, "rb") as f:
+                status, reply = self._transfer("POST", "/blob", ProgressReader(f, size, progress), headers)
+            if status == 401 and self.credentials and attempt == 0:
+                self.login(*self.credentials)
+                continue
+            break
+        digest, size = raise_error(reply)["result"]
+        return digest, size
+
+    def download(self, digest, f, progress=None):
+        # Streams a blob from the server into the open file f.
+        for attempt in range(2):
+            reply = self._transfer("GET", f"/blob/{digest}", into=f, progress=progress)
+            if reply is None:
+                return
+            status, reply = reply
+            if status == 401 and self.credentials and attempt == 0:
+                self.login(*self.credentials)
+                continue
+            raise_error(reply)
+            raise ServerError(f"Could not download {digest} (HTTP {status})")
+
+    def call(self, name, *params):
+        return self.request("/call", {"method": name, "params": list(params)})["result"]
+
+    def batch(self, calls):
+        # [(name, params)] in one round trip; returns the results in order
+        # and raises the first error.
+        replies = self.request("/batch", {"calls": [{"method": name, "params": list(params)}
+                                                    for name, params in calls]})["results"]
+        return [raise_error(reply)["result"] for reply in replies]
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections = {}
+        self._local = threading.local()
+
+    def close_threads(self, thread_ids):
+        with self._lock:
+            for thread_id in thread_ids:
+                conn = self._connections.pop(thread_id, None)
+                if conn is not None:
+                    conn.close()
+
+class ProgressReader:
+    # A file for http.client to send that reports progress(done, total) as
+    # it is read; an exception from progress (a cancel) stops the upload.
+    def __init__(self, f, total, progress=None):
+        self.f = f
+        self.total = total
+        self.progress = progress
+        self.done = 0
+
+    def read(self, size=-1):
+        chunk = self.f.read(CHUNK_SIZE if size is None or size < 0 else min(size, CHUNK_SIZE))
+        self.done += len(chunk)
+        if self.progress and chunk:
+            self.progress(self.done, self.total)
+        return chunk
+
+def raise_error(reply):
+    if "error" not in reply:
+        return reply
+    if reply.get("type") == "LMSError":
+        raise LMSError(reply["error"])
+    raise ServerError(reply["error"])
+
+class RemoteRepository:
+    # The Repository reads the dashboard uses, answered by the server.
+    # Rows come back as lists rather than tuples.
+    def __init__(self, url):
+        self.client = ServerClient(url)
+
+    def authenticate(self, username, password_hash):
+        return self.client.login(username, password_hash)
+
+    def data_version(self):
+        return self.client.call("repository.data_version")
+
+    def call_many(self, calls):
+        return self.client.batch([(f"repository.{name}", params) for name, params in calls])
+
+    def make_service(self, blobs=None):
+        return RemoteService(self.client, blobs)
+
+    def close(self):
+        self.client.close()
+
+    def close_threads(self, thread_ids):
+        self.client.close_threads(thread_ids)
+
+    def __getattr__(self, name):
+        if name not in READ_METHODS:
+            raise AttributeError(name)
+        return lambda *params: self.client.call(f"repository.{name}", *params)
+
+class RemoteService:
+    # The LMSService operations, run by the server. Submitted files are
+    # uploaded to the server's blob store; files downloaded from it are kept
+    # in the local one, which is then only a cache.
+    def __init__(self, client, blobs=None):
+        self.client = client
+        self.blobs = blobs or BlobStore()
+
+    import_grades = LMSService.import_grades
+
+    def store_submission_file(self, source, progress=None):
+        if not os.path.isfile(source):
+            raise LMSError(f"No such file: {source}")
+        return self.client.upload(source, progress)
+
+    def fetch_submission_file(self, blob, progress=None):
+        path = self.blobs.path(blob)
+        if os.path.exists(path):
+            return path
+        os.makedirs(self.blobs.root, exist_ok=True)
+        tmp = os.path.join(self.blobs.root, f".download.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                self.client.download(blob, f, progress)
+            # put() hashes what arrived, so a damaged download is not cached
+            # under the digest it was asked for.
+            digest, _ = self.blobs.put(tmp, link=True)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        if digest != blob:
+            raise ServerError(f"The download of {blob} was damaged, please try again")
+        return path
+
+    def submit_assignment(self, student, course_id, def_id, source, progress=None):
+        blob, file_size = self.store_submission_file(source, progress)
+        return self.record_submission(student, course_id, def_id, source, blob, file_size)
+
+    def __getattr__(self, name):
+        if name not in WRITE_METHODS and name not in SERVICE_READ_METHODS:
+            raise AttributeError(name)
+        return lambda *params: self.client.call(f"service.{name}", *params)
@@ -1,19 +1,23 @@
 # dashboard.py
-import sqlite3
 import os
-import shutil
-import re
-from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton, 
-                             QListWidget, QFileDialog, QInputDialog, QMessageBox, 
-                             QTabWidget, QStatusBar, QProgressBar, QTextEdit, QApplication,
-                             QListWidgetItem, QCalendarWidget, QCheckBox, QDialog, QTextBrowser, QHBoxLayout, QGraphicsOpacityEffect)
-from PyQt5.QtGui import QIcon, QFont, QPixmap, QTextCharFormat, QColor
-from PyQt5.QtCore import QTimer, Qt, QPropertyAnimation, QEasingCurve, QRect
+                             QListWidget, QListView, QAbstractItemView, QFileDialog, QInputDialog, QMessageBox, 
+                             QTabWidget, QStatusBar, QProgressBar, QTextEdit, QPlainTextEdit, QApplication,
+                             QListWidgetItem, QCalendarWidget, QCheckBox, QDialog, QTextBrowser, QHBoxLayout, QGraphicsOpacityEffect,
+                             QTableWidget, QTableWidgetItem, QLineEdit)
+from PyQt5.QtGui import QIcon, QFont, QPixmap, QTextCharFormat, QTextCursor, QColor
+from PyQt5.QtCore import QTimer, Qt, QPropertyAnimation, QEasingCurve, QRect, QDate, pyqtSignal
 from PyQt5.QtMultimedia import QSound
 from PyQt5.QtChart import QChart, QChartView, QBarSeries, QBarSet, QPieSeries, QPieSlice, QBarCategoryAxis, QValueAxis
-from PIL import Image
-import io
+from repository import get_repository
+from workers import QueryExecutor, TransferExecutor
+from models import PagedListModel, TailListModel
+from blobstore import BlobStore, copy_file
+from previews import PreviewCache, preview_key, read_text_chunk
+from services import LMSError, ServerError, get_service, read_grades_csv
+import profiling
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
 
 class TutorialDialog(QDialog):
     def __init__(self, role, parent=None):
@@ -71,13 +75,153 @@ class AchievementDialog(QDialog):
         self.animation.setEasingCurve(QEasingCurve.OutBounce)
         self.animation.start()
 
+class TextPreviewDialog(QDialog):
+    # Shows a text file a chunk at a time, reading on as the view is
+    # scrolled to the bottom, so a very large file opens immediately.
+    def __init__(self, title, path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Preview")
+        self.setGeometry(200, 200, 600, 500)
+        self.setModal(True)
+        self.path = path
+        self.offset = 0
+
+        layout = QVBoxLayout()
+        label = QLabel(title)
+        label.setFont(QFont("Arial", 14, QFont.Bold))
+        layout.addWidget(label)
+
+        self.text = QPlainTextEdit()
+        self.text.setFont(QFont("Arial", 12))
+        self.text.setReadOnly(True)
+        self.text.verticalScrollBar().valueChanged.connect(self.on_scrolled)
+        layout.addWidget(self.text)
+
+        ok_button = QPushButton("OK", self)
+        ok_button.setFont(QFont("Arial", 14, QFont.Bold))
+        ok_button.clicked.connect(self.accept)
+        layout.addWidget(ok_button)
+
+        self.setLayout(layout)
+        self.load_more()
+
+    def load_more(self):
+        if self.offset is None:
+            return
+        text, self.offset = read_text_chunk(self.path, self.offset)
+        # Inserting through a separate cursor leaves the scroll position alone.
+        cursor = QTextCursor(self.text.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+
+    def on_scrolled(self, value):
+        if value == self.text.verticalScrollBar().maximum():
+            self.load_more()
+
+class BatchGradeDialog(QDialog):
+    # Grades many submissions at once: type into the Grade and Comment
+    # columns, or import a CSV of assignment_id,grade[,comment] (a header
+    # row is skipped). Ids not in the list are added as rows of their own.
+    COLUMNS = ["ID", "Student", "File", "Grade", "Comment"]
+
+    def __init__(self, rows, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Batch Grade")
+        self.setGeometry(200, 200, 700, 500)
+        self.setModal(True)
+        self.original = {}
+
+        layout = QVBoxLayout()
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setFont(QFont("Arial", 12))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        for assignment_id, student, file_path, grade, _ in rows:
+            self.add_row(assignment_id, student, os.path.basename(file_path or ""), grade)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        import_button = QPushButton("Import CSV", self)
+        import_button.setFont(QFont("Arial", 14, QFont.Bold))
+        import_button.clicked.connect(self.import_csv)
+        btn_layout.addWidget(import_button)
+        apply_button = QPushButton("Apply", self)
+        apply_button.setFont(QFont("Arial", 14, QFont.Bold))
+        apply_button.clicked.connect(self.accept)
+        btn_layout.addWidget(apply_button)
+        cancel_button = QPushButton("Cancel", self)
+        cancel_button.setFont(QFont("Arial", 14, QFont.Bold))
+        cancel_button.clicked.connect(self.reject)
+        btn_layout.addWidget(cancel_button)
+        layout.addLayout(btn_layout)
+
+        self.setLayout(layout)
+
+    def add_row(self, assignment_id, student="", file_name="", grade=None):
+        position = self.table.rowCount()
+        self.table.insertRow(position)
+        for column, value in enumerate((assignment_id, student, file_name)):
+            item = QTableWidgetItem(str(value))
+            item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+            self.table.setItem(position, column, item)
+        self.table.setItem(position, 3, QTableWidgetItem(grade or ""))
+        self.table.setItem(position, 4, QTableWidgetItem(""))
+        self.original[assignment_id] = grade or ""
+        return position
+
+    def import_csv(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Grades", "", "CSV files (*.csv)")
+        if not path:
+            return
+        positions = {int(self.table.item(position, 0).text()): position for position in range(self.table.rowCount())}
+        try:
+            grades = read_grades_csv(path)
+        except (OSError, LMSError) as e:
+            QMessageBox.warning(self, "Import CSV", f"Could not import the file: {e}")
+            return
+        for assignment_id, grade, comment in grades:
+            if assignment_id not in positions:
+                positions[assignment_id] = self.add_row(assignment_id)
+            self.table.item(positions[assignment_id], 3).setText(grade)
+            self.table.item(positions[assignment_id], 4).setText(comment or "")
+        QMessageBox.information(self, "Import CSV", f"Imported {len(grades)} grade(s). Check them, then Apply.")
+
+    def grades(self):
+        # [(assignment_id, grade, comment)] for rows whose grade was entered
+        # or changed, or that were given a comment.
+        grades = []
+        for position in range(self.table.rowCount()):
+            assignment_id = int(self.table.item(position, 0).text())
+            grade = self.table.item(position, 3).text().strip()
+            comment = self.table.item(position, 4).text().strip()
+            if grade and (grade != self.original[assignment_id] or comment):
+                grades.append((assignment_id, grade, comment or None))
+        return grades
+
 class DashboardWindow(QMainWindow):
-    def __init__(self, role, username):
+    logged_out = pyqtSignal()
+
+    def __init__(self, role, username, prefetched=None):
         super().__init__()
+        # Freed on close, worker pools included, so logging in and out again
+        # does not keep old windows around.
+        self.setAttribute(Qt.WA_DeleteOnClose)
         self.role = role
         self.username = username
+        self.repo = get_repository()
+        self.blobs = BlobStore()
+        # All writes go through the service; the dashboard only reads through
+        # the repository directly.
+        self.service = get_service(self.repo, self.blobs)
+        self.previews = PreviewCache()
+        self.first_paint_done = False
         self.dark_mode = False
-        self.calendar_cache = {}
+        # Due dates of the months around the one the calendar shows:
+        # {"yyyy-MM-dd": [events]}, the months they cover, and the dates
+        # currently highlighted.
+        self.calendar_dates = {}
+        self.calendar_months = set()
+        self.calendar_highlights = set()
         self.setWindowTitle(f"School LMS - {role.capitalize()}")
         self.setGeometry(150, 150, 900, 700)
         self.update_stylesheet()
@@ -87,6 +231,33 @@ class DashboardWindow(QMainWindow):
         self.status_bar.setFont(QFont("Arial", 12))
         self.status_bar.showMessage("Ready")
 
+        self.loader = QueryExecutor(self)
+        self.loader.error.connect(lambda key, _: self.status_bar.showMessage(f"Could not load {key}"))
+        if prefetched:
+            # Loaded during login (see login.prefetch_dashboard), so the first
+            # tab and the status bar fill without waiting on the database.
+            self.loader.prime(prefetched)
+
+        # Thumbnails are decoded and scaled on a worker of their own, so a
+        # large image never holds up the list and chart queries.
+        self.preview_loader = QueryExecutor(self, max_threads=1)
+        self.preview_loader.error.connect(lambda key, _: self.status_bar.showMessage("Could not generate the preview"))
+
+        # File uploads and downloads run on their own worker, one at a time,
+        # with progress and a Cancel button in the status bar.
+        self.transfers = TransferExecutor(self)
+        self.transfers.progress.connect(self.show_transfer_progress)
+        self.transfers.error.connect(lambda key, _: self.end_transfer(f"{key} failed"))
+        self.transfers.cancelled.connect(lambda key: self.end_transfer(f"{key} cancelled"))
+        self.transfer_progress = QProgressBar()
+        self.transfer_progress.setMaximumWidth(200)
+        self.transfer_progress.hide()
+        self.status_bar.addPermanentWidget(self.transfer_progress)
+        self.transfer_cancel = QPushButton("Cancel")
+        self.transfer_cancel.clicked.connect(lambda: self.transfers.cancel())
+        self.transfer_cancel.hide()
+        self.status_bar.addPermanentWidget(self.transfer_cancel)
+
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
         self.layout = QVBoxLayout()
@@ -97,6 +268,8 @@ class DashboardWindow(QMainWindow):
         self.tabs = QTabWidget()
         self.tabs.setFont(QFont("Arial", 14))
         self.setup_dashboard()
+        self.tabs.currentChanged.connect(self.build_tab)
+        self.build_tab(self.tabs.currentIndex())
         self.layout.addWidget(self.tabs)
 
         mode_toggle = QCheckBox("Dark Mode", self)
@@ -115,10 +288,27 @@ class DashboardWindow(QMainWindow):
         self.timer.timeout.connect(self.check_due_dates)
         self.timer.start(60000)
 
+        # Poll for rows committed by other seats. data_version only moves when
+        # another connection commits, so an idle tick is a single PRAGMA.
+        self.data_version = None
+        self.sync_timer = QTimer(self)
+        self.sync_timer.timeout.connect(self.poll_for_changes)
+        self.sync_timer.start(1000)
+        self.refresh_unread_count()
+
         self.success_sound = QSound("resources/success.wav") if os.path.exists("resources/success.wav") else None
 
         self.animate_tabs()
-        self.show_tutorial()
+        # Let the window paint before the modal tutorial takes over.
+        QTimer.singleShot(0, self.show_tutorial)
+        profiling.mark("dashboard constructed")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_paint_done:
+            self.first_paint_done = True
+            profiling.mark("dashboard first paint")
+            profiling.report_span("login submitted", "dashboard first paint")
 
     def update_stylesheet(self):
         if self.dark_mode:
@@ -130,9 +320,9 @@ class DashboardWindow(QMainWindow):
                 QPushButton { background-color: #1976d2; color: white; padding: 6px; border-radius: 3px; }
                 QPushButton:hover { background-color: #1565c0; }
                 QLabel { font-family: Arial; color: #ffffff; }
-                QListWidget { background-color: #333; color: #ffffff; }
-                QListWidget::item[unread="true"] { background-color: #ff8f00; color: #ffffff; }
-                QListWidget::item[user="true"] { background-color: #1976d2; color: #ffffff; }
+                QListView { background-color: #333; color: #ffffff; }
+                QListView::item[unread="true"] { background-color: #ff8f00; color: #ffffff; }
+                QListView::item[user="true"] { background-color: #1976d2; color: #ffffff; }
             """)
         else:
             self.setStyleSheet("""
@@ -143,9 +333,9 @@ class DashboardWindow(QMainWindow):
                 QPushButton { background-color: #4CAF50; color: white; padding: 6px; border-radius: 3px; }
                 QPushButton:hover { background-color: #45a049; }
                 QLabel { font-family: Arial; }
-                QListWidget { background-color: #ffffff; color: #000000; }
-                QListWidget::item[unread="true"] { background-color: #fff3e0; }
-                QListWidget::item[user="true"] { background-color: #90caf9; color: #000000; }
+                QListView { background-color: #ffffff; color: #000000; }
+                QListView::item[unread="true"] { background-color: #fff3e0; }
+                QListView::item[user="true"] { background-color: #90caf9; color: #000000; }
             """)
 
     def animate_tabs(self):
@@ -164,156 +354,58 @@ class DashboardWindow(QMainWindow):
         tutorial = TutorialDialog(self.role, self)
         tutorial.exec_()
 
+    def show_achievements(self, badge_names):
+        # Called once the surrounding transaction has committed so the write
+        # lock is not held while a modal dialog waits for the user.
+        for badge_name in badge_names:
+            self.show_achievement(badge_name)
+
     def show_achievement(self, badge_name):
         achievement = AchievementDialog(badge_name, self)
         if self.success_sound:
             self.success_sound.play()
         achievement.exec_()
 
-    def validate_due_date(self, due_date):
-        pattern = r"^\d{4}-\d{2}-\d{2}$"
-        if not re.match(pattern, due_date):
-            return False
-        try:
-            datetime.strptime(due_date, "%Y-%m-%d")
-            return True
-        except ValueError:
-            return False
-
-    def award_points(self, student, points, reason):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("INSERT INTO points (student, points, reason) VALUES (?, ?, ?)", (student, points, reason))
-        
-        total_points = self.get_total_points(student)
-        if total_points >= 50 and not self.has_badge(student, "Star Student"):
-            c.execute("INSERT INTO badges (student, badge_name, awarded_date) VALUES (?, ?, ?)",
-                     (student, "Star Student", datetime.now().strftime("%Y-%m-%d")))
-            c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)",
-                     (student, "Earned 'Star Student'!"))
-            self.show_achievement("Star Student")
-
-        quiz_count = self.get_quiz_count(student)
-        if quiz_count >= 5 and not self.has_badge(student, "Quiz Master"):
-            c.execute("INSERT INTO badges (student, badge_name, awarded_date) VALUES (?, ?, ?)",
-                     (student, "Quiz Master", datetime.now().strftime("%Y-%m-%d")))
-            c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)",
-                     (student, "Earned 'Quiz Master'!"))
-            self.show_achievement("Quiz Master")
-
-        if reason.startswith("Submitted assignment") and self.is_early_submission(student, reason):
-            early_count = self.get_early_submission_count(student)
-            if early_count >= 3 and not self.has_badge(student, "Early Bird"):
-                c.execute("INSERT INTO badges (student, badge_name, awarded_date) VALUES (?, ?, ?)",
-                         (student, "Early Bird", datetime.now().strftime("%Y-%m-%d")))
-                c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)",
-                         (student, "Earned 'Early Bird'!"))
-                self.show_achievement("Early Bird")
-
-        conn.commit()
-        conn.close()
+    def succeed(self, message, title="Success"):
+        if self.success_sound:
+            self.success_sound.play()
+        QMessageBox.information(self, title, message)
 
     def get_total_points(self, student):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT SUM(points) FROM points WHERE student=?", (student,))
-        total = c.fetchone()[0] or 0
-        conn.close()
-        return total
-
-    def has_badge(self, student, badge_name):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM badges WHERE student=? AND badge_name=?", (student, badge_name))
-        has_it = c.fetchone()[0] > 0
-        conn.close()
-        return has_it
-
-    def get_quiz_count(self, student):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM quiz_submissions WHERE student=?", (student,))
-        count = c.fetchone()[0]
-        conn.close()
-        return count
-
-    def is_early_submission(self, student, reason):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        assignment_title = reason.split("'")[1]
-        c.execute("SELECT due_date FROM assignments WHERE student=? AND description LIKE ? AND grade IS NULL ORDER BY due_date DESC LIMIT 1",
-                 (student, f"%{assignment_title}%"))
-        due_date = c.fetchone()
-        conn.close()
-        if due_date:
-            due = datetime.strptime(due_date[0], "%Y-%m-%d").date()
-            today = datetime.now().date()
-            return (due - today).days >= 3
-        return False
-
-    def get_early_submission_count(self, student):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM points WHERE student=? AND reason LIKE 'Submitted assignment%' AND EXISTS (SELECT 1 FROM assignments a WHERE a.student=? AND a.description LIKE '%' || SUBSTR(points.reason, 18, LENGTH(points.reason)-18) || '%' AND DATE(a.due_date) >= DATE('now', '+3 days'))",
-                 (student, student))
-        count = c.fetchone()[0]
-        conn.close()
-        return count
+        return self.repo.get_total_points(student)
 
     def get_badges(self, student):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT badge_name FROM badges WHERE student=?", (student,))
-        badges = [row[0] for row in c.fetchall()]
-        conn.close()
-        return badges
+        return self.repo.get_badges(student)
 
     def get_leaderboard(self):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT student, SUM(points) as total_points FROM points GROUP BY student ORDER BY total_points DESC LIMIT 5")
-        leaderboard = c.fetchall()
-        conn.close()
-        return leaderboard
-
-    def get_next_due_date(self):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT due_date FROM assignments WHERE student=? AND grade IS NULL ORDER BY due_date LIMIT 1", 
-                 (self.username,))
-        assignment_date = c.fetchone()
-        c.execute("SELECT due_date FROM quizzes WHERE course_id IN (SELECT course_id FROM enrollments WHERE student=?) AND quiz_id NOT IN (SELECT quiz_id FROM quiz_submissions WHERE student=?) ORDER BY due_date LIMIT 1",
-                 (self.username, self.username))
-        quiz_date = c.fetchone()
-        conn.close()
-        dates = [d[0] for d in [assignment_date, quiz_date] if d]
-        return min(dates) if dates else None
+        return self.repo.get_leaderboard()
 
     def check_due_dates(self):
         if self.role != "student":
             return
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT course_id, due_date, description FROM assignments WHERE student=? AND grade IS NULL", 
-                 (self.username,))
-        assignments = c.fetchall()
-        c.execute("SELECT course_id, due_date, title FROM quizzes WHERE quiz_id NOT IN (SELECT quiz_id FROM quiz_submissions WHERE student=?)",
-                 (self.username,))
-        quizzes = c.fetchall()
-        today = datetime.now().date()
-        for course_id, due_date, desc in assignments + [(q[0], q[1], q[2]) for q in quizzes]:
-            due = datetime.strptime(due_date, "%Y-%m-%d").date()
-            days_left = (due - today).days
-            if 0 <= days_left <= 3:
-                msg = f"Due Soon: '{desc}' on {due_date}"
-                c.execute("SELECT COUNT(*) FROM notifications WHERE username=? AND message=?", (self.username, msg))
-                if c.fetchone()[0] == 0:
-                    c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)", (self.username, msg))
-        conn.commit()
-        conn.close()
-        self.refresh_notif_list()
+        self.loader.load("due_dates", self.service.send_due_reminders, self.username,
+                         callback=lambda added: added and self.sync_lists())
+
+    def add_lazy_tab(self, title, builder):
+        # Tabs start as empty pages; the widgets and their data are only built
+        # the first time the tab is shown.
+        page = QWidget()
+        page.setLayout(QVBoxLayout())
+        index = self.tabs.addTab(page, title)
+        self.tab_builders[index] = (title, builder)
+
+    def build_tab(self, index):
+        if index not in self.tab_builders:
+            return
+        title, builder = self.tab_builders.pop(index)
+        with profiling.phase(f"build {title} tab"):
+            builder(self.tabs.widget(index).layout())
+
+    def is_built(self, widget_name):
+        return hasattr(self, widget_name)
 
     def setup_dashboard(self):
+        self.tab_builders = {}
         if self.role == "student":
             self.student_dashboard()
         elif self.role == "teacher":
@@ -323,38 +415,36 @@ class DashboardWindow(QMainWindow):
 
     # Student Dashboard
     def student_dashboard(self):
-        home_tab = QWidget()
-        home_layout = QVBoxLayout()
+        self.add_lazy_tab("Home", self.build_home_tab)
+        self.add_lazy_tab("Courses", self.build_courses_tab)
+        self.add_lazy_tab("Grades", self.build_grades_tab)
+        self.add_lazy_tab("Progress", self.build_progress_tab)
+        self.add_lazy_tab("Leaderboard", self.build_leaderboard_tab)
+        self.add_lazy_tab("Notifs", self.build_notif_tab)
+        self.add_lazy_tab("Msgs", self.build_messages_tab)
+        self.add_lazy_tab("Chat", self.build_chat_tab)
+        self.add_lazy_tab("Cal", self.build_calendar_tab)
+
+    def build_home_tab(self, home_layout):
         home_label = QLabel("Dashboard")
         home_label.setFont(QFont("Arial", 16, QFont.Bold))
         home_layout.addWidget(home_label)
 
-        points = self.get_total_points(self.username)
-        badges = len(self.get_badges(self.username))
-        pie_series = QPieSeries()
-        pie_series.append("Points", points)
-        pie_series.append("Badges", badges)
-        pie_chart = QChart()
-        pie_chart.addSeries(pie_series)
-        pie_chart.setTitle("Achievements")
-        pie_chart.setTitleFont(QFont("Arial", 14, QFont.Bold))
-        pie_chart_view = QChartView(pie_chart)
-        pie_chart_view.setMinimumSize(300, 300)
-        home_layout.addWidget(pie_chart_view)
-
-        due_date = self.get_next_due_date()
-        due_label = QLabel(f"Next Due: {due_date or 'None'}")
-        due_label.setFont(QFont("Arial", 14))
-        home_layout.addWidget(due_label)
+        self.achievement_chart = QChartView(self.create_achievement_chart((0, 0, None)))
+        self.achievement_chart.setMinimumSize(300, 300)
+        home_layout.addWidget(self.achievement_chart)
+
+        self.due_label = QLabel("Next Due: ...")
+        self.due_label.setFont(QFont("Arial", 14))
+        home_layout.addWidget(self.due_label)
         home_layout.addStretch()
-        home_tab.setLayout(home_layout)
-        self.tabs.addTab(home_tab, "Home")
+        self.refresh_home()
 
-        courses_tab = QWidget()
-        courses_layout = QVBoxLayout()
+    def build_courses_tab(self, courses_layout):
         courses_layout.addWidget(QLabel("Courses", font=QFont("Arial", 16, QFont.Bold)))
         self.course_list = QListWidget()
         self.course_list.setFont(QFont("Arial", 12))
+        self.course_list.currentRowChanged.connect(self.follow_course_selection)
         self.refresh_course_list()
         courses_layout.addWidget(self.course_list)
         btn_layout = QHBoxLayout()
@@ -371,74 +461,66 @@ class DashboardWindow(QMainWindow):
         quiz_button.clicked.connect(self.take_quiz)
         btn_layout.addWidget(quiz_button)
         courses_layout.addLayout(btn_layout)
-        courses_tab.setLayout(courses_layout)
-        self.tabs.addTab(courses_tab, "Courses")
 
-        grades_tab = QWidget()
-        grades_layout = QVBoxLayout()
+    def build_grades_tab(self, grades_layout):
         grades_layout.addWidget(QLabel("Grades", font=QFont("Arial", 16, QFont.Bold)))
-        self.grade_chart = QChartView(self.create_grade_chart())
+        self.grade_chart = QChartView(self.create_grade_chart(([], [])))
         self.grade_chart.setMinimumSize(400, 300)
+        self.refresh_grade_list()
         grades_layout.addWidget(self.grade_chart)
         stats_button = QPushButton("Stats", self)
         stats_button.setFont(QFont("Arial", 14, QFont.Bold))
         stats_button.clicked.connect(self.show_grade_stats)
         grades_layout.addWidget(stats_button)
-        grades_tab.setLayout(grades_layout)
-        self.tabs.addTab(grades_tab, "Grades")
 
-        progress_tab = QWidget()
-        progress_layout = QVBoxLayout()
+    def build_progress_tab(self, progress_layout):
         progress_layout.addWidget(QLabel("Progress", font=QFont("Arial", 16, QFont.Bold)))
-        self.progress_chart = QChartView(self.create_progress_chart())
+        self.progress_chart = QChartView(self.create_progress_chart(([], [], [])))
         self.progress_chart.setMinimumSize(400, 300)
+        self.refresh_progress_list()
         progress_layout.addWidget(self.progress_chart)
-        progress_tab.setLayout(progress_layout)
-        self.tabs.addTab(progress_tab, "Progress")
 
-        leaderboard_tab = QWidget()
-        leaderboard_layout = QVBoxLayout()
+    def build_leaderboard_tab(self, leaderboard_layout):
         leaderboard_layout.addWidget(QLabel("Leaderboard", font=QFont("Arial", 16, QFont.Bold)))
         self.leaderboard_list = QListWidget()
         self.leaderboard_list.setFont(QFont("Arial", 12))
         self.refresh_leaderboard()
         leaderboard_layout.addWidget(self.leaderboard_list)
-        leaderboard_tab.setLayout(leaderboard_layout)
-        self.tabs.addTab(leaderboard_tab, "Leaderboard")
 
-        notif_tab = QWidget()
-        notif_layout = QVBoxLayout()
+    def build_notif_tab(self, notif_layout):
         notif_layout.addWidget(QLabel("Notifications", font=QFont("Arial", 16, QFont.Bold)))
-        self.notif_list = QListWidget()
-        self.notif_list.setFont(QFont("Arial", 12))
+        self.notif_model = PagedListModel(self.loader, "notifications_page", self.repo.get_notifications_page,
+                                          lambda row: row[1], row_state=lambda row: "unread" if row[2] == 0 else None,
+                                          parent=self)
+        self.notif_list = self.create_paged_view(self.notif_model)
         self.refresh_notif_list()
         notif_layout.addWidget(self.notif_list)
         mark_read_button = QPushButton("Mark Read", self)
         mark_read_button.setFont(QFont("Arial", 14, QFont.Bold))
         mark_read_button.clicked.connect(self.mark_notif_read)
         notif_layout.addWidget(mark_read_button)
-        notif_tab.setLayout(notif_layout)
-        self.tabs.addTab(notif_tab, "Notifs")
 
-        messages_tab = QWidget()
-        messages_layout = QVBoxLayout()
+    def build_messages_tab(self, messages_layout):
         messages_layout.addWidget(QLabel("Messages", font=QFont("Arial", 16, QFont.Bold)))
-        self.message_list = QListWidget()
-        self.message_list.setFont(QFont("Arial", 12))
+        fetch_page = self.repo.get_conversation_page if self.role == "teacher" else self.repo.get_received_messages_page
+        self.message_model = PagedListModel(self.loader, "messages_page", fetch_page, self.format_message, parent=self)
+        self.message_list = self.create_paged_view(self.message_model)
         self.refresh_message_list()
         messages_layout.addWidget(self.message_list)
-        send_message_button = QPushButton("Send", self)
-        send_message_button.setFont(QFont("Arial", 14, QFont.Bold))
-        send_message_button.clicked.connect(self.send_message)
-        messages_layout.addWidget(send_message_button)
-        messages_tab.setLayout(messages_layout)
-        self.tabs.addTab(messages_tab, "Msgs")
-
-        chat_tab = QWidget()
-        chat_layout = QVBoxLayout()
+        if self.role == "student":
+            send_message_button = QPushButton("Send", self)
+            send_message_button.setFont(QFont("Arial", 14, QFont.Bold))
+            send_message_button.clicked.connect(self.send_message)
+            messages_layout.addWidget(send_message_button)
+
+    def build_chat_tab(self, chat_layout):
         chat_layout.addWidget(QLabel("Chat", font=QFont("Arial", 16, QFont.Bold)))
-        self.chat_list = QListWidget()
-        self.chat_list.setFont(QFont("Arial", 12))
+        self.chat_model = TailListModel(self.loader, "chat_page", self.repo.get_chat_page_before,
+                                        lambda row: f"{row[3]} {row[1]}: {row[2]}",
+                                        self.repo.get_chat_page_after, parent=self)
+        self.chat_list = self.create_paged_view(self.chat_model)
+        self.chat_list.verticalScrollBar().valueChanged.connect(self.on_chat_scrolled)
+        self.chat_model.rowsInserted.connect(self.on_chat_rows_inserted)
         self.refresh_chat_list()
         chat_layout.addWidget(self.chat_list)
         self.chat_input = QTextEdit()
@@ -449,53 +531,45 @@ class DashboardWindow(QMainWindow):
         send_chat_button.setFont(QFont("Arial", 14, QFont.Bold))
         send_chat_button.clicked.connect(self.send_chat_message)
         chat_layout.addWidget(send_chat_button)
-        chat_tab.setLayout(chat_layout)
-        self.tabs.addTab(chat_tab, "Chat")
 
-        calendar_tab = QWidget()
-        calendar_layout = QVBoxLayout()
+    def build_calendar_tab(self, calendar_layout):
         calendar_layout.addWidget(QLabel("Calendar", font=QFont("Arial", 16, QFont.Bold)))
         self.calendar = QCalendarWidget()
         self.calendar.setFont(QFont("Arial", 12))
         self.calendar.clicked.connect(self.show_calendar_events)
+        self.calendar.currentPageChanged.connect(lambda year, month: self.update_calendar())
         self.update_calendar()
         calendar_layout.addWidget(self.calendar)
         self.calendar_events = QLabel("Select a date")
         self.calendar_events.setFont(QFont("Arial", 12))
         calendar_layout.addWidget(self.calendar_events)
-        calendar_tab.setLayout(calendar_layout)
-        self.tabs.addTab(calendar_tab, "Cal")
-
-    def create_grade_chart(self):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT course_id, grade FROM assignments WHERE student=? AND grade IS NOT NULL", (self.username,))
-        assignments = c.fetchall()
-        c.execute("SELECT q.course_id, qs.score FROM quiz_submissions qs JOIN quizzes q ON qs.quiz_id = q.quiz_id WHERE qs.student=?", (self.username,))
-        quizzes = c.fetchall()
-        conn.close()
 
+    def create_achievement_chart(self, stats):
+        points, badges, _ = stats
+        pie_series = QPieSeries()
+        pie_series.append("Points", points)
+        pie_series.append("Badges", badges)
+        pie_chart = QChart()
+        pie_chart.addSeries(pie_series)
+        pie_chart.setTitle("Achievements")
+        pie_chart.setTitleFont(QFont("Arial", 14, QFont.Bold))
+        return pie_chart
+
+    def refresh_home(self):
+        if not self.is_built("achievement_chart"):
+            return
+        self.loader.load("home", self.repo.get_home_stats, self.username, callback=self.show_home_stats)
+
+    def show_home_stats(self, stats):
+        self.achievement_chart.setChart(self.create_achievement_chart(stats))
+        self.due_label.setText(f"Next Due: {stats[2] or 'None'}")
+
+    def create_grade_chart(self, data):
+        course_names, scores = data
         bar_series = QBarSeries()
         grades_set = QBarSet("Grades")
-        courses = {}
-        for course_id, grade in assignments:
-            try:
-                score = int(grade) if grade.isdigit() else 0
-                courses[course_id] = courses.get(course_id, 0) + score
-            except ValueError:
-                continue
-        for course_id, score in quizzes:
-            courses[course_id] = courses.get(course_id, 0) + score * 100
-
-        course_names = []
-        for course_id in courses:
-            conn = sqlite3.connect("resources/school_lms.db")
-            c = conn.cursor()
-            c.execute("SELECT course_name FROM courses WHERE course_id=?", (course_id,))
-            name = c.fetchone()[0]
-            conn.close()
-            course_names.append(name)
-            grades_set.append(courses[course_id])
+        for score in scores:
+            grades_set.append(score)
 
         bar_series.append(grades_set)
         chart = QChart()
@@ -511,7 +585,7 @@ class DashboardWindow(QMainWindow):
         bar_series.attachAxis(axis_x)
 
         axis_y = QValueAxis()
-        axis_y.setRange(0, max(courses.values(), default=100))
+        axis_y.setRange(0, max(scores, default=100))
         axis_y.setTitleText("Scores")
         axis_y.setTitleFont(QFont("Arial", 12))
         chart.addAxis(axis_y, Qt.AlignLeft)
@@ -519,32 +593,12 @@ class DashboardWindow(QMainWindow):
 
         return chart
 
-    def create_progress_chart(self):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT course_id FROM enrollments WHERE student=?", (self.username,))
-        courses = c.fetchall()
+    def create_progress_chart(self, data):
+        course_names, completed_counts, total_counts = data
         bar_series = QBarSeries()
         completed_set = QBarSet("Completed")
         total_set = QBarSet("Total")
-        course_names = []
-
-        for course_id_tuple in courses:
-            course_id = course_id_tuple[0]
-            c.execute("SELECT course_name FROM courses WHERE course_id=?", (course_id,))
-            course_name = c.fetchone()[0]
-            course_names.append(course_name[:10])
-            c.execute("SELECT COUNT(*) FROM assignment_definitions WHERE course_id=?", (course_id,))
-            total_assignments = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM assignments WHERE course_id=? AND student=?", (course_id, self.username))
-            submitted_assignments = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM quizzes WHERE course_id=?", (course_id,))
-            total_quizzes = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM quiz_submissions WHERE quiz_id IN (SELECT quiz_id FROM quizzes WHERE course_id=?) AND student=?", 
-                     (course_id, self.username))
-            submitted_quizzes = c.fetchone()[0]
-            total = total_assignments + total_quizzes
-            completed = submitted_assignments + submitted_quizzes
+        for completed, total in zip(completed_counts, total_counts):
             completed_set.append(completed)
             total_set.append(total)
 
@@ -556,15 +610,13 @@ class DashboardWindow(QMainWindow):
         chart.setTitleFont(QFont("Arial", 14, QFont.Bold))
 
         axis_x = QBarCategoryAxis()
-        axis_x.append(course_names)
+        axis_x.append([name[:10] for name in course_names])
         axis_x.setTitleText("Courses")
         axis_x.setTitleFont(QFont("Arial", 12))
         chart.addAxis(axis_x, Qt.AlignBottom)
         bar_series.attachAxis(axis_x)
 
-        # Fix: Extract values from total_set manually
-        total_values = [total_set.at(i) for i in range(total_set.count())]
-        max_value = max(total_values) if total_values else 1  # Default to 1 if no values
+        max_value = max(total_counts) if total_counts else 1  # Default to 1 if no values
         axis_y = QValueAxis()
         axis_y.setRange(0, max_value)
         axis_y.setTitleText("Tasks")
@@ -575,8 +627,12 @@ class DashboardWindow(QMainWindow):
         return chart
 
     def refresh_leaderboard(self):
+        if not self.is_built("leaderboard_list"):
+            return
+        self.loader.load("leaderboard", self.get_leaderboard, callback=self.show_leaderboard)
+
+    def show_leaderboard(self, leaderboard):
         self.leaderboard_list.clear()
-        leaderboard = self.get_leaderboard()
         for rank, (student, points) in enumerate(leaderboard, 1):
             item = QListWidgetItem(f"{rank}. {student} - {points}")
             if student == self.username:
@@ -593,200 +649,234 @@ class DashboardWindow(QMainWindow):
         animation.start()
 
     def refresh_course_list(self):
+        if not self.is_built("course_list"):
+            return
+        self.loader.load("courses", self.repo.get_enrolled_courses, self.username, callback=self.show_course_list)
+
+    def show_course_list(self, courses):
+        selected_id = self.selected_course_id()
         self.course_list.clear()
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT c.course_id, c.course_name FROM courses c JOIN enrollments e ON c.course_id = e.course_id WHERE e.student=?", 
-                 (self.username,))
-        courses = c.fetchall()
         for course_id, course_name in courses:
             self.course_list.addItem(f"{course_name} (ID: {course_id})")
-        conn.close()
+            if course_id == selected_id:
+                self.course_list.setCurrentRow(self.course_list.count() - 1)
+
+    def selected_course_id(self):
+        if not self.is_built("course_list"):
+            return None
+        selected = self.course_list.currentItem()
+        if not selected or "ID: " not in selected.text():
+            return None
+        return int(selected.text().split("ID: ")[1].split(")")[0])
 
     def refresh_grade_list(self):
-        self.grade_chart.setChart(self.create_grade_chart())
+        if not self.is_built("grade_chart"):
+            return
+        self.loader.load("grades", self.repo.get_grade_chart, self.username,
+                         callback=lambda data: self.grade_chart.setChart(self.create_grade_chart(data)))
 
     def refresh_progress_list(self):
-        self.progress_chart.setChart(self.create_progress_chart())
+        if not self.is_built("progress_chart"):
+            return
+        self.loader.load("progress", self.repo.get_progress_chart, self.username,
+                         callback=lambda data: self.progress_chart.setChart(self.create_progress_chart(data)))
+
+    def create_paged_view(self, model):
+        view = QListView()
+        view.setFont(QFont("Arial", 12))
+        # Uniform heights let the view lay out only the visible rows.
+        view.setUniformItemSizes(True)
+        view.setModel(model)
+        return view
+
+    def selected_model_row(self, view):
+        index = view.currentIndex()
+        if not index.isValid():
+            return None
+        return view.model().row_at(index.row())
+
+    def refresh_unread_count(self):
+        self.loader.load("unread_count", self.repo.count_unread_notifications, self.username,
+                         callback=lambda count: self.status_bar.showMessage(f"{count} unread"))
+
+    def poll_for_changes(self):
+        # On a worker: with a server backend this is a network round trip,
+        # and one that fails (e.g. while the server restarts) only shows in
+        # the status bar.
+        self.loader.load("data_version", self.repo.data_version, callback=self.on_data_version)
+
+    def on_data_version(self, version):
+        # The first answer is the baseline.
+        if self.data_version is not None and version != self.data_version:
+            self.sync_lists()
+        self.data_version = version
+
+    def sync_lists(self):
+        # Append only rows newer than what each list already holds.
+        self.refresh_unread_count()
+        if self.is_built("notif_list"):
+            self.notif_model.fetch_new()
+        if self.is_built("message_list"):
+            self.message_model.fetch_new()
+        if self.is_built("chat_list"):
+            self.chat_model.fetch_new()
+        # Cheap when nothing of the student's changed: each month is cached
+        # by the repository behind a version check.
+        self.update_calendar()
 
     def refresh_notif_list(self):
-        self.notif_list.clear()
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT notif_id, message, is_read FROM notifications WHERE username=?", (self.username,))
-        notifications = c.fetchall()
-        unread_count = sum(1 for _, _, is_read in notifications if is_read == 0)
-        for notif_id, message, is_read in notifications:
-            item = QListWidgetItem(f"{message}")
-            if is_read == 0:
-                item.setData(Qt.UserRole, "unread")
-            self.notif_list.addItem(item)
-        conn.close()
-        self.status_bar.showMessage(f"{unread_count} unread")
+        self.refresh_unread_count()
+        if self.is_built("notif_list"):
+            self.notif_model.reset(self.username)
 
     def mark_notif_read(self):
-        selected = self.notif_list.currentItem()
+        selected = self.selected_model_row(self.notif_list)
         if not selected:
             QMessageBox.warning(self, "Error", "Select a notification!")
             return
-        notif_id = int(selected.text().split("ID: ")[1].rstrip(")")) if "ID: " in selected.text() else None
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("UPDATE notifications SET is_read=1 WHERE notif_id=?", (notif_id,))
-        conn.commit()
-        conn.close()
-        self.refresh_notif_list()
+        notif_id, message, _ = selected
+        try:
+            self.service.mark_notification_read(notif_id)
+        except ServerError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self.notif_model.update_row(notif_id, (notif_id, message, 1))
+        self.refresh_unread_count()
 
     def refresh_message_list(self):
-        self.message_list.clear()
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT sender, message, timestamp FROM messages WHERE receiver=?", (self.username,))
-        messages = c.fetchall()
-        for sender, message, timestamp in messages:
-            self.message_list.addItem(f"{timestamp} {sender}: {message}")
-        if self.role == "teacher":
-            c.execute("SELECT receiver, message, timestamp FROM messages WHERE sender=?", (self.username,))
-            sent_messages = c.fetchall()
-            for receiver, message, timestamp in sent_messages:
-                self.message_list.addItem(f"{timestamp} To {receiver}: {message}")
-        conn.close()
+        if not self.is_built("message_list"):
+            return
+        self.message_model.reset(self.username)
+
+    def format_message(self, row):
+        msg_id, sender, receiver, message, timestamp = row
+        if sender == self.username:
+            return f"{timestamp} To {receiver}: {message}"
+        return f"{timestamp} {sender}: {message}"
 
     def refresh_chat_list(self):
-        self.chat_list.clear()
-        selected = self.course_list.currentItem()
-        if not selected:
-            self.chat_list.addItem("Select a course")
+        if not self.is_built("chat_list"):
+            return
+        course_id = self.selected_course_id()
+        if course_id is None:
+            self.chat_model.clear()
+            self.status_bar.showMessage("Select a course to see its chat")
             return
-        course_id = int(selected.text().split("ID: ")[1].split(")")[0])
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT sender, message, timestamp FROM chat_messages WHERE course_id=? ORDER BY timestamp", 
-                 (course_id,))
-        messages = c.fetchall()
-        for sender, message, timestamp in messages:
-            self.chat_list.addItem(f"{timestamp} {sender}: {message}")
-        conn.close()
-        self.chat_list.scrollToBottom()
+        self.chat_model.reset(course_id)
+
+    def follow_course_selection(self):
+        # The chat shows the selected course. Reloading the course list
+        # briefly selects nothing; keep the chat until a course is selected.
+        course_id = self.selected_course_id()
+        if course_id is not None and self.is_built("chat_list") and self.chat_model.args != (course_id,):
+            self.chat_model.reset(course_id)
+
+    def on_chat_scrolled(self, value):
+        if value == self.chat_list.verticalScrollBar().minimum() and self.chat_model.rowCount():
+            self.chat_model.fetch_older()
+
+    def on_chat_rows_inserted(self, parent, first, last):
+        if first == 0 and last + 1 < self.chat_model.rowCount():
+            # Older history was prepended: keep the previously first row in place.
+            self.chat_list.scrollTo(self.chat_model.index(last + 1, 0), QAbstractItemView.PositionAtTop)
+        else:
+            self.chat_list.scrollToBottom()
 
     def send_chat_message(self):
-        selected = self.course_list.currentItem()
-        if not selected:
+        course_id = self.selected_course_id()
+        if course_id is None:
             QMessageBox.warning(self, "Error", "Select a course!")
             return
-        course_id = int(selected.text().split("ID: ")[1].split(")")[0])
         message = self.chat_input.toPlainText().strip()
         if message:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            conn = sqlite3.connect("resources/school_lms.db")
-            c = conn.cursor()
-            c.execute("INSERT INTO chat_messages (course_id, sender, message, timestamp) VALUES (?, ?, ?, ?)",
-                     (course_id, self.username, message, timestamp))
-            conn.commit()
-            conn.close()
+            try:
+                self.service.post_chat_message(course_id, self.username, message)
+            except (LMSError, ServerError) as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
             self.chat_input.clear()
-            self.refresh_chat_list()
+            if self.chat_model.args == (course_id,):
+                self.chat_model.fetch_new()
+            else:
+                self.chat_model.reset(course_id)
             if self.success_sound:
                 self.success_sound.play()
 
     def update_calendar(self):
-        if self.calendar_cache.get(self.username):
-            dates = self.calendar_cache[self.username]
-        else:
-            conn = sqlite3.connect("resources/school_lms.db")
-            c = conn.cursor()
-            c.execute("SELECT due_date FROM assignments WHERE student=?", (self.username,))
-            assignment_dates = [datetime.strptime(row[0], "%Y-%m-%d").date() for row in c.fetchall()]
-            c.execute("SELECT due_date FROM quizzes WHERE course_id IN (SELECT course_id FROM enrollments WHERE student=?) AND quiz_id NOT IN (SELECT quiz_id FROM quiz_submissions WHERE student=?)",
-                     (self.username, self.username))
-            quiz_dates = [datetime.strptime(row[0], "%Y-%m-%d").date() for row in c.fetchall()]
-            dates = assignment_dates + quiz_dates
-            self.calendar_cache[self.username] = dates
-            conn.close()
-        for date in dates:
-            format = QTextCharFormat()
-            format.setBackground(Qt.yellow)
-            self.calendar.setDateTextFormat(date, format)
+        if not self.is_built("calendar"):
+            return
+        self.loader.load("calendar", self.repo.get_calendar, self.username,
+                         self.calendar.yearShown(), self.calendar.monthShown(), callback=self.show_calendar_dates)
+
+    def show_calendar_dates(self, data):
+        self.calendar_months, self.calendar_dates = data
+        highlights = set(self.calendar_dates)
+        if highlights == self.calendar_highlights:
+            return
+        # A null date clears every date's format, so dates that no longer
+        # have anything due lose their highlight.
+        self.calendar.setDateTextFormat(QDate(), QTextCharFormat())
+        format = QTextCharFormat()
+        format.setBackground(Qt.yellow)
+        for date_str in highlights:
+            self.calendar.setDateTextFormat(QDate.fromString(date_str, "yyyy-MM-dd"), format)
+        self.calendar_highlights = highlights
 
     def show_calendar_events(self, date):
         date_str = date.toString("yyyy-MM-dd")
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT course_id, description FROM assignments WHERE student=? AND due_date=?", 
-                 (self.username, date_str))
-        assignments = c.fetchall()
-        c.execute("SELECT course_id, title FROM quizzes WHERE course_id IN (SELECT course_id FROM enrollments WHERE student=?) AND due_date=? AND quiz_id NOT IN (SELECT quiz_id FROM quiz_submissions WHERE student=?)",
-                 (self.username, date_str, self.username))
-        quizzes = c.fetchall()
-        events = []
-        for course_id, desc in assignments:
-            c.execute("SELECT course_name FROM courses WHERE course_id=?", (course_id,))
-            course_name = c.fetchone()[0]
-            events.append(f"{course_name}: {desc}")
-        for course_id, title in quizzes:
-            c.execute("SELECT course_name FROM courses WHERE course_id=?", (course_id,))
-            course_name = c.fetchone()[0]
-            events.append(f"{course_name}: {title}")
-        conn.close()
+        if date_str[:7] in self.calendar_months:
+            self.show_events(self.calendar_dates.get(date_str, []))
+        else:
+            self.loader.load("calendar_events", self.load_calendar_events, date_str, callback=self.show_events)
+
+    def show_events(self, events):
         self.calendar_events.setText("\n".join(events) if events else "No events")
 
+    def load_calendar_events(self, date_str):
+        return self.repo.get_events_due_on(self.username, date_str)
+
     def show_grade_stats(self):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT grade FROM assignments WHERE student=? AND grade IS NOT NULL", (self.username,))
-        assignment_grades = c.fetchall()
-        c.execute("SELECT score FROM quiz_submissions WHERE student=?", (self.username,))
-        quiz_scores = c.fetchall()
-        conn.close()
-        grades = [int(g[0]) for g in assignment_grades if g[0].isdigit()] + [s[0] * 100 for s in quiz_scores]
-        if not grades:
+        try:
+            stats = self.service.grade_stats(self.username)
+        except ServerError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        if stats is None:
             QMessageBox.information(self, "Stats", "No grades yet.", QMessageBox.Ok, QMessageBox.Ok)
             return
-        avg_grade = sum(grades) / len(grades)
-        stats = f"Grades: {len(grades)}\nAvg: {avg_grade:.1f}"
-        QMessageBox.information(self, "Stats", stats, QMessageBox.Ok, QMessageBox.Ok)
+        count, avg_grade = stats
+        QMessageBox.information(self, "Stats", f"Grades: {count}\nAvg: {avg_grade:.1f}", QMessageBox.Ok, QMessageBox.Ok)
 
     def enroll_in_course(self):
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT course_id, course_name FROM courses WHERE course_id NOT IN (SELECT course_id FROM enrollments WHERE student=?)", 
-                 (self.username,))
-        available_courses = c.fetchall()
+        available_courses = self.repo.get_available_courses(self.username)
         if not available_courses:
             QMessageBox.information(self, "Info", "No courses available.")
-            conn.close()
             return
         course_names = [f"{course[1]}" for course in available_courses]
         course_name, ok = QInputDialog.getItem(self, "Enroll", "Select Course:", course_names, 0, False)
         if ok and course_name:
             course_id = next(c[0] for c in available_courses if c[1] == course_name)
-            c.execute("INSERT INTO enrollments (course_id, student) VALUES (?, ?)", (course_id, self.username))
-            c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)", (self.username, f"Enrolled in {course_name}"))
-            self.award_points(self.username, 10, f"Enrolled in {course_name}")
-            conn.commit()
+            try:
+                earned = self.service.enroll(self.username, course_id)
+            except (LMSError, ServerError) as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
+            self.show_achievements(earned)
             self.refresh_course_list()
             self.refresh_notif_list()
             self.refresh_progress_list()
             self.update_calendar()
-            if self.success_sound:
-                self.success_sound.play()
-            QMessageBox.information(self, "Success", "Enrolled!")
-        conn.close()
+            self.succeed("Enrolled!")
 
     def submit_assignment(self):
-        selected = self.course_list.currentItem()
-        if not selected:
+        course_id = self.selected_course_id()
+        if course_id is None:
             QMessageBox.warning(self, "Error", "Select a course!")
             return
-        course_id = int(selected.text().split("ID: ")[1].split(")")[0])
         
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT def_id, title, due_date FROM assignment_definitions WHERE course_id=?", (course_id,))
-        assignments = c.fetchall()
+        assignments = self.repo.get_assignment_definitions(course_id)
         if not assignments:
             QMessageBox.information(self, "Info", "No assignments.")
-            conn.close()
             return
         assignment_titles = [f"{a[1]}" for a in assignments]
         assignment_title, ok = QInputDialog.getItem(self, "Submit", "Select Assignment:", assignment_titles, 0, False)
@@ -794,94 +884,83 @@ class DashboardWindow(QMainWindow):
             def_id = next(a[0] for a in assignments if a[1] == assignment_title)
             file_path, _ = QFileDialog.getOpenFileName(self, "Select File")
             if file_path:
-                due_date = next(a[2] for a in assignments if a[0] == def_id)
-                new_path = os.path.join("assignments", f"{self.username}_{course_id}_{def_id}_{os.path.basename(file_path)}")
-                shutil.copy(file_path, new_path)
-                c.execute("INSERT INTO assignments (course_id, student, file_path, due_date, description) VALUES (?, ?, ?, ?, ?)",
-                         (course_id, self.username, new_path, due_date, assignment_title))
-                c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)", (self.username, f"Submitted {assignment_title}"))
-                self.award_points(self.username, 20, f"Submitted assignment '{assignment_title}'")
-                conn.commit()
-                conn.close()
-                self.refresh_grade_list()
-                self.refresh_progress_list()
-                self.refresh_notif_list()
-                self.refresh_leaderboard()
-                self.update_calendar()
-                if self.success_sound:
-                    self.success_sound.play()
-                QMessageBox.information(self, "Success", "Submitted!")
+                self.start_transfer(f"Uploading {os.path.basename(file_path)}", self.service.store_submission_file,
+                                    file_path, callback=lambda stored: self.record_submission(
+                                        course_id, def_id, file_path, *stored))
+
+    def record_submission(self, course_id, def_id, file_path, blob, file_size):
+        try:
+            earned = self.service.record_submission(self.username, course_id, def_id, file_path, blob, file_size)
+        except (LMSError, ServerError) as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self.show_achievements(earned)
+        self.refresh_grade_list()
+        self.refresh_progress_list()
+        self.refresh_notif_list()
+        self.refresh_leaderboard()
+        self.update_calendar()
+        self.succeed("Submitted!")
 
     def take_quiz(self):
-        selected = self.course_list.currentItem()
-        if not selected:
+        course_id = self.selected_course_id()
+        if course_id is None:
             QMessageBox.warning(self, "Error", "Select a course!")
             return
-        course_id = int(selected.text().split("ID: ")[1].split(")")[0])
         
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT quiz_id, title, question, options, correct_answer FROM quizzes WHERE course_id=? AND quiz_id NOT IN (SELECT quiz_id FROM quiz_submissions WHERE student=?)",
-                 (course_id, self.username))
-        quizzes = c.fetchall()
+        quizzes = self.repo.get_open_quizzes(course_id, self.username)
         if not quizzes:
             QMessageBox.information(self, "Info", "No quizzes.")
-            conn.close()
             return
         quiz_titles = [q[1] for q in quizzes]
         quiz_title, ok = QInputDialog.getItem(self, "Quiz", "Select Quiz:", quiz_titles, 0, False)
         if ok and quiz_title:
             quiz = next(q for q in quizzes if q[1] == quiz_title)
-            quiz_id, _, question, options_str, correct_answer = quiz
+            quiz_id, _, question, options_str = quiz
             options = options_str.split("|")
             answer, ok = QInputDialog.getItem(self, f"{quiz_title}", question, options, 0, False)
             if ok and answer:
-                score = 1 if options.index(answer) == correct_answer else 0
-                c.execute("INSERT INTO quiz_submissions (quiz_id, student, answer, score) VALUES (?, ?, ?, ?)",
-                         (quiz_id, self.username, options.index(answer), score))
-                c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)", (self.username, f"Quiz '{quiz_title}': {score}/1"))
-                self.award_points(self.username, 15, f"Completed quiz '{quiz_title}'")
-                conn.commit()
-                conn.close()
+                try:
+                    score, earned = self.service.take_quiz(self.username, course_id, quiz_id, options.index(answer))
+                except (LMSError, ServerError) as e:
+                    QMessageBox.warning(self, "Error", str(e))
+                    return
+                self.show_achievements(earned)
                 self.refresh_grade_list()
                 self.refresh_progress_list()
                 self.refresh_notif_list()
                 self.refresh_leaderboard()
                 self.update_calendar()
-                if self.success_sound:
-                    self.success_sound.play()
-                QMessageBox.information(self, "Success", f"Score: {score}/1")
+                self.succeed(f"Score: {score}/1")
 
     def send_message(self):
-        selected = self.course_list.currentItem()
-        if not selected:
+        course_id = self.selected_course_id()
+        if course_id is None:
             QMessageBox.warning(self, "Error", "Select a course!")
             return
-        course_id = int(selected.text().split("ID: ")[1].split(")")[0])
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT teacher FROM courses WHERE course_id=?", (course_id,))
-        teacher = c.fetchone()[0]
+        teacher = self.repo.get_course_teacher(course_id)
         message, ok = QInputDialog.getText(self, "Message", f"To {teacher}:")
         if ok and message:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            c.execute("INSERT INTO messages (sender, receiver, course_id, message, timestamp) VALUES (?, ?, ?, ?, ?)",
-                     (self.username, teacher, course_id, message, timestamp))
-            c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)", (teacher, f"New message from {self.username}"))
-            conn.commit()
-            conn.close()
-            self.refresh_message_list()
-            if self.success_sound:
-                self.success_sound.play()
-            QMessageBox.information(self, "Success", "Sent!")
+            try:
+                self.service.send_message(self.username, course_id, message)
+            except (LMSError, ServerError) as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
+            self.sync_lists()
+            self.succeed("Sent!")
 
     # Teacher Dashboard
     def teacher_dashboard(self):
-        courses_tab = QWidget()
-        courses_layout = QVBoxLayout()
+        self.add_lazy_tab("Courses", self.build_teacher_courses_tab)
+        self.add_lazy_tab("Assigns", self.build_teacher_assignments_tab)
+        self.add_lazy_tab("Msgs", self.build_messages_tab)
+        self.add_lazy_tab("Chat", self.build_chat_tab)
+
+    def build_teacher_courses_tab(self, courses_layout):
         courses_layout.addWidget(QLabel("Courses", font=QFont("Arial", 16, QFont.Bold)))
         self.course_list = QListWidget()
         self.course_list.setFont(QFont("Arial", 12))
+        self.course_list.currentRowChanged.connect(self.follow_course_selection)
         self.refresh_course_list_teacher()
         courses_layout.addWidget(self.course_list)
         btn_layout = QHBoxLayout()
@@ -906,14 +985,14 @@ class DashboardWindow(QMainWindow):
         add_quiz_button.clicked.connect(self.create_quiz)
         btn_layout.addWidget(add_quiz_button)
         courses_layout.addLayout(btn_layout)
-        courses_tab.setLayout(courses_layout)
-        self.tabs.addTab(courses_tab, "Courses")
 
-        assignments_tab = QWidget()
-        assignments_layout = QVBoxLayout()
+    def build_teacher_assignments_tab(self, assignments_layout):
         assignments_layout.addWidget(QLabel("Assignments", font=QFont("Arial", 16, QFont.Bold)))
-        self.assignment_list = QListWidget()
-        self.assignment_list.setFont(QFont("Arial", 12))
+        self.assignment_model = PagedListModel(self.loader, "assignments_page", self.repo.get_teacher_submissions_page,
+                                               lambda row: f"{row[1]}: {os.path.basename(row[2])} - {row[3] or 'Ungraded'}",
+                                               parent=self)
+        self.assignment_list = self.create_paged_view(self.assignment_model)
+        self.assignment_list.selectionModel().currentChanged.connect(self.prefetch_preview)
         self.refresh_assignment_list()
         assignments_layout.addWidget(self.assignment_list)
         btn_layout = QHBoxLayout()
@@ -925,6 +1004,10 @@ class DashboardWindow(QMainWindow):
         grade_button.setFont(QFont("Arial", 14, QFont.Bold))
         grade_button.clicked.connect(self.grade_assignment)
         btn_layout.addWidget(grade_button)
+        batch_button = QPushButton("Batch Grade", self)
+        batch_button.setFont(QFont("Arial", 14, QFont.Bold))
+        batch_button.clicked.connect(self.batch_grade)
+        btn_layout.addWidget(batch_button)
         preview_button = QPushButton("Preview", self)
         preview_button.setFont(QFont("Arial", 14, QFont.Bold))
         preview_button.clicked.connect(self.preview_assignment)
@@ -934,130 +1017,66 @@ class DashboardWindow(QMainWindow):
         download_button.clicked.connect(self.download_assignment)
         btn_layout.addWidget(download_button)
         assignments_layout.addLayout(btn_layout)
-        assignments_tab.setLayout(assignments_layout)
-        self.tabs.addTab(assignments_tab, "Assigns")
-
-        messages_tab = QWidget()
-        messages_layout = QVBoxLayout()
-        messages_layout.addWidget(QLabel("Messages", font=QFont("Arial", 16, QFont.Bold)))
-        self.message_list = QListWidget()
-        self.message_list.setFont(QFont("Arial", 12))
-        self.refresh_message_list()
-        messages_layout.addWidget(self.message_list)
-        messages_tab.setLayout(messages_layout)
-        self.tabs.addTab(messages_tab, "Msgs")
-
-        chat_tab = QWidget()
-        chat_layout = QVBoxLayout()
-        chat_layout.addWidget(QLabel("Chat", font=QFont("Arial", 16, QFont.Bold)))
-        self.chat_list = QListWidget()
-        self.chat_list.setFont(QFont("Arial", 12))
-        self.refresh_chat_list()
-        chat_layout.addWidget(self.chat_list)
-        self.chat_input = QTextEdit()
-        self.chat_input.setFont(QFont("Arial", 12))
-        self.chat_input.setFixedHeight(50)
-        chat_layout.addWidget(self.chat_input)
-        send_chat_button = QPushButton("Send", self)
-        send_chat_button.setFont(QFont("Arial", 14, QFont.Bold))
-        send_chat_button.clicked.connect(self.send_chat_message)
-        chat_layout.addWidget(send_chat_button)
-        chat_tab.setLayout(chat_layout)
-        self.tabs.addTab(chat_tab, "Chat")
 
     def refresh_course_list_teacher(self):
-        self.course_list.clear()
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT course_id, course_name FROM courses WHERE teacher=?", (self.username,))
-        courses = c.fetchall()
-        for course_id, course_name in courses:
-            self.course_list.addItem(f"{course_name} (ID: {course_id})")
-        conn.close()
+        if not self.is_built("course_list"):
+            return
+        self.loader.load("courses", self.repo.get_teacher_courses, self.username, callback=self.show_course_list)
 
     def refresh_assignment_list(self):
-        self.assignment_list.clear()
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT assignment_id, student, file_path, grade FROM assignments WHERE course_id IN (SELECT course_id FROM courses WHERE teacher=?)", 
-                 (self.username,))
-        self.assignments = c.fetchall()
-        for assignment_id, student, file_path, grade in self.assignments:
-            self.assignment_list.addItem(f"{student}: {os.path.basename(file_path)} - {grade or 'Ungraded'}")
-        conn.close()
+        if not self.is_built("assignment_list"):
+            return
+        self.assignment_model.reset(self.username)
 
     def add_course(self):
         course_name, ok1 = QInputDialog.getText(self, "Add Course", "Course Name:")
         if ok1 and course_name:
-            conn = sqlite3.connect("resources/school_lms.db")
-            c = conn.cursor()
-            c.execute("INSERT INTO courses (course_name, teacher) VALUES (?, ?)", (course_name, self.username))
-            conn.commit()
+            try:
+                self.service.add_course(self.username, course_name)
+            except (LMSError, ServerError) as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
             self.refresh_course_list_teacher()
-            conn.close()
-            if self.success_sound:
-                self.success_sound.play()
-            QMessageBox.information(self, "Success", "Course added!")
+            self.succeed("Course added!")
 
     def edit_course(self):
-        selected = self.course_list.currentItem()
-        if not selected:
+        course_id = self.selected_course_id()
+        if course_id is None:
             QMessageBox.warning(self, "Error", "Select a course!")
             return
-        course_id = int(selected.text().split("ID: ")[1].split(")")[0])
         description, ok = QInputDialog.getText(self, "Edit", "New Description:")
         if ok:
-            conn = sqlite3.connect("resources/school_lms.db")
-            c = conn.cursor()
-            c.execute("UPDATE courses SET description=? WHERE course_id=?", (description, course_id))
-            conn.commit()
-            conn.close()
+            try:
+                self.service.update_course_description(course_id, description)
+            except (LMSError, ServerError) as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
             self.refresh_course_list_teacher()
-            if self.success_sound:
-                self.success_sound.play()
-            QMessageBox.information(self, "Success", "Updated!")
+            self.succeed("Updated!")
 
     def create_assignment(self):
-        selected = self.course_list.currentItem()
-        if not selected:
+        course_id = self.selected_course_id()
+        if course_id is None:
             QMessageBox.warning(self, "Error", "Select a course!")
             return
-        course_id = int(selected.text().split("ID: ")[1].split(")")[0])
         title, ok1 = QInputDialog.getText(self, "Add Assign", "Title:")
         due_date, ok2 = QInputDialog.getText(self, "Add Assign", "Due (YYYY-MM-DD):")
         if ok1 and ok2 and title and due_date:
-            if not self.validate_due_date(due_date):
-                QMessageBox.warning(self, "Error", "Invalid date!")
+            try:
+                self.service.create_assignment(course_id, title, due_date)
+            except (LMSError, ServerError) as e:
+                QMessageBox.warning(self, "Error", str(e))
                 return
-            conn = sqlite3.connect("resources/school_lms.db")
-            c = conn.cursor()
-            c.execute("INSERT INTO assignment_definitions (course_id, title, due_date) VALUES (?, ?, ?)",
-                     (course_id, title, due_date))
-            c.execute("SELECT student FROM enrollments WHERE course_id=?", (course_id,))
-            students = c.fetchall()
-            for student_tuple in students:
-                student = student_tuple[0]
-                c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)",
-                         (student, f"New assignment '{title}' due {due_date}"))
-            conn.commit()
-            conn.close()
-            if self.success_sound:
-                self.success_sound.play()
-            QMessageBox.information(self, "Success", "Assignment added!")
+            self.succeed("Assignment added!")
 
     def edit_assignment(self):
-        selected = self.course_list.currentItem()
-        if not selected:
+        course_id = self.selected_course_id()
+        if course_id is None:
             QMessageBox.warning(self, "Error", "Select a course!")
             return
-        course_id = int(selected.text().split("ID: ")[1].split(")")[0])
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT def_id, title, due_date FROM assignment_definitions WHERE course_id=?", (course_id,))
-        assignments = c.fetchall()
+        assignments = self.repo.get_assignment_definitions(course_id)
         if not assignments:
             QMessageBox.information(self, "Info", "No assignments.")
-            conn.close()
             return
         assignment_titles = [f"{a[1]}" for a in assignments]
         assignment_title, ok = QInputDialog.getItem(self, "Edit Assign", "Select:", assignment_titles, 0, False)
@@ -1066,142 +1085,179 @@ class DashboardWindow(QMainWindow):
             new_title, ok1 = QInputDialog.getText(self, "Edit", "New Title:", text=assignment_title)
             new_due_date, ok2 = QInputDialog.getText(self, "Edit", "New Due (YYYY-MM-DD):", text=assignments[assignment_titles.index(assignment_title)][2])
             if ok1 and ok2:
-                if not self.validate_due_date(new_due_date):
-                    QMessageBox.warning(self, "Error", "Invalid date!")
-                    conn.close()
+                try:
+                    self.service.update_assignment(course_id, def_id, new_title, new_due_date)
+                except (LMSError, ServerError) as e:
+                    QMessageBox.warning(self, "Error", str(e))
                     return
-                c.execute("UPDATE assignment_definitions SET title=?, due_date=? WHERE def_id=?", 
-                         (new_title, new_due_date, def_id))
-                c.execute("SELECT student FROM enrollments WHERE course_id=?", (course_id,))
-                students = c.fetchall()
-                for student_tuple in students:
-                    student = student_tuple[0]
-                    c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)",
-                             (student, f"Assignment '{new_title}' updated: due {new_due_date}"))
-                conn.commit()
-                conn.close()
-                if self.success_sound:
-                    self.success_sound.play()
-                QMessageBox.information(self, "Success", "Updated!")
+                self.succeed("Updated!")
 
     def create_quiz(self):
-        selected = self.course_list.currentItem()
-        if not selected:
+        course_id = self.selected_course_id()
+        if course_id is None:
             QMessageBox.warning(self, "Error", "Select a course!")
             return
-        course_id = int(selected.text().split("ID: ")[1].split(")")[0])
         title, ok1 = QInputDialog.getText(self, "Add Quiz", "Title:")
         due_date, ok2 = QInputDialog.getText(self, "Add Quiz", "Due (YYYY-MM-DD):")
         question, ok3 = QInputDialog.getText(self, "Add Quiz", "Question:")
         options_str, ok4 = QInputDialog.getText(self, "Add Quiz", "Options (A|B|C|D):")
         correct_answer, ok5 = QInputDialog.getInt(self, "Add Quiz", "Correct (0-3):", 0, 0, 3)
         if ok1 and ok2 and ok3 and ok4 and ok5 and title and due_date and question and options_str:
-            if not self.validate_due_date(due_date):
-                QMessageBox.warning(self, "Error", "Invalid date!")
-                return
-            options = options_str.split("|")
-            if len(options) != 4:
-                QMessageBox.warning(self, "Error", "Need 4 options!")
+            try:
+                self.service.create_quiz(course_id, title, due_date, question, options_str, correct_answer)
+            except (LMSError, ServerError) as e:
+                QMessageBox.warning(self, "Error", str(e))
                 return
-            conn = sqlite3.connect("resources/school_lms.db")
-            c = conn.cursor()
-            c.execute("INSERT INTO quizzes (course_id, title, due_date, question, options, correct_answer) VALUES (?, ?, ?, ?, ?, ?)",
-                     (course_id, title, due_date, question, options_str, correct_answer))
-            c.execute("SELECT student FROM enrollments WHERE course_id=?", (course_id,))
-            students = c.fetchall()
-            for student_tuple in students:
-                student = student_tuple[0]
-                c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)",
-                         (student, f"New quiz '{title}' due {due_date}"))
-            conn.commit()
-            conn.close()
-            if self.success_sound:
-                self.success_sound.play()
-            QMessageBox.information(self, "Success", "Quiz added!")
+            self.succeed("Quiz added!")
 
     def grade_assignment(self):
-        selected = self.assignment_list.currentItem()
-        if not selected or not hasattr(self, 'assignments'):
+        selected = self.selected_model_row(self.assignment_list)
+        if not selected:
             QMessageBox.warning(self, "Error", "Select an assignment!")
             return
-        index = self.assignment_list.row(selected)
-        assignment_id = self.assignments[index][0]
         grade, ok1 = QInputDialog.getText(self, "Grade", "Grade (e.g., A, 100):")
-        if ok1 and grade:
-            conn = sqlite3.connect("resources/school_lms.db")
-            c = conn.cursor()
-            c.execute("UPDATE assignments SET grade=? WHERE assignment_id=?", (grade, assignment_id))
-            c.execute("SELECT student FROM assignments WHERE assignment_id=?", (assignment_id,))
-            student = c.fetchone()[0]
-            c.execute("INSERT INTO notifications (username, message) VALUES (?, ?)",
-                     (student, f"Assignment graded: {grade}"))
-            conn.commit()
-            conn.close()
-            self.refresh_assignment_list()
-            if self.success_sound:
-                self.success_sound.play()
-            QMessageBox.information(self, "Success", "Graded!")
+        if ok1 and grade and self.apply_grades([(selected[0], grade, None)]) is not None:
+            self.succeed("Graded!")
+
+    def batch_grade(self):
+        dialog = BatchGradeDialog(self.assignment_model.rows, self)
+        if not dialog.exec_():
+            return
+        grades = dialog.grades()
+        if not grades:
+            QMessageBox.information(self, "Batch Grade", "No grades entered.")
+            return
+        graded = self.apply_grades(grades)
+        if graded is None:
+            return
+        skipped = len(grades) - len(graded)
+        self.succeed(f"Graded {len(graded)} submission(s)." +
+                     (f" Skipped {skipped} not found in your courses." if skipped else ""), "Batch Grade")
+
+    def apply_grades(self, grades):
+        # One transaction for all the grades and notifications, then only the
+        # changed rows are redrawn. Returns None if grading failed.
+        try:
+            graded = self.service.grade_submissions(self.username, grades)
+        except (LMSError, ServerError) as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return None
+        for row in graded:
+            self.assignment_model.update_row(row[0], row)
+        return graded
+
+    def start_transfer(self, label, func, *args, callback):
+        if self.transfers.is_busy():
+            QMessageBox.warning(self, "Busy", "Wait for the current transfer to finish or cancel it.")
+            return
+        def finished(result):
+            self.end_transfer(f"{label}: done")
+            callback(result)
+        self.transfer_progress.setValue(0)
+        self.transfer_progress.show()
+        self.transfer_cancel.show()
+        self.status_bar.showMessage(f"{label}...")
+        self.transfers.start(label, func, *args, callback=finished)
+
+    def show_transfer_progress(self, label, done, total):
+        percent = done * 100 // total if total else 100
+        self.transfer_progress.setValue(percent)
+        self.status_bar.showMessage(f"{label}: {done / 1e6:.1f} of {total / 1e6:.1f} MB")
+
+    def end_transfer(self, message):
+        self.transfer_progress.hide()
+        self.transfer_cancel.hide()
+        self.status_bar.showMessage(message, 5000)
+
+    def submission_file(self, row, progress=None):
+        # Where a submission's content is: its blob, or for submissions from
+        # before the blob store, the file it was copied to. With a server
+        # backend the blob may be downloaded first, so call it on a worker.
+        blob = row[4]
+        return self.service.fetch_submission_file(blob, progress) if blob else row[2]
+
+    def submission_thumbnail(self, row, key):
+        return self.previews.thumbnail(self.submission_file(row), key)
+
+    def download_submission(self, row, dest_path, progress=None):
+        return copy_file(self.submission_file(row, progress), dest_path, progress)
 
     def preview_assignment(self):
-        selected = self.assignment_list.currentItem()
-        if not selected or not hasattr(self, 'assignments'):
+        selected = self.selected_model_row(self.assignment_list)
+        if not selected:
             QMessageBox.warning(self, "Error", "Select an assignment!")
             return
-        index = self.assignment_list.row(selected)
-        file_path = self.assignments[index][2]
-        if file_path.endswith((".pdf", ".txt")):
-            try:
-                with open(file_path, "r" if file_path.endswith(".txt") else "rb") as f:
-                    content = f.read().decode("utf-8") if file_path.endswith(".txt") else "PDF Preview"
-                preview = QTextEdit()
-                preview.setFont(QFont("Arial", 12))
-                preview.setReadOnly(True)
-                preview.setText(content)
-                dialog = QMessageBox(self)
-                dialog.setWindowTitle("Preview")
-                dialog.setText(os.path.basename(file_path))
-                dialog.layout().addWidget(preview)
-                dialog.exec_()
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Preview failed: {str(e)}")
-        elif file_path.endswith((".png", ".jpg", ".jpeg")):
-            try:
-                img = Image.open(file_path)
-                img.thumbnail((400, 400))
-                byte_arr = io.BytesIO()
-                img.save(byte_arr, format=img.format)
-                pixmap = QPixmap()
-                pixmap.loadFromData(byte_arr.getvalue())
-                dialog = QMessageBox(self)
-                dialog.setWindowTitle("Preview")
-                dialog.setText(os.path.basename(file_path))
-                label = QLabel()
-                label.setPixmap(pixmap)
-                dialog.layout().addWidget(label)
-                dialog.exec_()
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Preview failed: {str(e)}")
-        else:
-            QMessageBox.information(self, "Preview", "Only PDF, TXT, PNG, JPG supported.")
+        file_path = selected[2]
+        try:
+            if file_path.endswith(".txt"):
+                self.status_bar.showMessage("Opening preview...")
+                self.preview_loader.load("preview", self.submission_file, selected,
+                                         callback=lambda path: self.show_text_preview(file_path, path))
+            elif file_path.endswith(".pdf"):
+                QMessageBox.information(self, "Preview", f"{os.path.basename(file_path)}\n\nPDF Preview")
+            elif file_path.endswith(IMAGE_EXTENSIONS):
+                key = preview_key(file_path, selected[4])
+                thumbnail = self.previews.cached_thumbnail(key)
+                if thumbnail:
+                    self.show_image_preview(file_path, thumbnail)
+                else:
+                    self.status_bar.showMessage("Generating preview...")
+                    self.preview_loader.load("preview", self.submission_thumbnail, selected, key,
+                                             callback=lambda path: self.show_image_preview(file_path, path))
+            else:
+                QMessageBox.information(self, "Preview", "Only PDF, TXT, PNG, JPG supported.")
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Preview failed: {str(e)}")
+
+    def show_text_preview(self, file_path, stored_path):
+        self.status_bar.clearMessage()
+        TextPreviewDialog(os.path.basename(file_path), stored_path, self).exec_()
+
+    def show_image_preview(self, file_path, thumbnail):
+        self.status_bar.clearMessage()
+        dialog = QMessageBox(self)
+        dialog.setWindowTitle("Preview")
+        dialog.setText(os.path.basename(file_path))
+        label = QLabel()
+        label.setPixmap(QPixmap(thumbnail))
+        dialog.layout().addWidget(label)
+        dialog.exec_()
+
+    def prefetch_preview(self, current, previous):
+        # Thumbnails the selected image submission in the background, so
+        # pressing Preview while working down a list is a cache hit.
+        if not current.isValid():
+            return
+        row = self.assignment_model.row_at(current.row())
+        if not row[2].endswith(IMAGE_EXTENSIONS):
+            return
+        if not row[4] and not os.path.exists(row[2]):
+            return
+        key = preview_key(row[2], row[4])
+        if not self.previews.cached_thumbnail(key):
+            self.preview_loader.load("preview_prefetch", self.submission_thumbnail, row, key)
 
     def download_assignment(self):
-        selected = self.assignment_list.currentItem()
-        if not selected or not hasattr(self, 'assignments'):
+        selected = self.selected_model_row(self.assignment_list)
+        if not selected:
             QMessageBox.warning(self, "Error", "Select an assignment!")
             return
-        index = self.assignment_list.row(selected)
-        file_path = self.assignments[index][2]
+        file_path = selected[2]
         dest_path, _ = QFileDialog.getSaveFileName(self, "Save File", os.path.basename(file_path))
         if dest_path:
-            shutil.copy(file_path, dest_path)
-            if self.success_sound:
-                self.success_sound.play()
-            QMessageBox.information(self, "Success", "Downloaded!")
+            self.start_transfer(f"Downloading {os.path.basename(file_path)}", self.download_submission,
+                                selected, dest_path, callback=self.download_finished)
+
+    def download_finished(self, size):
+        if self.success_sound:
+            self.success_sound.play()
+        QMessageBox.information(self, "Success", "Downloaded!")
 
     # Admin Dashboard
     def admin_dashboard(self):
-        users_tab = QWidget()
-        users_layout = QVBoxLayout()
+        self.add_lazy_tab("Users", self.build_users_tab)
+
+    def build_users_tab(self, users_layout):
         users_layout.addWidget(QLabel("Users", font=QFont("Arial", 16, QFont.Bold)))
         self.user_list = QListWidget()
         self.user_list.setFont(QFont("Arial", 12))
@@ -1217,35 +1273,29 @@ class DashboardWindow(QMainWindow):
         remove_user_button.clicked.connect(self.remove_user)
         btn_layout.addWidget(remove_user_button)
         users_layout.addLayout(btn_layout)
-        users_tab.setLayout(users_layout)
-        self.tabs.addTab(users_tab, "Users")
 
     def refresh_user_list(self):
+        if not self.is_built("user_list"):
+            return
+        self.loader.load("users", self.repo.get_users, callback=self.show_user_list)
+
+    def show_user_list(self, users):
         self.user_list.clear()
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT username, role FROM users")
-        users = c.fetchall()
         for user in users:
             self.user_list.addItem(f"{user[0]} ({user[1]})")
-        conn.close()
 
     def add_user(self):
-        from database import hash_password
         username, ok1 = QInputDialog.getText(self, "Add User", "Username:")
         password, ok2 = QInputDialog.getText(self, "Add User", "Password:", QLineEdit.Password)
         role, ok3 = QInputDialog.getText(self, "Add User", "Role (student/teacher/admin):")
         if ok1 and ok2 and ok3 and username and password and role:
-            conn = sqlite3.connect("resources/school_lms.db")
-            c = conn.cursor()
-            c.execute("INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)",
-                     (username, hash_password(password), role))
-            conn.commit()
-            conn.close()
+            try:
+                self.service.add_user(username, password, role)
+            except (LMSError, ServerError) as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
             self.refresh_user_list()
-            if self.success_sound:
-                self.success_sound.play()
-            QMessageBox.information(self, "Success", "User added!")
+            self.succeed("User added!")
 
     def remove_user(self):
         selected = self.user_list.currentItem()
@@ -1253,18 +1303,22 @@ class DashboardWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Select a user!")
             return
         username = selected.text().split(" (")[0]
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("DELETE FROM users WHERE username=?", (username,))
-        conn.commit()
-        conn.close()
+        try:
+            self.service.remove_user(username)
+        except ServerError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
         self.refresh_user_list()
-        if self.success_sound:
-            self.success_sound.play()
-        QMessageBox.information(self, "Success", "User removed!")
+        self.succeed("User removed!")
 
     def logout(self):
-        from login import LoginWindow
-        self.login_window = LoginWindow()
-        self.login_window.show()
+        self.timer.stop()
+        self.sync_timer.stop()
+        # End the worker threads and close the connections they opened;
+        # otherwise every login adds threads and database handles that live
+        # as long as the process.
+        self.transfers.shutdown()
+        self.preview_loader.shutdown()
+        self.repo.close_threads(self.loader.shutdown())
+        self.logged_out.emit()
         self.close()
@@ -1,49 +1,157 @@
 # database.py
 import sqlite3
 import os
+import time
+import random
 import hashlib
 
+DB_PATH = "resources/school_lms.db"
+
+# Connection tuning for several seats sharing one database file. Each value can
+# be overridden with an LMS_DB_<NAME> environment variable (e.g.
+# LMS_DB_SYNCHRONOUS=full) or at runtime with configure_db().
+DB_SETTINGS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -16000,        # negative values are KiB, so ~16 MB
+    "mmap_size": 64 * 1024 * 1024,
+    "busy_timeout": 5000,        # ms SQLite itself waits on a lock
+    "busy_retries": 5,           # extra attempts after busy_timeout expires
+    "busy_max_wait": 8000,       # ms all attempts together may wait
+    "busy_backoff": 0.05,        # first retry delay in seconds, doubled each time
+}
+
+for _name, _default in DB_SETTINGS.items():
+    _value = os.environ.get(f"LMS_DB_{_name.upper()}")
+    if _value is not None:
+        DB_SETTINGS[_name] = type(_default)(_value)
+
+def configure_db(**settings):
+    unknown = set(settings) - set(DB_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown database settings: {', '.join(sorted(unknown))}")
+    DB_SETTINGS.update(settings)
+
+def connect(db_path=DB_PATH):
+    # A larger statement cache keeps every repository query prepared for the
+    # lifetime of the connection.
+    conn = sqlite3.connect(db_path, cached_statements=256, check_same_thread=False,
+                           timeout=DB_SETTINGS["busy_timeout"] / 1000)
+    conn.execute(f"PRAGMA busy_timeout={int(DB_SETTINGS['busy_timeout'])}")
+    conn.execute(f"PRAGMA synchronous={DB_SETTINGS['synchronous']}")
+    conn.execute(f"PRAGMA cache_size={int(DB_SETTINGS['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size={int(DB_SETTINGS['mmap_size'])}")
+    return conn
+
+def is_busy_error(error):
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    name = getattr(error, "sqlite_errorname", "")
+    if name:
+        return name.startswith(("SQLITE_BUSY", "SQLITE_LOCKED"))
+    message = str(error)
+    return "database is locked" in message or "database is busy" in message
+
+def retry_on_busy(func, *args, **kwargs):
+    # busy_timeout already makes SQLite wait for the lock; this covers the cases
+    # it cannot (timeout expiry under heavy contention, WAL snapshot conflicts)
+    # with jittered exponential backoff. All attempts share one deadline,
+    # busy_max_wait: later attempts only wait for the time that is left, so a
+    # write on the GUI thread never blocks for several busy_timeouts in a row.
+    # func is a method of a connection or cursor, whose busy_timeout is
+    # shortened for those attempts.
+    conn = getattr(func, "__self__", None)
+    conn = getattr(conn, "connection", conn)
+    if not isinstance(conn, sqlite3.Connection):
+        conn = None
+    deadline = time.monotonic() + DB_SETTINGS["busy_max_wait"] / 1000
+    delay = DB_SETTINGS["busy_backoff"]
+    shortened = False
+    try:
+        for attempt in range(int(DB_SETTINGS["busy_retries"]) + 1):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                pause = delay * (1 + random.random())
+                remaining = deadline - time.monotonic() - pause
+                if not is_busy_error(e) or attempt == DB_SETTINGS["busy_retries"] or remaining <= 0:
+                    raise
+                time.sleep(pause)
+                delay *= 2
+                if conn is not None:
+                    wait = min(int(remaining * 1000), int(DB_SETTINGS["busy_timeout"]))
+                    conn.execute(f"PRAGMA busy_timeout={max(wait, 1)}")
+                    shortened = True
+    finally:
+        if shortened:
+            conn.execute(f"PRAGMA busy_timeout={int(DB_SETTINGS['busy_timeout'])}")
+
+# Rebuilds points_totals from the points ledger (see init_db).
+REBUILD_POINTS_TOTALS = ("INSERT INTO points_totals (student, total) "
+                         "SELECT student, SUM(COALESCE(points, 0)) FROM points WHERE student IS NOT NULL GROUP BY student")
+
+# Recounts blobs.refs from the assignments that name each blob (see init_db).
+REBUILD_BLOB_REFS = ("INSERT INTO blobs (sha256, refs) "
+                     "SELECT blob, COUNT(*) FROM assignments WHERE blob IS NOT NULL GROUP BY blob")
+
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
-def init_db(force_reset=False):
-    if force_reset and os.path.exists("resources/school_lms.db"):
-        os.remove("resources/school_lms.db")
-    
-    conn = sqlite3.connect("resources/school_lms.db")
-    c = conn.cursor()
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS users 
+# Schema migrations. PRAGMA user_version records how many of MIGRATIONS a
+# database has had, so an up-to-date one is opened with a single header read.
+# Each step runs in its own transaction together with the version bump; a step
+# that fails or is interrupted is rolled back and runs again next time. New
+# steps go at the end and run exactly once. The first steps predate the
+# version number and are written to be safe on a database that already has
+# some or all of their changes.
+MIGRATION_BATCH = 50000
+
+def _update_in_batches(c, report, table, assignment, where):
+    # Large rewrites commit every MIGRATION_BATCH rows, so an interrupted
+    # migration keeps the work already done. `where` must exclude rows that
+    # are already rewritten, which makes the step safe to run again.
+    last = c.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+    for first in range(1, last + 1, MIGRATION_BATCH):
+        upto = min(first + MIGRATION_BATCH - 1, last)
+        c.execute(f"UPDATE {table} SET {assignment} WHERE rowid BETWEEN ? AND ? AND ({where})", (first, upto))
+        retry_on_busy(c.connection.commit)
+        retry_on_busy(c.execute, "BEGIN IMMEDIATE")
+        report(f"  {table}: {upto}/{last} rows")
+
+def _create_tables(c, report):
+    c.execute('''CREATE TABLE IF NOT EXISTS users
                  (username TEXT PRIMARY KEY, password TEXT, role TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS courses 
+    c.execute('''CREATE TABLE IF NOT EXISTS courses
                  (course_id INTEGER PRIMARY KEY AUTOINCREMENT, course_name TEXT, teacher TEXT, description TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS enrollments 
+    c.execute('''CREATE TABLE IF NOT EXISTS enrollments
                  (enrollment_id INTEGER PRIMARY KEY AUTOINCREMENT, course_id INTEGER, student TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS assignments 
-                 (assignment_id INTEGER PRIMARY KEY AUTOINCREMENT, course_id INTEGER, 
-                  student TEXT, file_path TEXT, grade TEXT, due_date TEXT, description TEXT, comment TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS assignment_definitions 
-                 (def_id INTEGER PRIMARY KEY AUTOINCREMENT, course_id INTEGER, 
+    c.execute('''CREATE TABLE IF NOT EXISTS assignments
+                 (assignment_id INTEGER PRIMARY KEY AUTOINCREMENT, course_id INTEGER,
+                  student TEXT, file_path TEXT, grade TEXT, due_date TEXT, description TEXT, comment TEXT,
+                  blob TEXT, file_size INTEGER)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS assignment_definitions
+                 (def_id INTEGER PRIMARY KEY AUTOINCREMENT, course_id INTEGER,
                   title TEXT, due_date TEXT, description TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS notifications 
-                 (notif_id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, message TEXT, is_read INTEGER DEFAULT 0)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS messages 
-                 (msg_id INTEGER PRIMARY KEY AUTOINCREMENT, sender TEXT, receiver TEXT, 
+    c.execute('''CREATE TABLE IF NOT EXISTS notifications
+                 (notif_id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, message TEXT, is_read INTEGER DEFAULT 0,
+                  dedupe_key TEXT)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS messages
+                 (msg_id INTEGER PRIMARY KEY AUTOINCREMENT, sender TEXT, receiver TEXT,
                   course_id INTEGER, message TEXT, timestamp TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS quizzes 
-                 (quiz_id INTEGER PRIMARY KEY AUTOINCREMENT, course_id INTEGER, 
+    c.execute('''CREATE TABLE IF NOT EXISTS quizzes
+                 (quiz_id INTEGER PRIMARY KEY AUTOINCREMENT, course_id INTEGER,
                   title TEXT, due_date TEXT, question TEXT, options TEXT, correct_answer INTEGER)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS quiz_submissions 
-                 (submission_id INTEGER PRIMARY KEY AUTOINCREMENT, quiz_id INTEGER, 
+    c.execute('''CREATE TABLE IF NOT EXISTS quiz_submissions
+                 (submission_id INTEGER PRIMARY KEY AUTOINCREMENT, quiz_id INTEGER,
                   student TEXT, answer INTEGER, score INTEGER)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS points 
+    c.execute('''CREATE TABLE IF NOT EXISTS points
                  (point_id INTEGER PRIMARY KEY AUTOINCREMENT, student TEXT, points INTEGER, reason TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS badges 
+    c.execute('''CREATE TABLE IF NOT EXISTS badges
                  (badge_id INTEGER PRIMARY KEY AUTOINCREMENT, student TEXT, badge_name TEXT, awarded_date TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS chat_messages 
-                 (chat_id INTEGER PRIMARY KEY AUTOINCREMENT, course_id INTEGER, 
+    c.execute('''CREATE TABLE IF NOT EXISTS chat_messages
+                 (chat_id INTEGER PRIMARY KEY AUTOINCREMENT, course_id INTEGER,
                   sender TEXT, message TEXT, timestamp TEXT)''')
-    
+
     # Add missing columns
     c.execute("PRAGMA table_info(assignments)")
     columns = [col[1] for col in c.fetchall()]
@@ -55,29 +163,256 @@ def init_db(force_reset=False):
         c.execute("ALTER TABLE assignments ADD COLUMN description TEXT")
     if 'comment' not in columns:
         c.execute("ALTER TABLE assignments ADD COLUMN comment TEXT")
-    
+    if 'blob' not in columns:
+        c.execute("ALTER TABLE assignments ADD COLUMN blob TEXT")
+    if 'file_size' not in columns:
+        c.execute("ALTER TABLE assignments ADD COLUMN file_size INTEGER")
+
     c.execute("PRAGMA table_info(courses)")
     columns = [col[1] for col in c.fetchall()]
     if 'description' not in columns:
         c.execute("ALTER TABLE courses ADD COLUMN description TEXT")
-    
-    # Add indexes for performance
-    c.execute("CREATE INDEX IF NOT EXISTS idx_enrollments_student ON enrollments(student)")
-    c.execute("CREATE INDEX IF NOT EXISTS idx_assignments_student ON assignments(student)")
+
+    c.execute("PRAGMA table_info(notifications)")
+    columns = [col[1] for col in c.fetchall()]
+    if 'dedupe_key' not in columns:
+        c.execute("ALTER TABLE notifications ADD COLUMN dedupe_key TEXT")
+        # Reminders used to be deduplicated by their text; key the existing ones
+        # the same way so they are not sent again.
+        c.execute("""UPDATE notifications SET dedupe_key = message WHERE notif_id IN
+                     (SELECT MIN(notif_id) FROM notifications WHERE message LIKE 'Due Soon:%' GROUP BY username, message)""")
+
+def _canonical_due_dates(c, report):
+    # Due dates are stored as YYYY-MM-DD text, which sorts chronologically, so
+    # "due in the next 3 days" or "this month" is an index range scan with
+    # plain BETWEEN and no DATE() or Python parsing. Normalise values with a
+    # time part and refuse anything else, which would fall outside the ranges.
+    canonical = "'[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+    for table in ("assignments", "assignment_definitions", "quizzes"):
+        _update_in_batches(c, report, table, "due_date = DATE(due_date)",
+                           f"due_date NOT GLOB {canonical} AND DATE(due_date) IS NOT NULL")
+        for event in ("INSERT", "UPDATE OF due_date"):
+            c.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_due_date_{event.split()[0].lower()}
+                          BEFORE {event} ON {table} WHEN NEW.due_date IS NOT NULL
+                          AND (NEW.due_date NOT GLOB {canonical} OR DATE(NEW.due_date) IS NOT NEW.due_date) BEGIN
+                              SELECT RAISE(ABORT, 'due_date must be YYYY-MM-DD');
+                          END""")
+
+def _create_indexes(c, report):
+    # Add indexes for performance. Composite indexes cover the pairs the
+    # dashboard filters on, so most lookups never touch the table itself;
+    # check plans with tools/explain_queries.py after changing a query.
+    for index in ("idx_enrollments_student", "idx_assignments_student",
+                  "idx_quiz_submissions_student", "idx_points_student"):
+        # Superseded by the composite indexes below, which share their prefix.
+        c.execute(f"DROP INDEX IF EXISTS {index}")
+    for index in ("idx_notifications_username_message", "idx_notifications_unread"):
+        # notifications is the busiest table to write; reminders are deduplicated
+        # through dedupe_key and unread counts are cheap enough per user via
+        # idx_notifications_username, so these cost more than they saved.
+        c.execute(f"DROP INDEX IF EXISTS {index}")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_enrollments_student_course ON enrollments(student, course_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_enrollments_course_student ON enrollments(course_id, student)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_courses_teacher ON courses(teacher)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_assignments_student_due ON assignments(student, due_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_assignments_course_student ON assignments(course_id, student)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_assignments_ungraded_due ON assignments(due_date) WHERE grade IS NULL")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_definitions_course ON assignment_definitions(course_id)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_notifications_username ON notifications(username)")
+    # NULL keys never conflict, so only keyed notifications are deduplicated.
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_notifications_dedupe ON notifications(username, dedupe_key)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_messages_receiver ON messages(receiver)")
-    c.execute("CREATE INDEX IF NOT EXISTS idx_quiz_submissions_student ON quiz_submissions(student)")
-    c.execute("CREATE INDEX IF NOT EXISTS idx_points_student ON points(student)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages(sender)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_quizzes_course_due ON quizzes(course_id, due_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_quizzes_due ON quizzes(due_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_quiz_submissions_student_quiz ON quiz_submissions(student, quiz_id, score)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_points_student_points ON points(student, points)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_badges_student_name ON badges(student, badge_name)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_chat_course ON chat_messages(course_id)")
 
+def _points_totals(c, report):
+    # Running per-student points totals, so the leaderboard and award_points
+    # read one indexed row instead of summing the whole ledger. Triggers keep
+    # it in step with every change to points, inside the same transaction.
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='points_totals'")
+    totals_exist = c.fetchone() is not None
+    c.execute('''CREATE TABLE IF NOT EXISTS points_totals
+                 (student TEXT PRIMARY KEY, total INTEGER NOT NULL DEFAULT 0)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_points_totals_total ON points_totals(total, student)")
+    c.execute('''CREATE TRIGGER IF NOT EXISTS points_totals_insert AFTER INSERT ON points
+                 WHEN NEW.student IS NOT NULL BEGIN
+                     INSERT INTO points_totals (student, total) VALUES (NEW.student, COALESCE(NEW.points, 0))
+                     ON CONFLICT(student) DO UPDATE SET total = total + excluded.total;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS points_totals_delete AFTER DELETE ON points
+                 WHEN OLD.student IS NOT NULL BEGIN
+                     UPDATE points_totals SET total = total - COALESCE(OLD.points, 0) WHERE student = OLD.student;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS points_totals_update AFTER UPDATE OF student, points ON points BEGIN
+                     UPDATE points_totals SET total = total - COALESCE(OLD.points, 0) WHERE student = OLD.student;
+                     INSERT INTO points_totals (student, total) SELECT NEW.student, COALESCE(NEW.points, 0)
+                     WHERE NEW.student IS NOT NULL
+                     ON CONFLICT(student) DO UPDATE SET total = total + excluded.total;
+                 END''')
+    if not totals_exist:
+        c.execute(REBUILD_POINTS_TOTALS)
+
+def _student_stats(c, report):
+    # Per-student counters the badge rules (badges.py) are evaluated against.
+    # An early submission is one made three or more days before it is due.
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='student_stats'")
+    stats_exist = c.fetchone() is not None
+    c.execute('''CREATE TABLE IF NOT EXISTS student_stats
+                 (student TEXT PRIMARY KEY, quiz_count INTEGER NOT NULL DEFAULT 0,
+                  early_submissions INTEGER NOT NULL DEFAULT 0)''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS student_stats_quiz_insert AFTER INSERT ON quiz_submissions
+                 WHEN NEW.student IS NOT NULL BEGIN
+                     INSERT INTO student_stats (student, quiz_count) VALUES (NEW.student, 1)
+                     ON CONFLICT(student) DO UPDATE SET quiz_count = quiz_count + 1;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS student_stats_quiz_delete AFTER DELETE ON quiz_submissions BEGIN
+                     UPDATE student_stats SET quiz_count = quiz_count - 1 WHERE student = OLD.student;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS student_stats_early_submission AFTER INSERT ON assignments
+                 WHEN NEW.student IS NOT NULL AND NEW.due_date >= DATE('now', 'localtime', '+3 days') BEGIN
+                     INSERT INTO student_stats (student, early_submissions) VALUES (NEW.student, 1)
+                     ON CONFLICT(student) DO UPDATE SET early_submissions = early_submissions + 1;
+                 END''')
+    if not stats_exist:
+        # Submission times were never stored, so existing submissions count as
+        # early the way the old badge check did: still three days from due.
+        c.execute("""INSERT INTO student_stats (student, quiz_count, early_submissions)
+                     SELECT student, SUM(quiz), SUM(early) FROM (
+                         SELECT student, 1 AS quiz, 0 AS early FROM quiz_submissions
+                         UNION ALL SELECT student, 0, 1 FROM assignments WHERE due_date >= DATE('now', 'localtime', '+3 days'))
+                     WHERE student IS NOT NULL GROUP BY student""")
+
+def _blob_refs(c, report):
+    # Reference counts for the submission blob store (blobstore.py): one per
+    # assignments row naming the blob. Blobs left at zero are garbage; see
+    # tools/blob_store.py.
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='blobs'")
+    blobs_exist = c.fetchone() is not None
+    c.execute('''CREATE TABLE IF NOT EXISTS blobs
+                 (sha256 TEXT PRIMARY KEY, refs INTEGER NOT NULL DEFAULT 0)''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS blobs_ref_insert AFTER INSERT ON assignments
+                 WHEN NEW.blob IS NOT NULL BEGIN
+                     INSERT INTO blobs (sha256, refs) VALUES (NEW.blob, 1)
+                     ON CONFLICT(sha256) DO UPDATE SET refs = refs + 1;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS blobs_ref_delete AFTER DELETE ON assignments
+                 WHEN OLD.blob IS NOT NULL BEGIN
+                     UPDATE blobs SET refs = refs - 1 WHERE sha256 = OLD.blob;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS blobs_ref_update AFTER UPDATE OF blob ON assignments
+                 WHEN OLD.blob IS NOT NEW.blob BEGIN
+                     UPDATE blobs SET refs = refs - 1 WHERE sha256 = OLD.blob;
+                     INSERT INTO blobs (sha256, refs) SELECT NEW.blob, 1 WHERE NEW.blob IS NOT NULL
+                     ON CONFLICT(sha256) DO UPDATE SET refs = refs + 1;
+                 END''')
+    if not blobs_exist:
+        c.execute(REBUILD_BLOB_REFS)
+
+def _chart_versions(c, report):
+    # Bumped whenever something a student's grade or progress chart or
+    # calendar shows changes, so Repository can keep what it built until
+    # then. Course-wide changes bump every enrolled student.
+    c.execute('''CREATE TABLE IF NOT EXISTS chart_versions
+                 (student TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)''')
+    bump = ("INSERT INTO chart_versions (student, version) SELECT {student}, 1 {source} "
+            "ON CONFLICT(student) DO UPDATE SET version = version + 1;")
+    for_student = lambda row: bump.format(student=f"{row}.student", source=f"WHERE {row}.student IS NOT NULL")
+    for_course = lambda row: bump.format(student="student", source=f"FROM enrollments WHERE course_id = {row}.course_id")
+    chart_triggers = {
+        "chart_versions_assignment_insert": ("AFTER INSERT ON assignments", for_student("NEW")),
+        "chart_versions_assignment_grade": ("AFTER UPDATE OF grade ON assignments", for_student("NEW")),
+        "chart_versions_assignment_update": ("AFTER UPDATE OF course_id, due_date, description ON assignments",
+                                             for_student("NEW")),
+        "chart_versions_assignment_delete": ("AFTER DELETE ON assignments", for_student("OLD")),
+        "chart_versions_quiz_submission_insert": ("AFTER INSERT ON quiz_submissions", for_student("NEW")),
+        "chart_versions_quiz_submission_delete": ("AFTER DELETE ON quiz_submissions", for_student("OLD")),
+        "chart_versions_enroll": ("AFTER INSERT ON enrollments", for_student("NEW")),
+        "chart_versions_unenroll": ("AFTER DELETE ON enrollments", for_student("OLD")),
+        "chart_versions_definition_insert": ("AFTER INSERT ON assignment_definitions", for_course("NEW")),
+        "chart_versions_definition_delete": ("AFTER DELETE ON assignment_definitions", for_course("OLD")),
+        "chart_versions_quiz_insert": ("AFTER INSERT ON quizzes", for_course("NEW")),
+        "chart_versions_quiz_delete": ("AFTER DELETE ON quizzes", for_course("OLD")),
+        "chart_versions_quiz_update": ("AFTER UPDATE OF course_id, title, due_date ON quizzes",
+                                       for_course("OLD") + " " + for_course("NEW")),
+        "chart_versions_course_rename": ("AFTER UPDATE OF course_name ON courses", for_course("NEW")),
+    }
+    for name, (event, body) in chart_triggers.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+def _default_users(c, report):
     default_users = [
         ("student1", hash_password("pass123"), "student"),
         ("teacher1", hash_password("pass456"), "teacher"),
         ("admin1", hash_password("pass789"), "admin")
     ]
     c.executemany("INSERT OR IGNORE INTO users VALUES (?, ?, ?)", default_users)
-    conn.commit()
-    conn.close()
+
+MIGRATIONS = [
+    ("create tables", _create_tables),
+    ("canonical due dates", _canonical_due_dates),
+    ("indexes", _create_indexes),
+    ("points totals", _points_totals),
+    ("student stats", _student_stats),
+    ("blob references", _blob_refs),
+    ("chart versions", _chart_versions),
+    ("default users", _default_users),
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def apply_journal_mode(conn):
+    # WAL lets readers on other seats keep going while one seat writes, and the
+    # setting is stored in the database file so every later connection uses it.
+    # Checked on every start, so a changed setting reaches databases that are
+    # already up to date; switching only happens when the mode differs.
+    mode = DB_SETTINGS["journal_mode"].lower()
+    if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != mode:
+        retry_on_busy(conn.execute, f"PRAGMA journal_mode={mode}")
+
+def migrate(conn, progress=None):
+    # Brings the database up to SCHEMA_VERSION and returns its version.
+    # progress(message) is called as each step starts and as large steps
+    # advance.
+    report = progress or (lambda message: None)
+    apply_journal_mode(conn)
+    while True:
+        retry_on_busy(conn.execute, "BEGIN IMMEDIATE")
+        try:
+            # Read under the write lock, so seats starting together run each
+            # step once between them.
+            version = schema_version(conn)
+            if version >= SCHEMA_VERSION:
+                conn.rollback()
+                return version
+            name, step = MIGRATIONS[version]
+            report(f"migration {version + 1}/{SCHEMA_VERSION}: {name}")
+            step(conn.cursor(), report)
+            if schema_version(conn) == version:
+                conn.execute(f"PRAGMA user_version={version + 1}")
+            retry_on_busy(conn.commit)
+        except BaseException:
+            conn.rollback()
+            raise
+
+def init_db(force_reset=False, db_path=DB_PATH, progress=None):
+    if force_reset and os.path.exists(db_path):
+        os.remove(db_path)
+
+    conn = connect(db_path)
+    try:
+        if schema_version(conn) < SCHEMA_VERSION:
+            migrate(conn, progress)
+        else:
+            apply_journal_mode(conn)
+    finally:
+        conn.close()
 
 if not os.path.exists("assignments"):
     os.makedirs("assignments")
@@ -1,12 +1,45 @@
 # login.py
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QHBoxLayout
 from PyQt5.QtGui import QPixmap, QFont, QPalette, QColor, QBrush
-from PyQt5.QtCore import Qt
-import sqlite3
-from dashboard import DashboardWindow
+from PyQt5.QtCore import Qt, QTimer
+from datetime import date
 from database import hash_password
+from repository import get_repository
+from workers import QueryExecutor
+import profiling
 import os
 
+def prefetch_dashboard(repo, username, role):
+    # The first loads DashboardWindow makes for `role`, as {loader key:
+    # (args, result)} for QueryExecutor.prime. Keep in step with the
+    # dashboard's refresh methods. The chart and calendar calls also warm the
+    # repository's caches for tabs opened later. With a server backend they
+    # all go in one request.
+    today = date.today()
+    loads = {"unread_count": ("count_unread_notifications", username)}
+    if role == "student":
+        loads.update({
+            "home": ("get_home_stats", username),
+            "courses": ("get_enrolled_courses", username),
+            "grades": ("get_grade_chart", username),
+            "progress": ("get_progress_chart", username),
+            "calendar": ("get_calendar", username, today.year, today.month),
+        })
+    elif role == "teacher":
+        loads["courses"] = ("get_teacher_courses", username)
+    elif role == "admin":
+        loads["users"] = ("get_users",)
+    results = repo.call_many([(name, args) for name, *args in loads.values()])
+    return {key: (tuple(args), result) for (key, (_, *args)), result in zip(loads.items(), results)}
+
+def sign_in(repo, username, password_hash):
+    # Runs on a worker. A successful login carries straight on with the
+    # dashboard's first loads on the same thread and connection, so the
+    # dashboard opens already populated. Returns (role or None, prefetched).
+    role = repo.authenticate(username, password_hash)
+    profiling.mark("login authenticated")
+    return role, prefetch_dashboard(repo, username, role) if role else {}
+
 class LoginWindow(QWidget):
     def __init__(self):
         super().__init__()
@@ -85,29 +118,60 @@ class LoginWindow(QWidget):
 
         layout.addStretch()
         self.setLayout(layout)
+        self.first_paint_done = False
+
+        self.loader = QueryExecutor(self, max_threads=1)
+        self.loader.error.connect(self.login_failed)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_paint_done:
+            self.first_paint_done = True
+            profiling.mark("login first paint")
+            # The dashboard pulls in QtChart and QtMultimedia. Import it while
+            # the user types instead of before the form appears.
+            QTimer.singleShot(0, self.preload_dashboard)
+
+    def preload_dashboard(self):
+        with profiling.phase("preload dashboard"):
+            import dashboard  # noqa: F401
+        profiling.report_imports("dashboard preload")
 
     def check_login(self):
+        profiling.mark("login submitted")
         username = self.username_input.text()
         password = hash_password(self.password_input.text())
         print(f"Attempting login with username: {username}, hashed password: {password}")
 
-        conn = sqlite3.connect("resources/school_lms.db")
-        c = conn.cursor()
-        c.execute("SELECT role FROM users WHERE username=? AND password=?", 
-                 (username, password))
-        result = c.fetchone()
-        print(f"Database query result: {result}")
-        conn.close()
+        self.login_button.setEnabled(False)
+        self.loader.load("login", sign_in, get_repository(), username, password,
+                         callback=lambda result: self.finish_login(username, *result))
+
+    def finish_login(self, username, role, prefetched):
+        self.login_button.setEnabled(True)
+        print(f"Database query result: {role}")
 
-        if result:
-            role = result[0]
+        if role:
             print(f"Login successful, role: {role}")
-            self.open_dashboard(role, username)
+            self.open_dashboard(role, username, prefetched)
         else:
             print("Login failed: Invalid credentials")
             QMessageBox.warning(self, "Error", "Invalid username or password")
 
-    def open_dashboard(self, role, username):
-        self.dashboard = DashboardWindow(role, username)
+    def login_failed(self, key, message):
+        self.login_button.setEnabled(True)
+        QMessageBox.warning(self, "Error", "Could not check the login, please try again")
+
+    def open_dashboard(self, role, username, prefetched=None):
+        # Already imported by preload_dashboard unless login beat it.
+        from dashboard import DashboardWindow
+        self.dashboard = DashboardWindow(role, username, prefetched)
+        self.dashboard.logged_out.connect(self.dashboard_closed)
         self.dashboard.show()
         self.hide()
+
+    def dashboard_closed(self):
+        # The same login window comes back after every logout.
+        self.dashboard = None
+        self.password_input.clear()
+        self.show()
@@ -1,12 +1,31 @@
 # main.py
 import sys
+import profiling
+
+# --profile-startup prints the startup timeline (as LMS_TRACE_STARTUP=1 does)
+# plus how long each module took to import, so it is switched on before the
+# imports below.
+if "--profile-startup" in sys.argv:
+    sys.argv.remove("--profile-startup")
+    profiling.profile_startup()
+
 from PyQt5.QtWidgets import QApplication
 from database import init_db
+from repository import SERVER_URL
 from login import LoginWindow
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    init_db(force_reset=False)
-    login_window = LoginWindow()
-    login_window.show()
+    profiling.mark("imports done")
+    with profiling.phase("create QApplication"):
+        app = QApplication(sys.argv)
+    # Only a database older than this version does any work here; see
+    # tools/migrate.py to migrate a large one ahead of time.
+    if not SERVER_URL:
+        with profiling.phase("init_db"):
+            init_db(force_reset=False, progress=print)
+    with profiling.phase("build login window"):
+        login_window = LoginWindow()
+        login_window.show()
+    profiling.mark("login window shown")
+    profiling.report_imports("startup")
     sys.exit(app.exec_())
@@ -0,0 +1,159 @@
+# models.py
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from repository import MAX_KEY
+
+class PagedListModel(QAbstractListModel):
+    # A list model that pulls rows from the database a page at a time as the
+    # view scrolls (canFetchMore/fetchMore). Pages use keyset pagination: the
+    # first column of every row is its rowid and the next page asks for rows
+    # after the last key loaded, so a page costs the same however much history
+    # exists. Pages are loaded on the QueryExecutor, never on the GUI thread.
+    def __init__(self, loader, key, fetch_page, format_row, row_state=None, page_size=100, parent=None):
+        super().__init__(parent)
+        self.loader = loader
+        self.key = key
+        self.fetch_page = fetch_page
+        self.format_row = format_row
+        self.row_state = row_state
+        self.page_size = page_size
+        self.args = None
+        self.rows = []
+        self.exhausted = True
+        self.loading = False
+        self.generation = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return self.format_row(row)
+        if role == Qt.UserRole and self.row_state is not None:
+            return self.row_state(row)
+        return None
+
+    def row_at(self, position):
+        return self.rows[position]
+
+    def reset(self, *args):
+        # Start over, optionally with new query arguments (e.g. another course).
+        self.beginResetModel()
+        self.args = args
+        self.rows = []
+        self.exhausted = False
+        self.loading = False
+        self.generation += 1
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def clear(self):
+        self.beginResetModel()
+        self.args = None
+        self.rows = []
+        self.exhausted = True
+        self.generation += 1
+        self.endResetModel()
+
+    def update_row(self, key, row):
+        for position, existing in enumerate(self.rows):
+            if existing[0] == key:
+                self.rows[position] = row
+                index = self.index(position, 0)
+                self.dataChanged.emit(index, index)
+                return True
+        return False
+
+    def fetch_new(self):
+        # Pick up rows added since the last page was loaded (the last key is
+        # the high-water mark). Until everything has been paged in, the view's
+        # own fetchMore will reach the new rows anyway.
+        if self.args is None or not self.exhausted or self.loading:
+            return
+        self.exhausted = False
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self.loading = True
+        after = self.rows[-1][0] if self.rows else 0
+        generation = self.generation
+        self.loader.load(self.key, self.fetch_page, *self.args, after, self.page_size,
+                         callback=lambda rows: self.append_page(generation, rows))
+
+    def append_page(self, generation, rows):
+        if generation != self.generation:
+            return
+        self.loading = False
+        self.exhausted = len(rows) < self.page_size
+        if rows:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+class TailListModel(PagedListModel):
+    # For chat-style lists shown oldest-to-newest and opened at the bottom: the
+    # newest page is loaded first and older pages are prepended on request
+    # (fetch_older), typically when the view is scrolled to the top.
+    # fetch_page(*args, before_key, limit) must return rows newest first and
+    # fetch_newer(*args, after_key, limit) oldest first.
+    def __init__(self, loader, key, fetch_page, format_row, fetch_newer, row_state=None, page_size=100, parent=None):
+        super().__init__(loader, key, fetch_page, format_row, row_state, page_size, parent)
+        self.fetch_newer = fetch_newer
+
+    def canFetchMore(self, parent=QModelIndex()):
+        # The view asks for more at the bottom, which is already the newest
+        # row, so automatic fetching is disabled.
+        return False
+
+    def fetchMore(self, parent=QModelIndex()):
+        self.fetch_older()
+
+    def fetch_older(self):
+        if self.exhausted or self.loading:
+            return
+        self.loading = True
+        before = self.rows[0][0] if self.rows else MAX_KEY
+        generation = self.generation
+        self.loader.load(self.key, self.fetch_page, *self.args, before, self.page_size,
+                         callback=lambda rows: self.prepend_page(generation, rows))
+
+    def prepend_page(self, generation, rows):
+        if generation != self.generation:
+            return
+        self.loading = False
+        self.exhausted = len(rows) < self.page_size
+        if rows:
+            self.beginInsertRows(QModelIndex(), 0, len(rows) - 1)
+            self.rows[:0] = reversed(rows)
+            self.endInsertRows()
+
+    def fetch_new(self):
+        # Here exhausted refers to older history, so new rows are always
+        # fetched from the newest key loaded.
+        if self.args is None or self.loading:
+            return
+        self.loading = True
+        after = self.rows[-1][0] if self.rows else 0
+        generation = self.generation
+        self.loader.load(self.key, self.fetch_newer, *self.args, after, self.page_size,
+                         callback=lambda rows: self.append_newer(generation, rows))
+
+    def append_newer(self, generation, rows):
+        if generation != self.generation:
+            return
+        self.loading = False
+        if rows:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+        if len(rows) == self.page_size:
+            self.fetch_new()
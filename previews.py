@@ -0,0 +1,74 @@
+# previews.py
+import codecs
+import hashlib
+import os
+import threading
+
+PREVIEW_ROOT = os.path.join("assignments", "previews")
+THUMBNAIL_SIZE = 400
+TEXT_CHUNK_SIZE = 64 * 1024
+
+def preview_key(path, blob=None):
+    # Blobs are content-addressed, so their digest is the key. Files from
+    # before the blob store are keyed by path, size and mtime, so a
+    # replaced file gets a new preview.
+    if blob:
+        return blob
+    stat = os.stat(path)
+    return hashlib.sha256(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+
+class PreviewCache:
+    # Thumbnails written once to root/ab/<key>.png and read back as files.
+    # Safe to delete at any time; missing thumbnails are regenerated.
+    def __init__(self, root=PREVIEW_ROOT, size=THUMBNAIL_SIZE):
+        self.root = root
+        self.size = size
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.png")
+
+    def cached_thumbnail(self, key):
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+    def thumbnail(self, source, key):
+        # Returns the path of the thumbnail for `source`, generating it if
+        # needed. Slow on a cache miss, so call it from a worker thread.
+        path = self.path(key)
+        if os.path.exists(path):
+            return path
+        # Imported here so PIL is not loaded at startup, only with the first
+        # thumbnail.
+        from PIL import Image
+        with Image.open(source) as img:
+            # JPEGs decode straight to the nearest scale at or above the
+            # target instead of full size.
+            img.draft("RGB", (self.size, self.size))
+            img.thumbnail((self.size, self.size))
+            if img.mode not in ("RGB", "RGBA", "L", "LA"):
+                img = img.convert("RGBA")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                img.save(tmp, format="PNG")
+                os.replace(tmp, path)
+            finally:
+                # Only left behind if saving or renaming failed.
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        return path
+
+def read_text_chunk(path, offset=0, size=TEXT_CHUNK_SIZE):
+    # Reads up to `size` bytes of UTF-8 text from `offset` and returns
+    # (text, next_offset), next_offset being None at the end of the file. A
+    # character split by the chunk boundary is left for the next call.
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(size)
+    final = len(data) < size
+    text = decoder.decode(data, final=final)
+    if final:
+        return text, None
+    pending = len(decoder.getstate()[0])
+    return text, offset + len(data) - pending
@@ -0,0 +1,78 @@
+# profiling.py
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Set LMS_TRACE_STARTUP=1 to print a timeline of the startup phases.
+TRACE_STARTUP = os.environ.get("LMS_TRACE_STARTUP") == "1"
+
+_start = time.perf_counter()
+_marks = {}
+_imports = []
+_import_stack = threading.local()
+_real_import = builtins.__import__
+
+def mark(label):
+    now = time.perf_counter()
+    _marks[label] = now
+    if TRACE_STARTUP:
+        print(f"[startup] {(now - _start) * 1000:8.1f} ms  {label}")
+
+@contextmanager
+def phase(label):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if TRACE_STARTUP:
+            print(f"[startup] {(start - _start) * 1000:8.1f} ms  {label} took {(time.perf_counter() - start) * 1000:.1f} ms")
+
+def span(first, last):
+    if first not in _marks or last not in _marks:
+        return None
+    return _marks[last] - _marks[first]
+
+def report_span(first, last):
+    elapsed = span(first, last)
+    if TRACE_STARTUP and elapsed is not None:
+        print(f"[startup] {first} -> {last}: {elapsed * 1000:.1f} ms")
+
+def profile_startup():
+    # Turns on the startup timeline and times every module imported from
+    # here on; see report_imports().
+    global TRACE_STARTUP
+    TRACE_STARTUP = True
+    builtins.__import__ = _timed_import
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Only absolute imports of modules not loaded yet cost anything worth
+    # recording. Each records its total time and its own share, excluding
+    # the modules it imported in turn.
+    if level or name in sys.modules:
+        return _real_import(name, globals, locals, fromlist, level)
+    stack = _import_stack.__dict__.setdefault("children", [])
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _real_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        if name in sys.modules:
+            _imports.append((name, elapsed, elapsed - children))
+
+def report_imports(label, limit=15):
+    # Prints the imports recorded since the last report, slowest first.
+    global _imports
+    recorded, _imports = _imports, []
+    if not TRACE_STARTUP or not recorded:
+        return
+    total = sum(own for _, _, own in recorded)
+    print(f"[startup] imports during {label}: {len(recorded)} module(s), {total * 1000:.1f} ms")
+    for name, elapsed, own in sorted(recorded, key=lambda entry: entry[2], reverse=True)[:limit]:
+        print(f"[startup]   {own * 1000:8.1f} ms self {elapsed * 1000:8.1f} ms total  {name}")
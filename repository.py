@@ -0,0 +1,550 @@
+# repository.py
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, timedelta
+from catalog import CourseCatalog
+from database import DB_PATH, REBUILD_POINTS_TOTALS, connect, retry_on_busy
+
+# Upper bound for keyset pagination, e.g. "rows before MAX_KEY" is the newest page.
+MAX_KEY = 2 ** 63 - 1
+# Built charts kept per Repository; the least recently used are dropped first.
+CHART_CACHE_SIZE = 256
+# Ids per "IN (...)" query, well under SQLite's bound-parameter limit.
+ID_BATCH = 500
+# With LMS_SERVER=http://host:port, get_repository() talks to server.py
+# instead of opening the database file (see client.py).
+SERVER_URL = os.environ.get("LMS_SERVER")
+
+# Statements are kept as module constants so every call reuses the same
+# prepared statement from the connection's statement cache.
+AUTHENTICATE = "SELECT role FROM users WHERE username=? AND password=?"
+
+ADD_POINTS = "INSERT INTO points (student, points, reason) VALUES (?, ?, ?)"
+# Totals are maintained by triggers on points (see init_db).
+TOTAL_POINTS = "SELECT total FROM points_totals WHERE student=?"
+LEADERBOARD = "SELECT student, total FROM points_totals ORDER BY total DESC, student DESC LIMIT ?"
+CLEAR_POINTS_TOTALS = "DELETE FROM points_totals"
+# Students whose running total disagrees with their ledger, either way round.
+POINTS_TOTALS_MISMATCHES = ("SELECT student, SUM(ledger), SUM(total) FROM ("
+                            "SELECT student, COALESCE(points, 0) AS ledger, 0 AS total FROM points WHERE student IS NOT NULL "
+                            "UNION ALL SELECT student, 0, total FROM points_totals) "
+                            "GROUP BY student HAVING SUM(ledger) != SUM(total)")
+
+ADD_BADGE = "INSERT INTO badges (student, badge_name, awarded_date) VALUES (?, ?, ?)"
+BADGES = "SELECT badge_name FROM badges WHERE student=?"
+# Counters badge rules can test, by name. Totals and counters are kept by
+# triggers (see init_db), so every stat is a primary-key lookup.
+BADGE_STATS = {
+    "total_points": "COALESCE(t.total, 0)",
+    "quiz_count": "COALESCE(s.quiz_count, 0)",
+    "early_submissions": "COALESCE(s.early_submissions, 0)",
+}
+_STUDENTS_WITH_STATS = ("FROM users u LEFT JOIN points_totals t ON t.student = u.username "
+                        "LEFT JOIN student_stats s ON s.student = u.username WHERE u.role = 'student'")
+STUDENT_BADGE_STATS = f"SELECT {', '.join(BADGE_STATS.values())} {_STUDENTS_WITH_STATS} AND u.username=?"
+# Whole-school award of one badge: {stat} is a BADGE_STATS expression. The
+# notifications go in first, while the students still lack the badge.
+_QUALIFYING = "AND {stat} >= ? AND NOT EXISTS (SELECT 1 FROM badges b WHERE b.student = u.username AND b.badge_name = ?)"
+_NOTIFY_QUALIFYING = f"INSERT INTO notifications (username, message) SELECT u.username, ? {_STUDENTS_WITH_STATS} {_QUALIFYING}"
+_AWARD_QUALIFYING = f"INSERT INTO badges (student, badge_name, awarded_date) SELECT u.username, ?, ? {_STUDENTS_WITH_STATS} {_QUALIFYING}"
+
+NEXT_ASSIGNMENT_DUE = "SELECT due_date FROM assignments WHERE student=? AND grade IS NULL ORDER BY due_date LIMIT 1"
+NEXT_QUIZ_DUE = "SELECT due_date FROM quizzes WHERE course_id IN (SELECT course_id FROM enrollments WHERE student=?) AND quiz_id NOT IN (SELECT quiz_id FROM quiz_submissions WHERE student=?) ORDER BY due_date LIMIT 1"
+
+# Due-soon reminders for ungraded assignments and unsubmitted quizzes in
+# enrolled courses, inserted in one statement. The reminder text doubles as
+# the dedupe key, so the unique (username, dedupe_key) index turns repeat
+# passes into no-ops. Dates are ISO strings, so the window is a range scan.
+# Inserting in username order keeps the notification index writes local,
+# which halves the cost of a whole-school pass.
+_DUE_REMINDERS = ("INSERT OR IGNORE INTO notifications (username, message, dedupe_key) SELECT student, message, message FROM ("
+                  "SELECT a.student AS student, 'Due Soon: ''' || COALESCE(a.description, '') || ''' on ' || a.due_date AS message "
+                  "FROM assignments a WHERE {assignment_student} a.grade IS NULL AND a.due_date BETWEEN ? AND ? "
+                  "UNION ALL SELECT e.student, 'Due Soon: ''' || COALESCE(q.title, '') || ''' on ' || q.due_date "
+                  "FROM enrollments e JOIN quizzes q ON q.course_id = e.course_id WHERE {enrollment_student} q.due_date BETWEEN ? AND ? "
+                  "AND NOT EXISTS (SELECT 1 FROM quiz_submissions qs WHERE qs.student = e.student AND qs.quiz_id = q.quiz_id)) "
+                  "ORDER BY student")
+STUDENT_DUE_REMINDERS = _DUE_REMINDERS.format(assignment_student="a.student=? AND", enrollment_student="e.student=? AND")
+ALL_DUE_REMINDERS = _DUE_REMINDERS.format(assignment_student="", enrollment_student="")
+
+ADD_NOTIFICATION = "INSERT INTO notifications (username, message) VALUES (?, ?)"
+# Course-wide fan-out: one statement however many students are enrolled.
+NOTIFY_COURSE = "INSERT INTO notifications (username, message) SELECT student, ? FROM enrollments WHERE course_id=? ORDER BY student"
+NOTIFICATIONS_PAGE = "SELECT notif_id, message, is_read FROM notifications WHERE username=? AND notif_id > ? ORDER BY notif_id LIMIT ?"
+UNREAD_NOTIFICATION_COUNT = "SELECT COUNT(*) FROM notifications WHERE username=? AND is_read=0"
+MARK_NOTIFICATION_READ = "UPDATE notifications SET is_read=1 WHERE notif_id=?"
+NOTIFICATION_OWNER = "SELECT username FROM notifications WHERE notif_id=?"
+# A submitted file is visible to the student who submitted it and the teacher
+# of the course.
+BLOB_VISIBLE = ("SELECT 1 FROM assignments WHERE student=? AND blob=? UNION ALL "
+                "SELECT 1 FROM assignments a JOIN courses c ON a.course_id = c.course_id "
+                "WHERE c.teacher=? AND a.blob=? LIMIT 1")
+
+# Chart data in one query each, one row per course. Numeric assignment grades
+# count as their value and anything else as 0; a quiz is worth 100 per point.
+GRADE_CHART = ("SELECT course_id, SUM(score) FROM ("
+               "SELECT course_id, CASE WHEN grade GLOB '[0-9]*' AND grade NOT GLOB '*[^0-9]*' "
+               "THEN CAST(grade AS INTEGER) ELSE 0 END AS score FROM assignments WHERE student=? AND grade IS NOT NULL "
+               "UNION ALL SELECT q.course_id, qs.score * 100 FROM quiz_submissions qs JOIN quizzes q ON qs.quiz_id = q.quiz_id "
+               "WHERE qs.student=?) GROUP BY course_id ORDER BY course_id")
+PROGRESS_CHART = ("SELECT e.course_id, "
+                  "(SELECT COUNT(*) FROM assignments a WHERE a.student = e.student AND a.course_id = e.course_id) + "
+                  "(SELECT COUNT(*) FROM quiz_submissions qs JOIN quizzes q ON qs.quiz_id = q.quiz_id "
+                  "WHERE qs.student = e.student AND q.course_id = e.course_id), "
+                  "(SELECT COUNT(*) FROM assignment_definitions d WHERE d.course_id = e.course_id) + "
+                  "(SELECT COUNT(*) FROM quizzes q WHERE q.course_id = e.course_id) "
+                  "FROM enrollments e WHERE e.student=? ORDER BY e.course_id")
+CHART_VERSION = "SELECT version FROM chart_versions WHERE student=?"
+ASSIGNMENT_GRADES = "SELECT grade FROM assignments WHERE student=? AND grade IS NOT NULL"
+QUIZ_SCORES = "SELECT score FROM quiz_submissions WHERE student=?"
+
+# Catalog loads (see catalog.py); {ids} is one placeholder per course.
+_COURSES_BY_ID = "SELECT course_id, course_name, teacher, description FROM courses WHERE course_id IN ({ids})"
+ENROLLED_COURSE_IDS = "SELECT course_id FROM enrollments WHERE student=?"
+AVAILABLE_COURSES = "SELECT course_id, course_name FROM courses WHERE course_id NOT IN (SELECT course_id FROM enrollments WHERE student=?)"
+TEACHER_COURSES = "SELECT course_id, course_name FROM courses WHERE teacher=?"
+ENROLL = "INSERT INTO enrollments (course_id, student) VALUES (?, ?)"
+ADD_COURSE = "INSERT INTO courses (course_name, teacher) VALUES (?, ?)"
+UPDATE_COURSE_DESCRIPTION = "UPDATE courses SET description=? WHERE course_id=?"
+
+RECEIVED_MESSAGES_PAGE = "SELECT msg_id, sender, receiver, message, timestamp FROM messages WHERE receiver=? AND msg_id > ? ORDER BY msg_id LIMIT ?"
+# Each branch is a bounded range scan on its own index; UNION also drops the
+# duplicate when someone messages themselves.
+CONVERSATION_PAGE = ("SELECT * FROM (SELECT msg_id, sender, receiver, message, timestamp FROM messages WHERE receiver=? AND msg_id > ? ORDER BY msg_id LIMIT ?) "
+                     "UNION SELECT * FROM (SELECT msg_id, sender, receiver, message, timestamp FROM messages WHERE sender=? AND msg_id > ? ORDER BY msg_id LIMIT ?) "
+                     "ORDER BY msg_id LIMIT ?")
+ADD_MESSAGE = "INSERT INTO messages (sender, receiver, course_id, message, timestamp) VALUES (?, ?, ?, ?, ?)"
+CHAT_PAGE_AFTER = "SELECT chat_id, sender, message, timestamp FROM chat_messages WHERE course_id=? AND chat_id > ? ORDER BY chat_id LIMIT ?"
+CHAT_PAGE_BEFORE = "SELECT chat_id, sender, message, timestamp FROM chat_messages WHERE course_id=? AND chat_id < ? ORDER BY chat_id DESC LIMIT ?"
+ADD_CHAT_MESSAGE = "INSERT INTO chat_messages (course_id, sender, message, timestamp) VALUES (?, ?, ?, ?)"
+
+# Everything due in a date range, for the calendar. Dates are ISO strings, so
+# months run from YYYY-MM-01 to YYYY-MM-31 whatever their length.
+CALENDAR_EVENTS = ("SELECT due_date, course_id, description FROM assignments WHERE student=? AND due_date BETWEEN ? AND ? "
+                   "UNION ALL SELECT q.due_date, q.course_id, q.title FROM enrollments e JOIN quizzes q ON q.course_id = e.course_id "
+                   "WHERE e.student=? AND q.due_date BETWEEN ? AND ? "
+                   "AND NOT EXISTS (SELECT 1 FROM quiz_submissions qs WHERE qs.student = e.student AND qs.quiz_id = q.quiz_id)")
+
+ASSIGNMENT_DEFINITIONS = "SELECT def_id, title, due_date FROM assignment_definitions WHERE course_id=?"
+ADD_ASSIGNMENT_DEFINITION = "INSERT INTO assignment_definitions (course_id, title, due_date) VALUES (?, ?, ?)"
+UPDATE_ASSIGNMENT_DEFINITION = "UPDATE assignment_definitions SET title=?, due_date=? WHERE def_id=?"
+ADD_SUBMISSION = ("INSERT INTO assignments (course_id, student, file_path, due_date, description, blob, file_size) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?)")
+TEACHER_SUBMISSIONS_PAGE = "SELECT a.assignment_id, a.student, a.file_path, a.grade, a.blob FROM assignments a JOIN courses c ON a.course_id = c.course_id WHERE c.teacher=? AND a.assignment_id > ? ORDER BY a.assignment_id LIMIT ?"
+# Grading is limited to submissions in the teacher's own courses; a NULL
+# comment leaves the existing one.
+GRADE_TEACHER_SUBMISSION = ("UPDATE assignments SET grade=?, comment=COALESCE(?, comment) WHERE assignment_id=? "
+                            "AND course_id IN (SELECT course_id FROM courses WHERE teacher=?)")
+NOTIFY_SUBMITTER = "INSERT INTO notifications (username, message) SELECT student, ? FROM assignments WHERE assignment_id=?"
+# Rows in the TEACHER_SUBMISSIONS_PAGE shape; {ids} is one placeholder per id.
+_SUBMISSIONS_BY_ID = "SELECT assignment_id, student, file_path, grade, blob FROM assignments WHERE assignment_id IN ({ids})"
+# Submission files live in the blob store (blobstore.py); blobs.refs is kept by
+# triggers on assignments.blob. Older submissions have only file_path.
+REFERENCED_BLOBS = "SELECT sha256 FROM blobs WHERE refs > 0"
+DELETE_UNREFERENCED_BLOBS = "DELETE FROM blobs WHERE refs <= 0"
+UNSTORED_SUBMISSIONS = "SELECT assignment_id, file_path FROM assignments WHERE blob IS NULL AND file_path IS NOT NULL"
+SET_SUBMISSION_BLOB = "UPDATE assignments SET blob=?, file_size=? WHERE assignment_id=?"
+
+# The answer is left out: open quizzes are shown to students (over the
+# network with a server), and LMSService.take_quiz looks it up to score.
+OPEN_QUIZZES = "SELECT quiz_id, title, question, options FROM quizzes WHERE course_id=? AND quiz_id NOT IN (SELECT quiz_id FROM quiz_submissions WHERE student=?)"
+QUIZ_ANSWER = "SELECT correct_answer FROM quizzes WHERE quiz_id=?"
+ADD_QUIZ = "INSERT INTO quizzes (course_id, title, due_date, question, options, correct_answer) VALUES (?, ?, ?, ?, ?, ?)"
+ADD_QUIZ_SUBMISSION = "INSERT INTO quiz_submissions (quiz_id, student, answer, score) VALUES (?, ?, ?, ?)"
+
+USERS = "SELECT username, role FROM users"
+ADD_USER = "INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)"
+REMOVE_USER = "DELETE FROM users WHERE username=?"
+DATA_VERSION = "PRAGMA data_version"
+
+
+class Repository:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        # One long-lived connection per thread: the GUI thread keeps its own and
+        # worker threads each get one the first time they touch the database.
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._version_conn = None
+        self._charts = OrderedDict()
+        self.courses = CourseCatalog(self._load_courses)
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.db_path)
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._lock:
+                self._connections[threading.get_ident()] = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        # Nested transactions join the outermost one, so a group of writes
+        # (e.g. enrolment plus the points it awards) commits atomically.
+        # BEGIN IMMEDIATE takes the write lock up front, so a busy database is
+        # reported (and retried) here rather than halfway through the writes.
+        conn = self.conn
+        if self._local.depth == 0 and not conn.in_transaction:
+            retry_on_busy(conn.execute, "BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.rollback()
+            raise
+        else:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                retry_on_busy(conn.commit)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections = {}
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+        self._local = threading.local()
+
+    def close_threads(self, thread_ids):
+        # Closes the connections of worker threads that have ended (see
+        # QueryExecutor.shutdown).
+        with self._lock:
+            for thread_id in thread_ids:
+                conn = self._connections.pop(thread_id, None)
+                if conn is not None:
+                    conn.close()
+
+    def _one(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchone()
+
+    def _all(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchall()
+
+    def _scalar(self, sql, params=(), default=None):
+        row = self._one(sql, params)
+        if row is None or row[0] is None:
+            return default
+        return row[0]
+
+    def _all_by_id(self, template, ids):
+        rows = []
+        for start in range(0, len(ids), ID_BATCH):
+            batch = ids[start:start + ID_BATCH]
+            rows += self._all(template.format(ids=", ".join("?" * len(batch))), batch)
+        return rows
+
+    def _write(self, sql, params=()):
+        with self.transaction() as conn:
+            return conn.execute(sql, params).lastrowid
+
+    def call_many(self, calls):
+        # [(method name, args)] -> results in order. The server backend sends
+        # them in one request; here they are plain calls.
+        return [getattr(self, name)(*args) for name, args in calls]
+
+    def data_version(self):
+        # Changes whenever another connection (another seat, or any thread of
+        # this one) commits. PRAGMA data_version counts per connection, so
+        # every thread asks the same dedicated one.
+        with self._lock:
+            if self._version_conn is None:
+                self._version_conn = connect(self.db_path)
+            return self._version_conn.execute(DATA_VERSION).fetchone()[0]
+
+    # Users
+    def authenticate(self, username, password_hash):
+        return self._scalar(AUTHENTICATE, (username, password_hash))
+
+    def get_users(self):
+        return self._all(USERS)
+
+    def add_user(self, username, password_hash, role):
+        self._write(ADD_USER, (username, password_hash, role))
+
+    def remove_user(self, username):
+        self._write(REMOVE_USER, (username,))
+
+    # Points and badges
+    def add_points(self, student, points, reason):
+        self._write(ADD_POINTS, (student, points, reason))
+
+    def get_total_points(self, student):
+        return self._scalar(TOTAL_POINTS, (student,), 0)
+
+    def get_leaderboard(self, limit=5):
+        return self._all(LEADERBOARD, (limit,))
+
+    def find_points_total_mismatches(self):
+        return self._all(POINTS_TOTALS_MISMATCHES)
+
+    def rebuild_points_totals(self):
+        with self.transaction() as conn:
+            conn.execute(CLEAR_POINTS_TOTALS)
+            return conn.execute(REBUILD_POINTS_TOTALS).rowcount
+
+    def add_badge(self, student, badge_name, awarded_date):
+        self._write(ADD_BADGE, (student, badge_name, awarded_date))
+
+    def get_badges(self, student):
+        return [row[0] for row in self._all(BADGES, (student,))]
+
+    def get_badge_stats(self, student):
+        row = self._one(STUDENT_BADGE_STATS, (student,)) or (0,) * len(BADGE_STATS)
+        return dict(zip(BADGE_STATS, row))
+
+    def award_badge_to_qualifying(self, badge_name, stat, threshold, awarded_date, message):
+        # Gives the badge to every student whose stat has reached the
+        # threshold and who does not hold it yet; returns how many earned it.
+        qualifying = {"stat": BADGE_STATS[stat]}
+        params = (threshold, badge_name)
+        with self.transaction() as conn:
+            conn.execute(_NOTIFY_QUALIFYING.format(**qualifying), (message,) + params)
+            return conn.execute(_AWARD_QUALIFYING.format(**qualifying), (badge_name, awarded_date) + params).rowcount
+
+    # Due dates
+    def get_next_assignment_due(self, student):
+        return self._scalar(NEXT_ASSIGNMENT_DUE, (student,))
+
+    def get_next_quiz_due(self, student):
+        return self._scalar(NEXT_QUIZ_DUE, (student, student))
+
+    def get_home_stats(self, student):
+        # (points, badge count, next due date or None) for the home tab.
+        dates = [d for d in (self.get_next_assignment_due(student), self.get_next_quiz_due(student)) if d]
+        return self.get_total_points(student), len(self.get_badges(student)), min(dates) if dates else None
+
+    def get_calendar(self, student, year, month):
+        # Everything due in the given month and the months either side of it
+        # (the calendar shows their edges too), in one query:
+        # ({"YYYY-MM", ...}, {due_date: ["course: title", ...]}). Cached like
+        # the charts until the student's chart version moves.
+        months = []
+        for offset in (-1, 0, 1):
+            shown_year, shown_month = divmod(year * 12 + month - 1 + offset, 12)
+            months.append(f"{shown_year:04d}-{shown_month + 1:02d}")
+        def build():
+            first, last = f"{months[0]}-01", f"{months[-1]}-31"
+            rows = self._all(CALENDAR_EVENTS, (student, first, last, student, first, last))
+            names = self.courses.names([row[1] for row in rows])
+            events = {}
+            for name, (due_date, _, title) in zip(names, rows):
+                events.setdefault(due_date, []).append(f"{name}: {title}")
+            return set(months), events
+        return self._cached_chart(f"calendar {months[1]}", student, build)
+
+    def get_events_due_on(self, student, date_str):
+        _, events = self.get_calendar(student, int(date_str[:4]), int(date_str[5:7]))
+        return list(events.get(date_str, []))
+
+    def add_due_reminders(self, student=None, days=3):
+        # Reminds about everything due from today to `days` ahead, for one
+        # student or (student=None) the whole school. Returns how many new
+        # reminders were added.
+        today = date.today()
+        window = (today.isoformat(), (today + timedelta(days=days)).isoformat())
+        if student is None:
+            sql, params = ALL_DUE_REMINDERS, window + window
+        else:
+            sql, params = STUDENT_DUE_REMINDERS, (student,) + window + (student,) + window
+        with self.transaction() as conn:
+            return conn.execute(sql, params).rowcount
+
+    # Notifications
+    def add_notification(self, username, message):
+        self._write(ADD_NOTIFICATION, (username, message))
+
+    def notify_course(self, course_id, message):
+        with self.transaction() as conn:
+            return conn.execute(NOTIFY_COURSE, (message, course_id)).rowcount
+
+    def count_unread_notifications(self, username):
+        return self._scalar(UNREAD_NOTIFICATION_COUNT, (username,), 0)
+
+    def get_notifications_page(self, username, after_id, limit):
+        return self._all(NOTIFICATIONS_PAGE, (username, after_id, limit))
+
+    def mark_notification_read(self, notif_id):
+        self._write(MARK_NOTIFICATION_READ, (notif_id,))
+
+    def get_notification_owner(self, notif_id):
+        return self._scalar(NOTIFICATION_OWNER, (notif_id,))
+
+    # Grades and progress
+    def _cached_chart(self, name, student, build):
+        # Charts and calendar months are kept until the student's chart
+        # version moves (see init_db), which is one primary-key read per request.
+        version = self._scalar(CHART_VERSION, (student,), 0)
+        key = (name, student)
+        with self._lock:
+            cached = self._charts.get(key)
+            if cached is not None and cached[0] == version:
+                self._charts.move_to_end(key)
+                return cached[1]
+        chart = build()
+        with self._lock:
+            self._charts[key] = (version, chart)
+            self._charts.move_to_end(key)
+            while len(self._charts) > CHART_CACHE_SIZE:
+                self._charts.popitem(last=False)
+        return chart
+
+    def _course_labels(self, rows):
+        return [name or "" for name in self.courses.names([row[0] for row in rows])]
+
+    def get_grade_chart(self, student):
+        # Returns (course_names, scores).
+        def build():
+            rows = self._all(GRADE_CHART, (student, student))
+            return self._course_labels(rows), [row[1] or 0 for row in rows]
+        return self._cached_chart("grades", student, build)
+
+    def get_progress_chart(self, student):
+        # Returns (course_names, completed_counts, total_counts).
+        def build():
+            rows = self._all(PROGRESS_CHART, (student,))
+            return self._course_labels(rows), [row[1] for row in rows], [row[2] for row in rows]
+        return self._cached_chart("progress", student, build)
+
+    def get_assignment_grades(self, student):
+        return [row[0] for row in self._all(ASSIGNMENT_GRADES, (student,))]
+
+    def get_quiz_scores(self, student):
+        return [row[0] for row in self._all(QUIZ_SCORES, (student,))]
+
+    # Courses
+    def _load_courses(self, course_ids):
+        return self._all_by_id(_COURSES_BY_ID, course_ids)
+
+    def get_course_name(self, course_id):
+        course = self.courses.get(course_id)
+        return course.course_name if course else None
+
+    def get_course_teacher(self, course_id):
+        course = self.courses.get(course_id)
+        return course.teacher if course else None
+
+    def get_enrolled_course_ids(self, student):
+        return [row[0] for row in self._all(ENROLLED_COURSE_IDS, (student,))]
+
+    def get_enrolled_courses(self, student):
+        course_ids = self.get_enrolled_course_ids(student)
+        return [(course_id, name) for course_id, name in zip(course_ids, self.courses.names(course_ids))
+                if name is not None]
+
+    def get_available_courses(self, student):
+        return self._all(AVAILABLE_COURSES, (student,))
+
+    def get_teacher_courses(self, teacher):
+        return self._all(TEACHER_COURSES, (teacher,))
+
+    def enroll(self, course_id, student):
+        self._write(ENROLL, (course_id, student))
+
+    def add_course(self, course_name, teacher):
+        course_id = self._write(ADD_COURSE, (course_name, teacher))
+        self.courses.invalidate(course_id)
+        return course_id
+
+    def update_course_description(self, course_id, description):
+        self._write(UPDATE_COURSE_DESCRIPTION, (description, course_id))
+        self.courses.invalidate(course_id)
+
+    # Messages and chat
+    def get_received_messages_page(self, username, after_id, limit):
+        return self._all(RECEIVED_MESSAGES_PAGE, (username, after_id, limit))
+
+    def get_conversation_page(self, username, after_id, limit):
+        return self._all(CONVERSATION_PAGE, (username, after_id, limit, username, after_id, limit, limit))
+
+    def add_message(self, sender, receiver, course_id, message, timestamp):
+        self._write(ADD_MESSAGE, (sender, receiver, course_id, message, timestamp))
+
+    def get_chat_page_before(self, course_id, before_id, limit):
+        return self._all(CHAT_PAGE_BEFORE, (course_id, before_id, limit))
+
+    def get_chat_page_after(self, course_id, after_id, limit):
+        return self._all(CHAT_PAGE_AFTER, (course_id, after_id, limit))
+
+    def add_chat_message(self, course_id, sender, message, timestamp):
+        self._write(ADD_CHAT_MESSAGE, (course_id, sender, message, timestamp))
+
+    # Assignments and quizzes
+    def get_assignment_definitions(self, course_id):
+        return self._all(ASSIGNMENT_DEFINITIONS, (course_id,))
+
+    def add_assignment_definition(self, course_id, title, due_date):
+        return self._write(ADD_ASSIGNMENT_DEFINITION, (course_id, title, due_date))
+
+    def update_assignment_definition(self, def_id, title, due_date):
+        self._write(UPDATE_ASSIGNMENT_DEFINITION, (title, due_date, def_id))
+
+    def add_submission(self, course_id, student, file_path, due_date, description, blob=None, file_size=None):
+        # file_path is the name shown to teachers; blob is the stored content.
+        return self._write(ADD_SUBMISSION, (course_id, student, file_path, due_date, description, blob, file_size))
+
+    def can_read_blob(self, username, blob):
+        return self._one(BLOB_VISIBLE, (username, blob, username, blob)) is not None
+
+    def get_teacher_submissions_page(self, teacher, after_id, limit):
+        return self._all(TEACHER_SUBMISSIONS_PAGE, (teacher, after_id, limit))
+
+    def grade_submissions(self, teacher, grades, message="Assignment graded: {grade}"):
+        # Applies [(assignment_id, grade, comment)] in one transaction and
+        # notifies each graded student. Submissions outside the teacher's
+        # courses are skipped. Returns the graded rows as the teacher's
+        # submission list shows them.
+        graded = []
+        with self.transaction() as conn:
+            for assignment_id, grade, comment in grades:
+                if conn.execute(GRADE_TEACHER_SUBMISSION, (grade, comment or None, assignment_id, teacher)).rowcount:
+                    conn.execute(NOTIFY_SUBMITTER, (message.format(grade=grade), assignment_id))
+                    graded.append(assignment_id)
+        return self._all_by_id(_SUBMISSIONS_BY_ID, graded)
+
+    def get_referenced_blobs(self):
+        return {row[0] for row in self._all(REFERENCED_BLOBS)}
+
+    def delete_unreferenced_blobs(self):
+        with self.transaction() as conn:
+            return conn.execute(DELETE_UNREFERENCED_BLOBS).rowcount
+
+    def get_unstored_submissions(self):
+        return self._all(UNSTORED_SUBMISSIONS)
+
+    def set_submission_blob(self, assignment_id, blob, file_size):
+        self._write(SET_SUBMISSION_BLOB, (blob, file_size, assignment_id))
+
+    def get_open_quizzes(self, course_id, student):
+        return self._all(OPEN_QUIZZES, (course_id, student))
+
+    def get_quiz_answer(self, quiz_id):
+        return self._scalar(QUIZ_ANSWER, (quiz_id,))
+
+    def add_quiz(self, course_id, title, due_date, question, options, correct_answer):
+        return self._write(ADD_QUIZ, (course_id, title, due_date, question, options, correct_answer))
+
+    def add_quiz_submission(self, quiz_id, student, answer, score):
+        self._write(ADD_QUIZ_SUBMISSION, (quiz_id, student, answer, score))
+
+
+_repository = None
+
+def get_repository():
+    global _repository
+    if _repository is None:
+        if SERVER_URL:
+            from client import RemoteRepository
+            _repository = RemoteRepository(SERVER_URL)
+        else:
+            _repository = Repository()
+    return _repository
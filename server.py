@@ -0,0 +1,455 @@
+# server.py
+# LAN server mode: one process owns the database and the seats talk to it
+# over HTTP/JSON instead of each opening resources/school_lms.db over a
+# network share. Start it on the machine that holds the database:
+#
+#   python server.py --host 0.0.0.0 --port 8765
+#
+# and point the desktop clients at it with LMS_SERVER=http://<host>:8765
+# (see client.py). Without LMS_SERVER they open the database directly.
+#
+# The API is the Repository reads and LMSService operations the dashboard
+# and login already use, called by name:
+#
+#   POST /login   {"username": ..., "password_hash": ...} -> {"result": role, "token": ...}
+#   POST /call    {"method": "repository.get_grade_chart", "params": ["student1"]} -> {"result": ...}
+#   POST /batch   {"calls": [{"method": ..., "params": [...]}, ...]} -> {"results": [{"result": ...}, ...]}
+#   POST /logout
+#   POST /blob    <file content> -> {"result": [sha256, size]}
+#   GET  /blob/<sha256> -> the file content
+#   GET  /health  -> {"version": ...}
+#
+# Submitted files are uploaded to the server's blob store (assignments/blobs
+# beside the server) and downloaded from it, so the seats need no shared
+# folder. A file can be downloaded by the student who submitted it and the
+# course's teacher.
+#
+# /call, /batch, /logout and /blob need "Authorization: Bearer <token>". A session
+# may only make the calls its role allows, about its own data and the courses
+# it teaches or is enrolled in (admins may make any call). Errors come
+# back as {"error": message, "type": "LMSError" | "RequestError" | "ServerError"}.
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import sqlite3
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from blobstore import CHUNK_SIZE, BlobStore, is_digest
+from database import DB_PATH, connect, init_db
+from repository import Repository
+from services import LMSError, LMSService
+
+DEFAULT_PORT = 8765
+READ_THREADS = 4
+CACHE_SIZE = 4096
+MAX_BODY = 4 * 1024 * 1024
+MAX_BLOB = 512 * 1024 * 1024
+IDLE_TIMEOUT = 120
+# How often to look for commits made outside the server (tools, seats still
+# opening the database directly), which make cached results stale.
+WATCH_INTERVAL = 1.0
+
+# Repository reads, run on a pool of reader threads (each with its own
+# connection) and cached until the data changes.
+READ_METHODS = frozenset({
+    "count_unread_notifications", "get_assignment_definitions", "get_available_courses", "get_badges",
+    "get_calendar", "get_chat_page_after", "get_chat_page_before", "get_conversation_page",
+    "get_course_teacher", "get_enrolled_courses", "get_events_due_on", "get_grade_chart", "get_home_stats",
+    "get_leaderboard", "get_notifications_page", "get_open_quizzes", "get_progress_chart",
+    "get_received_messages_page", "get_teacher_courses", "get_teacher_submissions_page",
+    "get_total_points", "get_users",
+})
+# LMSService operations that only read; these are cached like the reads above.
+SERVICE_READ_METHODS = frozenset({"grade_stats"})
+# LMSService operations, run one at a time on the writer thread. Submitted
+# files stay in the shared blob store, so store_submission_file and
+# submit_assignment run on the client; record_submission comes here.
+WRITE_METHODS = frozenset({
+    "enroll", "record_submission", "take_quiz", "send_message", "mark_notification_read",
+    "post_chat_message", "add_course", "update_course_description", "create_assignment",
+    "update_assignment", "create_quiz", "grade_submissions", "add_user", "remove_user",
+    "send_due_reminders", "reevaluate_badges",
+})
+ADMIN_METHODS = frozenset({"repository.get_users", "service.add_user", "service.remove_user",
+                           "service.reevaluate_badges"})
+TEACHER_METHODS = frozenset({"service.add_course", "service.grade_submissions", "service.create_assignment",
+                             "service.update_assignment", "service.create_quiz",
+                             "service.update_course_description"})
+# Calls about one course: the position of the course id among the params and
+# who may make them, the course's "teacher" or any "member" (its teacher or
+# an enrolled student).
+COURSE_DATA = {
+    "service.create_assignment": (0, "teacher"), "service.update_assignment": (0, "teacher"),
+    "service.create_quiz": (0, "teacher"), "service.update_course_description": (0, "teacher"),
+    "repository.get_chat_page_before": (0, "member"), "repository.get_chat_page_after": (0, "member"),
+    "service.post_chat_message": (0, "member"),
+    "repository.get_assignment_definitions": (0, "member"), "repository.get_open_quizzes": (0, "member"),
+    "service.take_quiz": (1, "member"), "service.record_submission": (1, "member"),
+}
+# Calls about one user's own data: the position of the username among the
+# params. Only that user (or an admin) may make them.
+OWN_DATA = {
+    "repository.count_unread_notifications": 0, "repository.get_available_courses": 0,
+    "repository.get_badges": 0, "repository.get_calendar": 0, "repository.get_conversation_page": 0,
+    "repository.get_enrolled_courses": 0, "repository.get_events_due_on": 0,
+    "repository.get_grade_chart": 0, "repository.get_home_stats": 0,
+    "repository.get_notifications_page": 0, "repository.get_open_quizzes": 1,
+    "repository.get_progress_chart": 0, "repository.get_received_messages_page": 0,
+    "repository.get_teacher_courses": 0, "repository.get_teacher_submissions_page": 0,
+    "repository.get_total_points": 0,
+    "service.enroll": 0, "service.record_submission": 0, "service.take_quiz": 0, "service.grade_stats": 0,
+    "service.send_message": 0, "service.post_chat_message": 1, "service.add_course": 0,
+    "service.grade_submissions": 0, "service.send_due_reminders": 0,
+}
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+class RequestError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def encode_json(value):
+    # Results are tuples, lists, dicts and the odd set (get_calendar).
+    return json.dumps(value, default=lambda o: list(o) if isinstance(o, (set, frozenset)) else str(o)).encode()
+
+def is_bad_request(error):
+    # Parameters of the wrong type or shape, or ones the schema refuses, fail
+    # inside the repository or service: the caller's mistake, not the
+    # server's.
+    if isinstance(error, (TypeError, ValueError, IndexError, KeyError, sqlite3.IntegrityError)):
+        return True
+    return (isinstance(error, (sqlite3.InterfaceError, sqlite3.ProgrammingError))
+            and "binding parameter" in str(error))
+
+def response_head(status, content_type, length, keep_alive):
+    return (f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {length}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode()
+
+class LMSServer:
+    def __init__(self, db_path=DB_PATH, read_threads=READ_THREADS, cache_size=CACHE_SIZE, blobs=None):
+        self.db_path = db_path
+        # Repository keeps one connection per thread, so the reader threads
+        # are the connection pool; the writer thread has its own.
+        self.repo = Repository(db_path)
+        self.blobs = blobs or BlobStore()
+        self.service = LMSService(self.repo, self.blobs)
+        self.readers = ThreadPoolExecutor(read_threads, thread_name_prefix="lms-read")
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix="lms-write")
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.inflight = {}
+        self.sessions = {}
+        # Bumped by every write here and every commit seen from outside;
+        # cached results and in-flight reads belong to one version.
+        self.version = 0
+        self.stats = {"requests": 0, "calls": 0, "cache_hits": 0, "shared_reads": 0, "reads": 0, "writes": 0}
+
+    def changed(self):
+        self.version += 1
+        self.cache.clear()
+
+    async def read(self, method, params, namespace="repository"):
+        target = self.service if namespace == "service" else self.repo
+        key = (f"{namespace}.{method}", json.dumps(params))
+        version = self.version
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == version:
+            self.cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return cached[1]
+        # Identical reads arriving while one is running wait for its result
+        # instead of querying again.
+        future = self.inflight.get((key, version))
+        if future is not None:
+            self.stats["shared_reads"] += 1
+            return await asyncio.shield(future)
+        self.stats["reads"] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.readers, lambda: getattr(target, method)(*params))
+        self.inflight[(key, version)] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            self.inflight.pop((key, version), None)
+        if self.version == version:
+            self.cache[key] = (version, result)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return result
+
+    async def write(self, method, params):
+        self.stats["writes"] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.writer, lambda: getattr(self.service, method)(*params))
+        finally:
+            self.changed()
+
+    async def authorize(self, name, params, username, role):
+        # Raises RequestError (403) unless the session may make this call.
+        if role == "admin":
+            return
+        if name in ADMIN_METHODS:
+            raise RequestError(f"{name} is for admins", 403)
+        if name in TEACHER_METHODS and role != "teacher":
+            raise RequestError(f"{name} is for teachers", 403)
+        position = OWN_DATA.get(name)
+        if position is not None and (len(params) <= position or params[position] != username):
+            raise RequestError(f"{name} is only allowed for your own data", 403)
+        position, allowed = COURSE_DATA.get(name, (None, None))
+        if position is not None:
+            course_id = params[position] if len(params) > position else None
+            teaches = await self.read("get_course_teacher", [course_id]) == username
+            if not teaches and (allowed == "teacher" or course_id not in
+                                await self.read("get_enrolled_course_ids", [username])):
+                raise RequestError(f"{name} is only allowed for your own courses", 403)
+        if name == "service.mark_notification_read":
+            if not params or await self.read("get_notification_owner", params[:1]) != username:
+                raise RequestError(f"{name} is only allowed for your own notifications", 403)
+
+    async def call(self, call, session):
+        if not isinstance(call, dict) or not isinstance(call.get("params", []), list):
+            raise RequestError("expected {\"method\": ..., \"params\": [...]}")
+        name = call.get("method", "")
+        params = call.get("params", [])
+        namespace, _, method = name.partition(".")
+        await self.authorize(name, params, *session)
+        self.stats["calls"] += 1
+        if name == "repository.data_version":
+            return self.version
+        if namespace == "repository" and method in READ_METHODS:
+            return await self.read(method, params)
+        if namespace == "service" and method in SERVICE_READ_METHODS:
+            return await self.read(method, params, namespace)
+        if namespace == "service" and method in WRITE_METHODS:
+            return await self.write(method, params)
+        raise RequestError(f"unknown method {name}", 404)
+
+    async def call_result(self, call, session):
+        # One call as its JSON reply and HTTP status.
+        try:
+            return 200, {"result": await self.call(call, session)}
+        except LMSError as e:
+            return 200, {"error": str(e), "type": "LMSError"}
+        except RequestError as e:
+            return e.status, {"error": str(e), "type": "RequestError"}
+        except Exception as e:
+            if is_bad_request(e):
+                return 400, {"error": f"bad parameters for {call.get('method')}: {e!r}", "type": "RequestError"}
+            traceback.print_exc()
+            return 500, {"error": "internal error", "type": "ServerError"}
+
+    async def login(self, body):
+        username = body.get("username")
+        password_hash = body.get("password_hash")
+        if not isinstance(username, str) or not isinstance(password_hash, str):
+            raise RequestError("expected {\"username\": ..., \"password_hash\": ...}")
+        loop = asyncio.get_running_loop()
+        role = await loop.run_in_executor(self.readers, self.repo.authenticate, username, password_hash)
+        if not role:
+            return {"result": None}
+        token = secrets.token_urlsafe(24)
+        self.sessions[token] = (username, role)
+        return {"result": role, "token": token}
+
+    def session(self, headers):
+        # (username, role) for the request's bearer token, or None.
+        return self.sessions.get(headers.get("authorization", "").partition("Bearer ")[2])
+
+    async def receive_blob(self, reader, length):
+        # Streams an upload into the blob store and returns [digest, size].
+        loop = asyncio.get_running_loop()
+        os.makedirs(self.blobs.root, exist_ok=True)
+        tmp = os.path.join(self.blobs.root, f".upload.{secrets.token_hex(8)}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                remaining = length
+                while remaining:
+                    chunk = await reader.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b"", remaining)
+                    await loop.run_in_executor(None, f.write, chunk)
+                    remaining -= len(chunk)
+            # The server owns tmp, so put() may hardlink it.
+            return list(await loop.run_in_executor(None, lambda: self.blobs.put(tmp, link=True)))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    async def send_blob(self, writer, digest, keep_alive):
+        loop = asyncio.get_running_loop()
+        path = self.blobs.path(digest)
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            writer.write(response_head(200, "application/octet-stream", size, keep_alive))
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+
+    async def handle_blob(self, method, path, headers, length, reader, writer, keep_alive):
+        # Answers /blob and /blob/<digest> and returns whether the connection
+        # can stay open (not if an upload's body was left unread).
+        self.stats["requests"] += 1
+        session = self.session(headers)
+        if method == "POST" and path == "/blob":
+            if session is None:
+                status, reply, keep_alive = 401, {"error": "not logged in", "type": "RequestError"}, False
+            elif length > MAX_BLOB:
+                status, reply, keep_alive = 413, {"error": "file too large", "type": "RequestError"}, False
+            else:
+                status, reply = 200, {"result": await self.receive_blob(reader, length)}
+        elif method == "GET" and path.startswith("/blob/"):
+            if length:
+                await reader.readexactly(length)
+            digest = path[len("/blob/"):]
+            if session is None:
+                status, reply = 401, {"error": "not logged in", "type": "RequestError"}
+            elif not is_digest(digest) or not os.path.exists(self.blobs.path(digest)) or (
+                    session[1] != "admin" and not await self.read("can_read_blob", [session[0], digest])):
+                status, reply = 404, {"error": f"no file {digest}", "type": "RequestError"}
+            else:
+                await self.send_blob(writer, digest, keep_alive)
+                return keep_alive
+        else:
+            status, reply, keep_alive = 404, {"error": f"no route {method} {path}", "type": "RequestError"}, False
+        data = encode_json(reply)
+        writer.write(response_head(status, "application/json", len(data), keep_alive) + data)
+        await writer.drain()
+        return keep_alive
+
+    async def route(self, method, path, headers, body):
+        self.stats["requests"] += 1
+        if method == "GET" and path == "/health":
+            return 200, {"version": self.version, "stats": self.stats}
+        if method != "POST":
+            return 404, {"error": f"no route {method} {path}", "type": "RequestError"}
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "body is not JSON", "type": "RequestError"}
+        if not isinstance(payload, dict):
+            return 400, {"error": "body must be a JSON object", "type": "RequestError"}
+        if path == "/login":
+            try:
+                return 200, await self.login(payload)
+            except RequestError as e:
+                return e.status, {"error": str(e), "type": "RequestError"}
+        session = self.session(headers)
+        if session is None:
+            return 401, {"error": "not logged in", "type": "RequestError"}
+        if path == "/logout":
+            self.sessions.pop(headers["authorization"].partition("Bearer ")[2], None)
+            return 200, {"result": None}
+        if path == "/call":
+            return await self.call_result(payload, session)
+        if path == "/batch":
+            # The calls run concurrently; reads among them share the cache
+            # and the reader pool, writes keep their order on the writer.
+            calls = payload.get("calls", [])
+            if not isinstance(calls, list):
+                return 400, {"error": "\"calls\" must be a list", "type": "RequestError"}
+            replies = await asyncio.gather(*(self.call_result(call, session) for call in calls))
+            return 200, {"results": [reply for _, reply in replies]}
+        return 404, {"error": f"no route {method} {path}", "type": "RequestError"}
+
+    async def handle_connection(self, reader, writer):
+        # HTTP/1.1 with keep-alive, one request at a time per connection.
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if path == "/blob" or path.startswith("/blob/"):
+                    if not await self.handle_blob(method, path, headers, length, reader, writer, keep_alive):
+                        break
+                    continue
+                if length > MAX_BODY:
+                    status, reply = 413, {"error": "request too large", "type": "RequestError"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, reply = await self.route(method, path, headers, body)
+                data = encode_json(reply)
+                writer.write(response_head(status, "application/json", len(data), keep_alive) + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def watch_database(self):
+        # PRAGMA data_version moves when another connection commits, so one
+        # cheap read a second catches changes made around the server.
+        conn = connect(self.db_path)
+        loop = asyncio.get_running_loop()
+        last = None
+        try:
+            while True:
+                version = await loop.run_in_executor(
+                    self.readers, lambda: conn.execute("PRAGMA data_version").fetchone()[0])
+                if last is not None and version != last:
+                    self.changed()
+                last = version
+                await asyncio.sleep(WATCH_INTERVAL)
+        finally:
+            conn.close()
+
+    async def serve(self, host, port, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        watcher = asyncio.create_task(self.watch_database())
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+    def close(self):
+        self.readers.shutdown()
+        self.writer.shutdown()
+        self.repo.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the LMS database over HTTP/JSON")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--host", default="127.0.0.1", help="0.0.0.0 to accept other machines")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--read-threads", type=int, default=READ_THREADS, help="reader connections")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="cached results")
+    args = parser.parse_args()
+
+    init_db(db_path=args.db, progress=print)
+    server = LMSServer(args.db, args.read_threads, args.cache_size)
+    start = time.perf_counter()
+    try:
+        asyncio.run(server.serve(args.host, args.port,
+                                 ready=lambda port: print(f"serving {args.db} on http://{args.host}:{port}")))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        print(f"stopped after {time.perf_counter() - start:.0f} s: {server.stats}")
+
+if __name__ == "__main__":
+    main()
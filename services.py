@@ -0,0 +1,270 @@
+# services.py
+import csv
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from badges import evaluate_badges, reevaluate_all_badges
+from blobstore import BlobStore, is_digest
+from database import hash_password
+from repository import get_repository
+
+ROLES = ("student", "teacher", "admin")
+QUIZ_OPTIONS = 4
+ENROLL_POINTS = 10
+SUBMISSION_POINTS = 20
+QUIZ_POINTS = 15
+
+class LMSError(Exception):
+    # A request the service refuses; the message is meant for the user.
+    pass
+
+class ServerError(Exception):
+    # The server backend (client.py) could not be reached or failed the
+    # request. Callers report it like LMSError.
+    pass
+
+def validate_due_date(due_date):
+    if not re.match(r"^\d{4}-\d{2}-\d{2}$", due_date):
+        return False
+    try:
+        datetime.strptime(due_date, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+def read_grades_csv(path):
+    # [(assignment_id, grade, comment or None)] from a CSV of
+    # assignment_id,grade[,comment]. Rows that do not start with an id, such
+    # as a header, are skipped. A file that cannot be read raises LMSError
+    # naming the row.
+    grades = []
+    with open(path, "rb") as f:
+        # Decoded a line at a time, so a bad byte is reported on its row.
+        reader = csv.reader(line.decode("utf-8-sig") for line in f)
+        done = 0  # lines read without a problem
+        try:
+            for record in reader:
+                if len(record) >= 2 and record[0].strip().isdigit():
+                    comment = record[2].strip() if len(record) > 2 else ""
+                    grades.append((int(record[0]), record[1].strip(), comment or None))
+                done = reader.line_num
+        except (UnicodeDecodeError, csv.Error, ValueError) as e:
+            raise LMSError(f"{os.path.basename(path)}, row {done + 1}: {e}") from e
+    return grades
+
+def now_timestamp():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def get_service(repo=None, blobs=None):
+    # The service for get_repository()'s backend: LMSService over the local
+    # database, or the server's (client.RemoteService).
+    repo = repo or get_repository()
+    if hasattr(repo, "make_service"):
+        return repo.make_service(blobs)
+    return LMSService(repo, blobs)
+
+class LMSService:
+    # Every LMS operation without Qt: validation, the writes, notifications,
+    # points and badges, each operation in one transaction. DashboardWindow
+    # adds the dialogs and refreshes; cli.py and the tools run it headless.
+    # Operations return what the caller needs to report (e.g. newly earned
+    # badges) and raise LMSError for anything the user must correct.
+    def __init__(self, repo=None, blobs=None):
+        self.repo = repo or get_repository()
+        self.blobs = blobs or BlobStore()
+
+    @contextmanager
+    def _dated_transaction(self):
+        # repo.transaction() for writes that store a due date. The database
+        # refuses non-YYYY-MM-DD dates (see database._canonical_due_dates),
+        # which a row older than that check can still carry into a write.
+        try:
+            with self.repo.transaction():
+                yield
+        except sqlite3.IntegrityError as e:
+            if "due_date" not in str(e):
+                raise
+            raise LMSError("This assignment's due date is not a valid YYYY-MM-DD date; "
+                           "the teacher needs to correct it first") from e
+
+    def _award_points(self, student, points, reason):
+        # Called inside the transaction that records the action itself, so the
+        # badge counters already include it.
+        with self.repo.transaction():
+            self.repo.add_points(student, points, reason)
+            return evaluate_badges(self.repo, student)
+
+    def _course_name(self, course_id):
+        course = self.repo.courses.get(course_id)
+        if course is None:
+            raise LMSError(f"No course with ID {course_id}")
+        return course.course_name
+
+    def _assignment_definition(self, course_id, def_id):
+        for definition in self.repo.get_assignment_definitions(course_id):
+            if definition[0] == def_id:
+                return definition
+        raise LMSError(f"No assignment {def_id} in course {course_id}")
+
+    def _check_enrolled(self, student, course_id):
+        if course_id not in self.repo.get_enrolled_course_ids(student):
+            raise LMSError(f"{student} is not enrolled in {self._course_name(course_id)}")
+
+    def _check_due_date(self, due_date):
+        if not validate_due_date(due_date):
+            raise LMSError("Invalid date!")
+
+    # Students
+    def enroll(self, student, course_id):
+        # Returns the badges the enrolment earned.
+        course_name = self._course_name(course_id)
+        if course_id in self.repo.get_enrolled_course_ids(student):
+            raise LMSError(f"Already enrolled in {course_name}")
+        with self.repo.transaction():
+            self.repo.enroll(course_id, student)
+            self.repo.add_notification(student, f"Enrolled in {course_name}")
+            return self._award_points(student, ENROLL_POINTS, f"Enrolled in {course_name}")
+
+    def store_submission_file(self, source, progress=None):
+        # Copies the file into the blob store and returns (blob, file_size).
+        # The slow half of a submission, so the dashboard runs it on a worker.
+        if not os.path.isfile(source):
+            raise LMSError(f"No such file: {source}")
+        return self.blobs.put(source, progress=progress)
+
+    def fetch_submission_file(self, blob, progress=None):
+        # The local path of a stored submission file. client.RemoteService
+        # downloads it from the server first.
+        return self.blobs.path(blob)
+
+    def record_submission(self, student, course_id, def_id, source, blob, file_size):
+        # Records a file already stored by store_submission_file. Returns the
+        # badges the submission earned.
+        self._check_enrolled(student, course_id)
+        _, title, due_date = self._assignment_definition(course_id, def_id)
+        # blob comes from the caller (over the network with a server), so it
+        # must name a stored file of the size claimed.
+        stored = self.blobs.path(blob) if isinstance(blob, str) and is_digest(blob) else None
+        if stored is None or not os.path.isfile(stored) or os.path.getsize(stored) != file_size:
+            raise LMSError("The submitted file was not stored, please submit it again")
+        file_path = os.path.join("assignments", f"{student}_{course_id}_{def_id}_{os.path.basename(source)}")
+        with self._dated_transaction():
+            self.repo.add_submission(course_id, student, file_path, due_date, title, blob, file_size)
+            self.repo.add_notification(student, f"Submitted {title}")
+            return self._award_points(student, SUBMISSION_POINTS, f"Submitted assignment '{title}'")
+
+    def submit_assignment(self, student, course_id, def_id, source, progress=None):
+        self._check_enrolled(student, course_id)
+        self._assignment_definition(course_id, def_id)
+        blob, file_size = self.store_submission_file(source, progress)
+        return self.record_submission(student, course_id, def_id, source, blob, file_size)
+
+    def take_quiz(self, student, course_id, quiz_id, answer):
+        # answer is the index of the chosen option. Returns (score, badges
+        # earned).
+        self._check_enrolled(student, course_id)
+        quiz = next((q for q in self.repo.get_open_quizzes(course_id, student) if q[0] == quiz_id), None)
+        if quiz is None:
+            raise LMSError(f"Quiz {quiz_id} is not open to {student} in course {course_id}")
+        _, title, _, options = quiz
+        if not 0 <= answer < len(options.split("|")):
+            raise LMSError(f"Answer must be between 0 and {len(options.split('|')) - 1}")
+        score = 1 if answer == self.repo.get_quiz_answer(quiz_id) else 0
+        with self.repo.transaction():
+            self.repo.add_quiz_submission(quiz_id, student, answer, score)
+            self.repo.add_notification(student, f"Quiz '{title}': {score}/1")
+            earned = self._award_points(student, QUIZ_POINTS, f"Completed quiz '{title}'")
+        return score, earned
+
+    def grade_stats(self, student):
+        # (number of grades, average) over numeric assignment grades and quiz
+        # scores as percentages, or None without any.
+        grades = [int(g) for g in self.repo.get_assignment_grades(student) if g.isdigit()]
+        grades += [s * 100 for s in self.repo.get_quiz_scores(student)]
+        if not grades:
+            return None
+        return len(grades), sum(grades) / len(grades)
+
+    def send_message(self, sender, course_id, message):
+        # Messages the course's teacher, who is returned.
+        teacher = self.repo.get_course_teacher(course_id)
+        if teacher is None:
+            raise LMSError(f"No course with ID {course_id}")
+        with self.repo.transaction():
+            self.repo.add_message(sender, teacher, course_id, message, now_timestamp())
+            self.repo.add_notification(teacher, f"New message from {sender}")
+        return teacher
+
+    def mark_notification_read(self, notif_id):
+        self.repo.mark_notification_read(notif_id)
+
+    def post_chat_message(self, course_id, sender, message):
+        self.repo.add_chat_message(course_id, sender, message, now_timestamp())
+
+    # Teachers
+    def add_course(self, teacher, course_name):
+        return self.repo.add_course(course_name, teacher)
+
+    def update_course_description(self, course_id, description):
+        self._course_name(course_id)
+        self.repo.update_course_description(course_id, description)
+
+    def create_assignment(self, course_id, title, due_date):
+        self._check_due_date(due_date)
+        self._course_name(course_id)
+        with self._dated_transaction():
+            def_id = self.repo.add_assignment_definition(course_id, title, due_date)
+            self.repo.notify_course(course_id, f"New assignment '{title}' due {due_date}")
+        return def_id
+
+    def update_assignment(self, course_id, def_id, title, due_date):
+        self._check_due_date(due_date)
+        self._assignment_definition(course_id, def_id)
+        with self._dated_transaction():
+            self.repo.update_assignment_definition(def_id, title, due_date)
+            self.repo.notify_course(course_id, f"Assignment '{title}' updated: due {due_date}")
+
+    def create_quiz(self, course_id, title, due_date, question, options, correct_answer):
+        # options is "A|B|C|D"; correct_answer is the index of the right one.
+        self._check_due_date(due_date)
+        if len(options.split("|")) != QUIZ_OPTIONS:
+            raise LMSError(f"Need {QUIZ_OPTIONS} options!")
+        if not 0 <= correct_answer < QUIZ_OPTIONS:
+            raise LMSError(f"Correct answer must be between 0 and {QUIZ_OPTIONS - 1}")
+        self._course_name(course_id)
+        with self._dated_transaction():
+            quiz_id = self.repo.add_quiz(course_id, title, due_date, question, options, correct_answer)
+            self.repo.notify_course(course_id, f"New quiz '{title}' due {due_date}")
+        return quiz_id
+
+    def grade_submissions(self, teacher, grades):
+        # [(assignment_id, grade, comment)] in one transaction; returns the
+        # graded submission rows. Ids outside the teacher's courses are skipped.
+        return self.repo.grade_submissions(teacher, [(assignment_id, grade, comment)
+                                                     for assignment_id, grade, comment in grades if grade])
+
+    def import_grades(self, teacher, path):
+        # Applies a CSV of assignment_id,grade[,comment]. Returns (graded
+        # rows, number of grades read).
+        grades = read_grades_csv(path)
+        return self.grade_submissions(teacher, grades), len(grades)
+
+    # Admins
+    def add_user(self, username, password, role):
+        if role not in ROLES:
+            raise LMSError(f"Role must be one of {', '.join(ROLES)}")
+        if not username or not password:
+            raise LMSError("Username and password are required")
+        self.repo.add_user(username, hash_password(password), role)
+
+    def remove_user(self, username):
+        self.repo.remove_user(username)
+
+    # Bulk jobs
+    def send_due_reminders(self, student=None, days=3):
+        return self.repo.add_due_reminders(student, days=days)
+
+    def reevaluate_badges(self):
+        return reevaluate_all_badges(self.repo)
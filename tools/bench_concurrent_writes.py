@@ -0,0 +1,88 @@
+# tools/bench_concurrent_writes.py
+# Several writer processes doing submit_assignment-style transactions against
+# one database file, the way several lab seats share resources/school_lms.db.
+#
+#   python -m tools.bench_concurrent_writes --writers 8 --submissions 200
+#   python -m tools.bench_concurrent_writes --journal-mode delete   # old behaviour
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+from database import configure_db, init_db, is_busy_error
+from repository import Repository
+
+def writer(db_path, settings, worker_id, submissions, course_id, results):
+    configure_db(**settings)
+    repo = Repository(db_path)
+    student = f"bench_student{worker_id}"
+    latencies = []
+    errors = 0
+    for i in range(submissions):
+        start = time.perf_counter()
+        try:
+            with repo.transaction():
+                repo.add_submission(course_id, student, f"assignments/{student}_{i}.txt", "2030-01-01", f"Bench {i}")
+                repo.add_notification(student, f"Submitted Bench {i}")
+                repo.add_points(student, 20, f"Submitted assignment 'Bench {i}'")
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e):
+                raise
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    repo.close()
+    results.put((latencies, errors))
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent submission benchmark")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--submissions", type=int, default=200, help="transactions per writer")
+    parser.add_argument("--journal-mode", default="wal")
+    parser.add_argument("--synchronous", default="normal")
+    parser.add_argument("--busy-retries", type=int, default=5)
+    parser.add_argument("--db", help="database to write to (default: a temporary copy)")
+    args = parser.parse_args()
+
+    settings = {"journal_mode": args.journal_mode, "synchronous": args.synchronous,
+                "busy_retries": args.busy_retries}
+    configure_db(**settings)
+    tmp_dir = None
+    db_path = args.db
+    if db_path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp_dir.name, "bench.db")
+    init_db(db_path=db_path)
+    setup = Repository(db_path)
+    course_id = setup.add_course("Benchmark", "teacher1")
+    setup.close()
+
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=writer, args=(db_path, settings, n, args.submissions, course_id, results))
+             for n in range(args.writers)]
+    start = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    latencies, errors = [], 0
+    for _ in procs:
+        worker_latencies, worker_errors = results.get()
+        latencies.extend(worker_latencies)
+        errors += worker_errors
+    for proc in procs:
+        proc.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"journal_mode={args.journal_mode} synchronous={args.synchronous} writers={args.writers}")
+    print(f"transactions: {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s)")
+    print(f"latency p50: {percentile(latencies, 50) * 1000:.1f} ms  p95: {percentile(latencies, 95) * 1000:.1f} ms  "
+          f"max: {max(latencies) * 1000:.1f} ms")
+    print(f"locked errors: {errors}")
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# tools/bench_server.py
+# Simulated lab seats against server.py: each seat logs in, makes the
+# dashboard's first loads in one batch, then polls and reads the way an open
+# dashboard does, with an occasional chat message. --direct runs the same
+# seats against the database file instead, for comparison.
+#
+#   python -m tools.bench_server --seats 30 --rounds 50
+#   python -m tools.bench_server --seats 30 --rounds 50 --direct
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date
+from client import RemoteRepository
+from database import hash_password, init_db
+from repository import Repository
+from server import LMSServer
+from services import get_service
+from tools.seed_data import scaled, seed
+
+# Every WRITE_EVERY rounds a seat posts to a course chat.
+WRITE_EVERY = 10
+
+def first_loads(username):
+    # Mirrors login.prefetch_dashboard for a student.
+    today = date.today()
+    return [("count_unread_notifications", (username,)), ("get_home_stats", (username,)),
+            ("get_enrolled_courses", (username,)), ("get_grade_chart", (username,)),
+            ("get_progress_chart", (username,)), ("get_calendar", (username, today.year, today.month))]
+
+def seat(open_repo, username, rounds, seed_value, timings, errors):
+    rng = random.Random(seed_value)
+    repo = open_repo()
+
+    def timed(kind, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[kind].append((time.perf_counter() - start) * 1000)
+        return result
+
+    try:
+        timed("login", repo.authenticate, username, hash_password("pass123"))
+        courses = timed("first loads", repo.call_many, first_loads(username))[2]
+        service = get_service(repo)
+        for n in range(rounds):
+            timed("poll", repo.data_version)
+            timed("read", rng.choice([repo.count_unread_notifications, repo.get_home_stats,
+                                      repo.get_grade_chart, repo.get_progress_chart]), username)
+            if courses and n % WRITE_EVERY == WRITE_EVERY - 1:
+                timed("write", service.post_chat_message, rng.choice(courses)[0], username, f"round {n}")
+    except Exception as e:
+        errors.append(f"{username}: {e!r}")
+    finally:
+        repo.close()
+
+def start_server(db_path, read_threads):
+    # The server's event loop on a thread of its own; returns (server, url).
+    server = LMSServer(db_path, read_threads)
+    ready = threading.Event()
+    port = []
+
+    def run():
+        asyncio.run(server.serve("127.0.0.1", 0, ready=lambda p: (port.append(p), ready.set())))
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return server, f"http://127.0.0.1:{port[0]}"
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description="LAN server load benchmark")
+    parser.add_argument("--seats", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=50, help="poll-and-read rounds per seat")
+    parser.add_argument("--read-threads", type=int, default=4, help="the server's reader connections")
+    parser.add_argument("--direct", action="store_true", help="open the database file instead of a server")
+    parser.add_argument("--db", help="database to copy and load (default: a small seeded database)")
+    args = parser.parse_args()
+
+    # Seats write chat messages, so always work on a copy.
+    tmp_dir = tempfile.TemporaryDirectory()
+    db_path = os.path.join(tmp_dir.name, "bench.db")
+    if args.db:
+        shutil.copyfile(args.db, db_path)
+    init_db(db_path=db_path)
+    if not args.db:
+        seed(db_path, **scaled(0.05))
+    setup = Repository(db_path)
+    students = [row[0] for row in setup.get_users() if row[1] == "student"]
+    setup.close()
+
+    server = None
+    if args.direct:
+        open_repo = lambda: Repository(db_path)
+    else:
+        server, url = start_server(db_path, args.read_threads)
+        open_repo = lambda: RemoteRepository(url)
+
+    timings = {kind: [] for kind in ("login", "first loads", "poll", "read", "write")}
+    errors = []
+    rng = random.Random(1)
+    threads = [threading.Thread(target=seat, args=(open_repo, rng.choice(students), args.rounds, n, timings, errors))
+               for n in range(args.seats)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    calls = sum(len(values) for values in timings.values())
+    print(f"{'direct' if args.direct else 'server'}: seats={args.seats} rounds={args.rounds}")
+    print(f"requests: {calls} in {elapsed:.2f}s ({calls / elapsed:.0f}/s)")
+    print(f"{'request':14} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for kind, values in timings.items():
+        if values:
+            print(f"{kind:14} {len(values):7} {percentile(values, 50):9.2f} {percentile(values, 95):9.2f} "
+                  f"{max(values):9.2f}")
+    if server is not None:
+        print(f"server: {server.stats}")
+    for error in errors[:10]:
+        print(f"error: {error}")
+    tmp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
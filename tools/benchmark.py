@@ -0,0 +1,175 @@
+# tools/benchmark.py
+# Times the SQL behind each DashboardWindow operation without starting Qt and
+# reports p50/p95 per operation.
+#
+#   python -m tools.seed_data --db big.db
+#   python -m tools.benchmark --db big.db --json before.json
+#   python -m tools.benchmark --db big.db --baseline before.json   # show the change per operation
+#
+# Without --db a small seeded temporary database is used. Operations that
+# write run inside a transaction that is rolled back, so every iteration sees
+# the same data and an existing database is left untouched.
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+from badges import evaluate_badges
+from database import hash_password, init_db
+from repository import MAX_KEY, Repository
+from tools.seed_data import scaled, seed
+
+PAGE_SIZE = 100
+
+class Rollback(Exception):
+    pass
+
+# Each operation mirrors the repository calls the dashboard method of the same
+# name makes for one user; keep them in step when the dashboard changes.
+def login(repo, user):
+    return repo.authenticate(user, hash_password("pass123"))
+
+def refresh_home(repo, user):
+    return repo.get_home_stats(user)
+
+def refresh_grade_list(repo, user):
+    return repo.get_grade_chart(user)
+
+def refresh_progress_list(repo, user):
+    return repo.get_progress_chart(user)
+
+def refresh_leaderboard(repo, user):
+    return repo.get_leaderboard()
+
+def refresh_course_list(repo, user):
+    return repo.get_enrolled_courses(user)
+
+def refresh_notif_list(repo, user):
+    return repo.count_unread_notifications(user), repo.get_notifications_page(user, 0, PAGE_SIZE)
+
+def refresh_message_list(repo, user):
+    return repo.get_received_messages_page(user, 0, PAGE_SIZE)
+
+def refresh_chat_list(repo, user):
+    course_ids = repo.get_enrolled_course_ids(user)
+    return repo.get_chat_page_before(course_ids[0], MAX_KEY, PAGE_SIZE) if course_ids else []
+
+def update_calendar(repo, user):
+    today = datetime.now()
+    return repo.get_calendar(user, today.year, today.month)
+
+def show_calendar_events(repo, user):
+    date_str = datetime.now().strftime("%Y-%m-%d")
+    return repo.get_events_due_on(user, date_str)
+
+def award_points(repo, user):
+    with repo.transaction():
+        repo.add_points(user, 20, "Submitted assignment 'Benchmark'")
+        return evaluate_badges(repo, user)
+
+def check_due_dates(repo, user):
+    return repo.add_due_reminders(user)
+
+def due_reminders_all(repo, user):
+    # The whole-school batch run by tools.due_reminders.
+    return repo.add_due_reminders()
+
+def refresh_course_list_teacher(repo, user):
+    return repo.get_teacher_courses(user)
+
+def refresh_conversation_list(repo, user):
+    # The teacher's message tab shows sent and received messages.
+    return repo.get_conversation_page(user, 0, PAGE_SIZE)
+
+def refresh_assignment_list(repo, user):
+    return repo.get_teacher_submissions_page(user, 0, PAGE_SIZE)
+
+def create_assignment(repo, user):
+    courses = repo.get_teacher_courses(user)
+    if courses:
+        repo.add_assignment_definition(courses[0][0], "Benchmark", "2030-01-01")
+        repo.notify_course(courses[0][0], "New assignment 'Benchmark' due 2030-01-01")
+
+def refresh_user_list(repo, user):
+    return repo.get_users()
+
+STUDENT_OPERATIONS = [login, refresh_home, refresh_grade_list, refresh_progress_list, refresh_leaderboard,
+                      refresh_course_list, refresh_notif_list, refresh_message_list, refresh_chat_list,
+                      update_calendar, show_calendar_events, award_points, check_due_dates]
+TEACHER_OPERATIONS = [refresh_course_list_teacher, refresh_assignment_list, refresh_conversation_list,
+                      create_assignment]
+ADMIN_OPERATIONS = [refresh_user_list, due_reminders_all]
+WRITES = {award_points, check_due_dates, due_reminders_all, create_assignment}
+
+def run(repo, operation, user):
+    if operation not in WRITES:
+        return operation(repo, user)
+    try:
+        with repo.transaction():
+            operation(repo, user)
+            raise Rollback()
+    except Rollback:
+        pass
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard query benchmark")
+    parser.add_argument("--db", help="database to benchmark (default: a small seeded temporary database)")
+    parser.add_argument("--iterations", type=int, default=50, help="timed runs per operation")
+    parser.add_argument("--only", nargs="*", help="operation names to run")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare against results written earlier with --json")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    db_path = args.db
+    if db_path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp_dir.name, "benchmark.db")
+        init_db(db_path=db_path)
+        seed(db_path, **scaled(0.05))
+    repo = Repository(db_path)
+    rng = random.Random(1)
+    users = {role: [row[0] for row in repo.get_users() if row[1] == role] for role in ("student", "teacher", "admin")}
+    plan = [(op, "student") for op in STUDENT_OPERATIONS] + [(op, "teacher") for op in TEACHER_OPERATIONS] + \
+           [(op, "admin") for op in ADMIN_OPERATIONS]
+
+    results = {}
+    for operation, role in plan:
+        name = operation.__name__
+        if args.only and name not in args.only or not users[role]:
+            continue
+        run(repo, operation, rng.choice(users[role]))  # warm the cache and statement
+        timings = []
+        for _ in range(args.iterations):
+            user = rng.choice(users[role])
+            start = time.perf_counter()
+            run(repo, operation, user)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {"p50": percentile(timings, 50), "p95": percentile(timings, 95), "max": max(timings)}
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["operations"]
+    print(f"{'operation':32} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}" + ("  p50 vs baseline" if baseline else ""))
+    for name, stats in results.items():
+        line = f"{name:32} {stats['p50']:9.2f} {stats['p95']:9.2f} {stats['max']:9.2f}"
+        if name in baseline and baseline[name]["p50"] > 0:
+            line += f"  {stats['p50'] / baseline[name]['p50']:.2f}x"
+        print(line)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"db": db_path, "iterations": args.iterations, "operations": results}, f, indent=2)
+    repo.close()
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# tools/blob_store.py
+# Maintenance for the submission blob store (blobstore.py).
+#
+#   python -m tools.blob_store                 # report blobs, references and garbage
+#   python -m tools.blob_store --gc            # delete blobs no submission references
+#   python -m tools.blob_store --gc --dry-run  # list what --gc would delete
+#   python -m tools.blob_store --adopt         # move pre-store submission files into the store
+#
+# --gc leaves blobs younger than --grace seconds alone, so it is safe to run
+# while the application is in use.
+import argparse
+import os
+from blobstore import BLOB_ROOT, GC_GRACE_SECONDS, BlobStore
+from database import DB_PATH
+from repository import Repository
+
+def adopt(repo, store):
+    # Files are hardlinked into the store and only removed once every row
+    # naming them points at their blob, so an interrupted run loses nothing.
+    adopted = missing = 0
+    digests = {}
+    with repo.transaction():
+        for assignment_id, file_path in repo.get_unstored_submissions():
+            if file_path not in digests:
+                digests[file_path] = store.put(file_path, link=True) if os.path.isfile(file_path) else None
+            if digests[file_path] is None:
+                missing += 1
+                continue
+            repo.set_submission_blob(assignment_id, *digests[file_path])
+            adopted += 1
+    for file_path, digest in digests.items():
+        if digest is not None:
+            os.remove(file_path)
+    return adopted, missing
+
+def main():
+    parser = argparse.ArgumentParser(description="Blob store maintenance")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--root", default=BLOB_ROOT, help="blob store directory")
+    parser.add_argument("--gc", action="store_true", help="delete unreferenced blobs")
+    parser.add_argument("--dry-run", action="store_true", help="with --gc, only report")
+    parser.add_argument("--grace", type=int, default=GC_GRACE_SECONDS, help="keep unreferenced blobs younger than this (s)")
+    parser.add_argument("--adopt", action="store_true", help="move submissions stored before the blob store into it")
+    args = parser.parse_args()
+
+    repo = Repository(args.db)
+    store = BlobStore(args.root)
+    if args.adopt:
+        adopted, missing = adopt(repo, store)
+        print(f"adopted {adopted} submission(s); {missing} with no file on disk")
+
+    referenced = repo.get_referenced_blobs()
+    stored = [(digest, path) for digest, path in store.blobs()]
+    size = sum(os.path.getsize(path) for _, path in stored)
+    print(f"{len(stored)} file(s), {size / 1e6:.1f} MB in {args.root}; {len(referenced)} referenced blob(s)")
+    lost = referenced - {digest for digest, _ in stored}
+    if lost:
+        print(f"warning: {len(lost)} referenced blob(s) missing from disk")
+
+    removed, freed = store.collect(referenced, grace=args.grace, dry_run=args.dry_run or not args.gc)
+    if args.gc and not args.dry_run:
+        repo.delete_unreferenced_blobs()
+        print(f"removed {removed} file(s), freed {freed / 1e6:.1f} MB")
+    else:
+        print(f"{removed} file(s), {freed / 1e6:.1f} MB collectable")
+    repo.close()
+
+if __name__ == "__main__":
+    main()
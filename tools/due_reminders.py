@@ -0,0 +1,25 @@
+# tools/due_reminders.py
+# Adds due-soon reminders for every student in one pass, e.g. from a nightly
+# scheduled task, so students see them before they next log in.
+#
+#   python -m tools.due_reminders
+#   python -m tools.due_reminders --db big.db --days 7
+import argparse
+import time
+from database import DB_PATH
+from repository import Repository
+
+def main():
+    parser = argparse.ArgumentParser(description="Add due-soon reminders for all students")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--days", type=int, default=3, help="remind about anything due within this many days")
+    args = parser.parse_args()
+
+    repo = Repository(args.db)
+    start = time.perf_counter()
+    added = repo.add_due_reminders(days=args.days)
+    print(f"added {added} reminders in {(time.perf_counter() - start) * 1000:.0f} ms")
+    repo.close()
+
+if __name__ == "__main__":
+    main()
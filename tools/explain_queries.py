@@ -0,0 +1,81 @@
+# tools/explain_queries.py
+# Runs EXPLAIN QUERY PLAN on every SQL statement the dashboard uses (the
+# constants in repository.py) and flags full table scans.
+#
+#   python -m tools.explain_queries                  # against a seeded temporary database
+#   python -m tools.explain_queries --db big.db      # e.g. one made by tools.seed_data
+#   python -m tools.explain_queries --verbose        # print every plan
+#
+# Exits with status 1 if a scan shows up that is not listed in EXPECTED_SCANS.
+import argparse
+import os
+import re
+import sys
+import tempfile
+import repository
+from database import connect, init_db
+from tools.seed_data import scaled, seed
+
+STATEMENT = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+FULL_SCAN = re.compile(r"\bSCAN (?!.*\bUSING\b)(\w+)")
+# Subqueries SQLite runs as a co-routine or materializes; scanning one of
+# those reads the subquery's rows, not a table.
+SUBQUERY = re.compile(r"^(?:CO-ROUTINE|MATERIALIZE) (\w+)")
+
+# Scans that are inherent to what the query returns.
+EXPECTED_SCANS = {
+    "USERS": "the admin tab lists every user",
+    "AVAILABLE_COURSES": "lists every course the student is not enrolled in",
+    "POINTS_TOTALS_MISMATCHES": "reconciles the whole ledger",
+    "REFERENCED_BLOBS": "garbage collection reads every live blob",
+    "DELETE_UNREFERENCED_BLOBS": "garbage collection sweeps the blobs table",
+    "UNSTORED_SUBMISSIONS": "one-off import of files from before the blob store",
+}
+
+def queries():
+    for name, value in vars(repository).items():
+        if name.isupper() and not name.startswith("_") and isinstance(value, str) and STATEMENT.match(value):
+            yield name, value
+
+def main():
+    parser = argparse.ArgumentParser(description="Query plan audit for repository.py")
+    parser.add_argument("--db", help="database to explain against (default: a seeded temporary database)")
+    parser.add_argument("--verbose", action="store_true", help="print every plan, not just the scans")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    db_path = args.db
+    if db_path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp_dir.name, "explain.db")
+        init_db(db_path=db_path)
+        # Small, but with realistic distributions for ANALYZE to work from.
+        seed(db_path, **scaled(0.05))
+    conn = connect(db_path)
+
+    unexpected = 0
+    for name, sql in queries():
+        params = [None] * sql.count("?")
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        subqueries = {match.group(1) for line in plan for match in [SUBQUERY.match(line)] if match}
+        scans = [match.group(1) for line in plan for match in [FULL_SCAN.search(line)]
+                 if match and match.group(1) not in subqueries]
+        if scans and name not in EXPECTED_SCANS:
+            unexpected += 1
+            print(f"SCAN  {name}: full scan of {', '.join(scans)}")
+        elif scans:
+            print(f"ok    {name}: expected scan ({EXPECTED_SCANS[name]})")
+        elif args.verbose:
+            print(f"ok    {name}")
+        if args.verbose or (scans and name not in EXPECTED_SCANS):
+            for line in plan:
+                print(f"        {line}")
+
+    conn.close()
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+    print(f"{unexpected} unexpected full table scan(s)")
+    sys.exit(1 if unexpected else 0)
+
+if __name__ == "__main__":
+    main()
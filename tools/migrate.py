@@ -0,0 +1,32 @@
+# tools/migrate.py
+# Applies pending schema migrations (database.MIGRATIONS) with progress, e.g.
+# before a large existing database is first opened by a new version.
+#
+#   python -m tools.migrate             # migrate to the current schema version
+#   python -m tools.migrate --status    # only report the version and pending steps
+#
+# An interrupted run can simply be started again; it resumes at the step it
+# was in, keeping the batches of that step already committed.
+import argparse
+import time
+from database import DB_PATH, MIGRATIONS, SCHEMA_VERSION, connect, migrate, schema_version
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--status", action="store_true", help="report pending migrations without applying them")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    version = schema_version(conn)
+    print(f"schema version {version} of {SCHEMA_VERSION}")
+    for number, (name, _) in enumerate(MIGRATIONS[version:], version + 1):
+        print(f"  pending {number}: {name}")
+    if not args.status and version < SCHEMA_VERSION:
+        start = time.perf_counter()
+        migrate(conn, progress=lambda message: print(f"[{time.perf_counter() - start:7.1f} s] {message}"))
+        print(f"now at schema version {schema_version(conn)} ({time.perf_counter() - start:.1f} s)")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# tools/points_totals.py
+# Reconciles the points_totals table against the points ledger it summarises.
+#
+#   python -m tools.points_totals              # report students whose totals disagree
+#   python -m tools.points_totals --rebuild    # recompute every total from the ledger
+#
+# Exits with status 1 if mismatches were found and not rebuilt.
+import argparse
+import sys
+import time
+from database import DB_PATH
+from repository import Repository
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify or rebuild per-student points totals")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="recompute all totals from the ledger")
+    parser.add_argument("--limit", type=int, default=20, help="mismatches to list")
+    args = parser.parse_args()
+
+    repo = Repository(args.db)
+    start = time.perf_counter()
+    mismatches = repo.find_points_total_mismatches()
+    for student, ledger, total in mismatches[:args.limit]:
+        print(f"{student}: ledger {ledger}, total {total}")
+    print(f"{len(mismatches)} mismatched student(s) ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    if args.rebuild:
+        start = time.perf_counter()
+        students = repo.rebuild_points_totals()
+        print(f"rebuilt totals for {students} student(s) ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    repo.close()
+    sys.exit(1 if mismatches and not args.rebuild else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# tools/reevaluate_badges.py
+# Applies every badge rule in badges.py to every student in one transaction,
+# e.g. after adding a rule or lowering a threshold.
+#
+#   python -m tools.reevaluate_badges --db resources/school_lms.db
+import argparse
+import time
+from badges import reevaluate_all_badges
+from database import DB_PATH
+from repository import Repository
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-evaluate badge rules for all students")
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    repo = Repository(args.db)
+    start = time.perf_counter()
+    awarded = reevaluate_all_badges(repo)
+    for badge_name, students in awarded.items():
+        print(f"{badge_name}: awarded to {students} student(s)")
+    print(f"done in {(time.perf_counter() - start) * 1000:.0f} ms")
+    repo.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# tools/seed_data.py
+# Fills every table init_db creates with a synthetic school, for benchmarks and
+# query-plan checks. The defaults are a large school; --scale shrinks or grows
+# the number of students, teachers and courses while keeping the per-student
+# and per-course volumes.
+#
+#   python -m tools.seed_data --db big.db                # 20k students, 500 courses, ~2M notifications
+#   python -m tools.seed_data --db small.db --scale 0.05
+#
+# Every seeded account uses the password "pass123". Usernames are student<n>
+# and teacher<n>, so the default student1/teacher1 logins see seeded data.
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+from database import connect, hash_password, init_db
+
+DEFAULTS = {
+    "students": 20000,
+    "teachers": 200,
+    "courses": 500,
+    "enrollments_per_student": 5,
+    "assignments_per_course": 10,
+    "quizzes_per_course": 10,
+    "submission_rate": 0.5,          # share of a student's assignments/quizzes already submitted
+    "notifications_per_student": 100,
+    "messages_per_student": 10,
+    "chat_per_course": 2000,
+}
+POPULATION = {"students", "teachers", "courses"}
+BATCH = 50000
+
+def scaled(scale, **overrides):
+    counts = dict(DEFAULTS)
+    for name, value in counts.items():
+        if name in POPULATION:
+            counts[name] = max(1, int(value * scale))
+    counts.update({name: value for name, value in overrides.items() if value is not None})
+    return counts
+
+def insert(conn, sql, rows):
+    # executemany over bounded batches keeps memory flat for millions of rows.
+    batch = []
+    total = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH:
+            conn.executemany(sql, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+        total += len(batch)
+    return total
+
+def seed(db_path, seed_value=1, progress=None, **counts):
+    counts = {**DEFAULTS, **counts}
+    rng = random.Random(seed_value)
+    report = progress or (lambda table, rows: None)
+    today = date.today()
+    # Due dates from a month ago to two months ahead, so reminders and the
+    # calendar both have something to show.
+    due = lambda: (today + timedelta(days=rng.randint(-30, 60))).isoformat()
+    stamp = lambda: f"{(today - timedelta(days=rng.randint(0, 365))).isoformat()} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"
+
+    students = [f"student{n}" for n in range(1, counts["students"] + 1)]
+    teachers = [f"teacher{n}" for n in range(1, counts["teachers"] + 1)]
+    password = hash_password("pass123")
+
+    conn = connect(db_path)
+    conn.execute("PRAGMA synchronous=OFF")
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO users VALUES (?, ?, 'student')", [(s, password) for s in students])
+        conn.executemany("INSERT OR REPLACE INTO users VALUES (?, ?, 'teacher')", [(t, password) for t in teachers])
+        report("users", len(students) + len(teachers))
+
+        first_course = conn.execute("SELECT COALESCE(MAX(course_id), 0) + 1 FROM courses").fetchone()[0]
+        course_ids = range(first_course, first_course + counts["courses"])
+        conn.executemany("INSERT INTO courses (course_id, course_name, teacher, description) VALUES (?, ?, ?, ?)",
+                         [(c, f"Course {c}", teachers[c % len(teachers)], f"Seeded course {c}") for c in course_ids])
+        report("courses", len(course_ids))
+
+        definitions = {c: [(f"Assignment {c}-{n}", due()) for n in range(counts["assignments_per_course"])]
+                       for c in course_ids}
+        report("assignment_definitions", insert(conn,
+               "INSERT INTO assignment_definitions (course_id, title, due_date) VALUES (?, ?, ?)",
+               ((c, title, due_date) for c, items in definitions.items() for title, due_date in items)))
+
+        first_quiz = conn.execute("SELECT COALESCE(MAX(quiz_id), 0) + 1 FROM quizzes").fetchone()[0]
+        quizzes = {}
+        quiz_id = first_quiz
+        for c in course_ids:
+            quizzes[c] = []
+            for n in range(counts["quizzes_per_course"]):
+                quizzes[c].append((quiz_id, f"Quiz {c}-{n}", due()))
+                quiz_id += 1
+        report("quizzes", insert(conn,
+               "INSERT INTO quizzes (quiz_id, course_id, title, due_date, question, options, correct_answer) "
+               "VALUES (?, ?, ?, ?, 'Pick one', 'A|B|C', 0)",
+               ((q, c, title, due_date) for c, items in quizzes.items() for q, title, due_date in items)))
+
+        enrolled = {s: rng.sample(course_ids, min(counts["enrollments_per_student"], len(course_ids)))
+                    for s in students}
+        report("enrollments", insert(conn, "INSERT INTO enrollments (course_id, student) VALUES (?, ?)",
+                                     ((c, s) for s, courses in enrolled.items() for c in courses)))
+
+        rate = counts["submission_rate"]
+        submissions = [(c, s, title, due_date) for s, courses in enrolled.items() for c in courses
+                       for title, due_date in definitions[c] if rng.random() < rate]
+        report("assignments", insert(conn,
+               "INSERT INTO assignments (course_id, student, file_path, grade, due_date, description) "
+               "VALUES (?, ?, ?, ?, ?, ?)",
+               ((c, s, f"assignments/{s}_{c}_{title}.txt", str(rng.randint(50, 100)) if rng.random() < 0.7 else None,
+                 due_date, title) for c, s, title, due_date in submissions)))
+
+        quiz_submissions = [(q, s, title) for s, courses in enrolled.items() for c in courses
+                            for q, title, _ in quizzes[c] if rng.random() < rate]
+        report("quiz_submissions", insert(conn,
+               "INSERT INTO quiz_submissions (quiz_id, student, answer, score) VALUES (?, ?, ?, ?)",
+               ((q, s, answer, 1 if answer == 0 else 0) for q, s, _ in quiz_submissions
+                for answer in [rng.randint(0, 2)])))
+
+        # The points ledger matches what the dashboard awards for each action.
+        def ledger():
+            for s, courses in enrolled.items():
+                for c in courses:
+                    yield s, 10, f"Enrolled in Course {c}"
+            for c, s, title, _ in submissions:
+                yield s, 20, f"Submitted assignment '{title}'"
+            for _, s, title in quiz_submissions:
+                yield s, 15, f"Completed quiz '{title}'"
+        report("points", insert(conn, "INSERT INTO points (student, points, reason) VALUES (?, ?, ?)", ledger()))
+
+        report("badges", insert(conn, "INSERT INTO badges (student, badge_name, awarded_date) VALUES (?, ?, ?)",
+               ((s, badge, stamp()[:10]) for s in students
+                for badge in ("Star Student", "Quiz Master", "Early Bird") if rng.random() < 0.3)))
+
+        report("notifications", insert(conn,
+               "INSERT INTO notifications (username, message, is_read) VALUES (?, ?, ?)",
+               ((s, f"Notification {n} for {s}", 1 if rng.random() < 0.8 else 0)
+                for s in students for n in range(counts["notifications_per_student"]))))
+
+        def messages():
+            for s, courses in enrolled.items():
+                for n in range(counts["messages_per_student"]):
+                    c = rng.choice(courses)
+                    teacher = teachers[c % len(teachers)]
+                    sender, receiver = (s, teacher) if n % 2 == 0 else (teacher, s)
+                    yield sender, receiver, c, f"Message {n}", stamp()
+        report("messages", insert(conn,
+               "INSERT INTO messages (sender, receiver, course_id, message, timestamp) VALUES (?, ?, ?, ?, ?)",
+               messages()))
+
+        members = {}
+        for s, courses in enrolled.items():
+            for c in courses:
+                members.setdefault(c, []).append(s)
+        report("chat_messages", insert(conn,
+               "INSERT INTO chat_messages (course_id, sender, message, timestamp) VALUES (?, ?, ?, ?)",
+               ((c, rng.choice(members.get(c) or [teachers[c % len(teachers)]]), f"Chat {n}", stamp())
+                for c in course_ids for n in range(counts["chat_per_course"]))))
+    conn.execute("ANALYZE")
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a synthetic school database")
+    parser.add_argument("--db", required=True, help="database file to create or add to")
+    parser.add_argument("--reset", action="store_true", help="delete the database first")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for students, teachers and courses")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    for name, value in DEFAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=None)
+    args = parser.parse_args()
+
+    if args.reset and os.path.exists(args.db):
+        os.remove(args.db)
+    init_db(db_path=args.db)
+    counts = scaled(args.scale, **{name: getattr(args, name) for name in DEFAULTS})
+    start = time.perf_counter()
+    seed(args.db, args.seed, progress=lambda table, rows: print(f"{table}: {rows} rows"), **counts)
+    print(f"seeded {args.db} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
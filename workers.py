@@ -0,0 +1,232 @@
+# workers.py
+import threading
+import traceback
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+class TaskSignals(QObject):
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+class QueryTask(QRunnable):
+    def __init__(self, key, func, args, thread_ids):
+        super().__init__()
+        self.key = key
+        self.func = func
+        self.args = args
+        self.thread_ids = thread_ids
+        # Created on the GUI thread, so emitting from the worker is delivered
+        # back to the GUI thread as a queued signal.
+        self.signals = TaskSignals()
+
+    def run(self):
+        self.thread_ids.add(threading.get_ident())
+        try:
+            result = self.func(*self.args)
+        except Exception:
+            self.signals.failed.emit(self.key, traceback.format_exc())
+        else:
+            self.signals.finished.emit(self.key, result)
+
+class QueryExecutor(QObject):
+    # Runs database loads on a small thread pool and hands results back to
+    # callbacks on the GUI thread. Loads are keyed per widget: requests made in
+    # the same event-loop turn collapse into one, and a request for a key that
+    # is already running is deferred until it finishes, so a burst of refreshes
+    # costs a single query per widget.
+    error = pyqtSignal(str, str)
+
+    def __init__(self, parent=None, max_threads=2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        # Keep worker threads (and the connection each one holds) alive
+        # instead of reopening them after every idle period; shutdown() ends
+        # them.
+        self.pool.setExpiryTimeout(-1)
+        self.thread_ids = set()
+        self._queued = {}
+        self._running = {}
+        self._deferred = {}
+        self._primed = {}
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(0)
+        self._flush_timer.timeout.connect(self._flush)
+
+    def load(self, key, func, *args, callback=None):
+        self._queued[key] = (func, args, callback)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def prime(self, results, timeout=5000):
+        # Results computed ahead of time, {key: (args, result)}: the first
+        # load of each key with the same args is answered from here instead of
+        # running. Unused results are dropped after `timeout` ms, by when they
+        # may be out of date.
+        self._primed.update(results)
+        QTimer.singleShot(timeout, self._primed.clear)
+
+    def is_busy(self, key):
+        return key in self._queued or key in self._running or key in self._deferred
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+    def shutdown(self):
+        # Drops pending loads, waits for running ones and ends the worker
+        # threads. Returns the ids of the threads that ran loads, so the
+        # caller can close the connections they held.
+        self._flush_timer.stop()
+        self._queued.clear()
+        self._deferred.clear()
+        self._primed.clear()
+        self.pool.clear()
+        self.pool.waitForDone()
+        self._running.clear()
+        thread_ids, self.thread_ids = self.thread_ids, set()
+        return thread_ids
+
+    def _flush(self):
+        queued, self._queued = self._queued, {}
+        for key, request in queued.items():
+            _, args, callback = request
+            primed = self._primed.pop(key, None)
+            if primed is not None and primed[0] == args and key not in self._running:
+                if callback is not None:
+                    callback(primed[1])
+            elif key in self._running:
+                self._deferred[key] = request
+            else:
+                self._start(key, request)
+
+    def _start(self, key, request):
+        func, args, callback = request
+        task = QueryTask(key, func, args, self.thread_ids)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        self._running[key] = (task, callback)
+        self.pool.start(task)
+
+    def _on_finished(self, key, result):
+        if key not in self._running:
+            return  # finished after shutdown()
+        task, callback = self._running.pop(key)
+        deferred = self._deferred.pop(key, None)
+        if deferred is not None:
+            # The result is already out of date; only deliver the newer load.
+            self._start(key, deferred)
+            return
+        if callback is not None:
+            callback(result)
+
+    def _on_failed(self, key, message):
+        if self._running.pop(key, None) is None:
+            return
+        deferred = self._deferred.pop(key, None)
+        if deferred is not None:
+            self._start(key, deferred)
+        print(f"Background load '{key}' failed:\n{message}")
+        self.error.emit(key, message)
+
+class TransferCancelled(Exception):
+    pass
+
+class TransferSignals(QObject):
+    progress = pyqtSignal(str, object, object)
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+    cancelled = pyqtSignal(str)
+
+class TransferTask(QRunnable):
+    # Runs func(*args, progress=self.report). func calls report(done, total)
+    # as data moves; once cancel() has been called the next report raises
+    # TransferCancelled, which unwinds func on its own thread.
+    def __init__(self, key, func, args):
+        super().__init__()
+        self.key = key
+        self.func = func
+        self.args = args
+        self.signals = TransferSignals()
+        self._cancelled = False
+        self._percent = -1
+
+    def cancel(self):
+        self._cancelled = True
+
+    def report(self, done, total):
+        if self._cancelled:
+            raise TransferCancelled()
+        # One signal per percent, however small the chunks.
+        percent = done * 100 // total if total else 100
+        if percent != self._percent:
+            self._percent = percent
+            self.signals.progress.emit(self.key, done, total)
+
+    def run(self):
+        try:
+            result = self.func(*self.args, progress=self.report)
+        except TransferCancelled:
+            self.signals.cancelled.emit(self.key)
+        except Exception:
+            self.signals.failed.emit(self.key, traceback.format_exc())
+        else:
+            self.signals.finished.emit(self.key, result)
+
+class TransferExecutor(QObject):
+    # File copies on a pool of their own, so a large upload never holds up
+    # the dashboard's queries. Progress, failures and cancellations are
+    # signalled on the GUI thread; the callback gets func's result.
+    progress = pyqtSignal(str, object, object)
+    error = pyqtSignal(str, str)
+    cancelled = pyqtSignal(str)
+
+    def __init__(self, parent=None, max_threads=1):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._running = {}
+
+    def start(self, key, func, *args, callback=None):
+        task = TransferTask(key, func, args)
+        task.signals.progress.connect(self.progress)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        task.signals.cancelled.connect(self._on_cancelled)
+        self._running[key] = (task, callback)
+        self.pool.start(task)
+
+    def cancel(self, key=None):
+        # Cancels one transfer, or every running one.
+        for running_key, (task, _) in list(self._running.items()):
+            if key is None or key == running_key:
+                task.cancel()
+
+    def is_busy(self, key=None):
+        return bool(self._running) if key is None else key in self._running
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+    def shutdown(self):
+        # Cancels every transfer and ends the worker thread.
+        self.cancel()
+        self.pool.waitForDone()
+        self._running.clear()
+
+    def _on_finished(self, key, result):
+        if key not in self._running:
+            return
+        _, callback = self._running.pop(key)
+        if callback is not None:
+            callback(result)
+
+    def _on_failed(self, key, message):
+        if self._running.pop(key, None) is None:
+            return
+        print(f"Transfer '{key}' failed:\n{message}")
+        self.error.emit(key, message)
+
+    def _on_cancelled(self, key):
+        if self._running.pop(key, None) is None:
+            return
+        self.cancelled.emit(key)